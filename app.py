@@ -3,6 +3,12 @@ from src.database.mongodb import db_client
 from src.api.fda_client import FDAClient
 from src.models.report import AdverseEventReport
 import pandas as pd
+import json
+import logging
+import os
+
+# Les modules du projet ne configurent pas le logging eux-mêmes
+logging.basicConfig(level=logging.INFO)
 
 # Configuration de la page
 st.set_page_config(
@@ -14,6 +20,64 @@ st.set_page_config(
 # Titre de l'application
 st.title("📊 FDA Adverse Event Reports Dashboard")
 
+
+@st.cache_resource
+def load_snapshot(directory: str, version: str):
+    # `version` (date du manifeste) invalide le cache quand un nouvel instantané est publié
+    from src.analytics.snapshot import Snapshot
+    return Snapshot(directory)
+
+
+def show_snapshot(directory: str) -> None:
+    """Tableau de bord servi depuis un instantané précalculé (aucun appel externe)."""
+    with open(os.path.join(directory, "manifest.json"), encoding="utf-8") as f:
+        created_at = json.load(f)["created_at"]
+    snapshot = load_snapshot(directory, created_at)
+    drugs = snapshot.drugs
+    if not drugs:
+        st.warning("Instantané vide")
+        return
+
+    with st.sidebar:
+        st.header("Paramètres de recherche")
+        drug = st.selectbox("Médicament", options=list(drugs), format_func=lambda d: f"{d} ({drugs[d]})")
+
+    st.caption(f"Instantané du {created_at[:16].replace('T', ' ')} UTC ({snapshot.manifest['reports']} rapports)")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Rapports", drugs[drug])
+    with col2:
+        st.metric("Médicaments", len(drugs))
+
+    st.subheader("Derniers rapports")
+    recent = snapshot.drug_table("recent_reports", drug).to_pandas()
+    st.dataframe(recent.drop(columns=["drug"]).rename(columns={
+        "report_id": "ID", "received_date": "Date", "drugs": "Médicament", "reactions": "Effets secondaires"
+    }), use_container_width=True, hide_index=True)
+
+    stats_col1, stats_col2 = st.columns(2)
+    with stats_col1:
+        st.markdown("**Effets secondaires les plus déclarés**")
+        top = snapshot.drug_table("top_reactions", drug).to_pandas().head(15)
+        st.bar_chart(top.rename(columns={"reaction": "Effet", "count": "Rapports"}).set_index("Effet")["Rapports"])
+    with stats_col2:
+        st.markdown("**Rapports par mois**")
+        monthly = snapshot.drug_table("monthly", drug).to_pandas()
+        st.line_chart(monthly.set_index("month")["count"].rename("Rapports"))
+
+    st.markdown("**Démographie**")
+    demographics = snapshot.drug_table("demographics", drug).to_pandas()
+    st.bar_chart(demographics.pivot_table(index="age_group", columns="sex", values="count", aggfunc="sum", fill_value=0))
+
+
+# Mode instantané : pas de connexion à openFDA ni à MongoDB (`python -m src.analytics.snapshot`)
+snapshot_dir = os.getenv("SNAPSHOT_DIR")
+if snapshot_dir and os.path.exists(os.path.join(snapshot_dir, "manifest.json")):
+    show_snapshot(snapshot_dir)
+    st.markdown("---")
+    st.caption("Application développée avec Streamlit - Données fournies par l'API OpenFDA")
+    st.stop()
+
 # Initialisation des clients
 fda_client = FDAClient()
 
@@ -53,6 +117,41 @@ with st.sidebar:
         st.session_state.search_clicked = True
         st.session_state.search_term = selected_drug
 
+    # Recherche dans les rapports déjà stockés (index construit par `python -m src.search.index build`)
+    st.header("Recherche dans la base")
+    text_query = st.text_input("Effet ou médicament (ex: hepat, rash)")
+    text_field = st.radio("Champ", ["Tous", "Effets", "Médicaments"], horizontal=True)
+    text_page = st.number_input("Page", min_value=1, value=1)
+
+
+@st.cache_resource
+def load_search_index(directory: str):
+    from src.search.index import ReportSearchIndex
+    return ReportSearchIndex.load(directory)
+
+
+if text_query:
+    index_dir = os.getenv("SEARCH_INDEX_DIR", "data/search_index")
+    if not os.path.exists(os.path.join(index_dir, "meta.json")):
+        st.warning(f"Index de recherche absent ({index_dir}) : lancez `python -m src.search.index build`")
+    else:
+        from src.api.projection import REPORT_SUMMARY_FIELDS
+        
+        field = {"Effets": "reaction", "Médicaments": "drug"}.get(text_field)
+        found = load_search_index(index_dir).search(text_query, field=field, page=text_page, page_size=20)
+        st.subheader(f"Recherche « {text_query} » : {found['total']} rapports")
+        if found['results'] and db_client.connect():
+            try:
+                docs = db_client.get_reports([r['report_id'] for r in found['results']], REPORT_SUMMARY_FIELDS)
+                st.dataframe(pd.DataFrame([{
+                    "ID": doc.get("report_id"),
+                    "Date": doc.get("received_date"),
+                    "Médicament": ", ".join(d.get("name") or "" for d in doc.get("drugs", [])),
+                    "Effets secondaires": ", ".join(r.get("term") or "" for r in doc.get("reactions", []))
+                } for doc in docs]), use_container_width=True, hide_index=True)
+            finally:
+                db_client.close()
+
 # Section principale
 if not st.session_state.search_clicked:
     st.info("Utilisez la barre latérale pour effectuer une recherche")
@@ -69,7 +168,8 @@ with st.spinner("Recherche des rapports en cours..."):
         # Récupération des données de l'API FDA
         results = fda_client.search_reports(
             f'patient.drug.medicinalproduct:"{st.session_state.search_term}"', 
-            limit=limit
+            limit=limit,
+            cache=True  # Streamlit réexécute le script à chaque interaction
         )
         
         if not results or 'results' not in results:
@@ -117,6 +217,30 @@ with st.spinner("Recherche des rapports en cours..."):
             )
         else:
             st.warning("Aucun rapport valide à afficher")
+        
+        # Statistiques agrégées côté serveur (paramètre count d'OpenFDA)
+        st.subheader("Statistiques OpenFDA")
+        drug_search = f'patient.drug.medicinalproduct:"{st.session_state.search_term}"'
+        stats_col1, stats_col2 = st.columns(2)
+        
+        with stats_col1:
+            st.markdown("**Effets secondaires les plus déclarés**")
+            top_reactions = fda_client.count_by("patient.reaction.reactionmeddrapt.exact", drug_search, limit=15)
+            if top_reactions:
+                reactions_df = pd.DataFrame(top_reactions).rename(columns={"term": "Effet", "count": "Rapports"})
+                st.bar_chart(reactions_df.set_index("Effet"))
+            else:
+                st.info("Aucune statistique disponible")
+        
+        with stats_col2:
+            st.markdown("**Rapports par année**")
+            per_day = fda_client.count_by("receivedate", drug_search, limit=1000)
+            if per_day:
+                years_df = pd.DataFrame(per_day)
+                years_df["Année"] = years_df["time"].str[:4]
+                st.bar_chart(years_df.groupby("Année")["count"].sum().rename("Rapports"))
+            else:
+                st.info("Aucune statistique disponible")
             
     except Exception as e:
         st.error(f"Une erreur est survenue : {str(e)}")
@@ -0,0 +1,3 @@
+"""
+Benchmarks du pipeline d'ingestion (données synthétiques openFDA).
+"""
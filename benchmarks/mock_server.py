@@ -0,0 +1,101 @@
+"""
+Serveur HTTP local imitant l'endpoint openFDA drug/event.json.
+
+Sert un jeu de rapports synthétiques pré-générés avec pagination `limit`/`skip`,
+pour mesurer FDAClient sans dépendre du réseau ni des quotas de l'API.
+
+Usage :
+    python -m benchmarks.mock_server --port 8765 --reports 10000
+"""
+import argparse
+import json
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Optional
+from urllib.parse import urlparse, parse_qs
+
+from benchmarks.synthetic import SyntheticFAERS
+
+ENDPOINT = '/drug/event.json'
+
+
+class MockOpenFDAServer:
+    """Serveur openFDA simulé, démarré dans un thread d'arrière-plan."""
+
+    def __init__(self, n_reports: int = 5000, port: int = 0, seed: int = 42):
+        self.generator = SyntheticFAERS(seed=seed)
+        self.reports = self.generator.reports(n_reports)
+        self.requests_served = 0
+        self._server = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{ENDPOINT}"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path != ENDPOINT:
+                    self._send(404, {'error': {'code': 'NOT_FOUND', 'message': 'Not found'}})
+                    return
+                params = parse_qs(url.query)
+                limit = min(max(int(params.get('limit', ['1'])[0]), 1), 1000)
+                skip = int(params.get('skip', ['0'])[0])
+                results = server.reports[skip:skip + limit]
+                server.requests_served += 1
+                if not results:
+                    self._send(404, {'error': {'code': 'NOT_FOUND', 'message': 'No matches found!'}})
+                    return
+                self._send(200, server.generator.response(results, total=len(server.reports), skip=skip))
+
+            def _send(self, status: int, payload: dict):
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> 'MockOpenFDAServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'MockOpenFDAServer':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur openFDA simulé")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--reports', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    server = MockOpenFDAServer(args.reports, args.port, args.seed)
+    print(f"🧪 Serveur openFDA simulé sur {server.base_url} ({args.reports} rapports)")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
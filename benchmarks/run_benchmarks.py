@@ -0,0 +1,221 @@
+"""
+Benchmarks reproductibles du chemin d'ingestion (extraction, transformation, chargement).
+
+Chaque étape est mesurée sur des rapports synthétiques : débit (rapports/s) et
+pic mémoire Python (tracemalloc). Les résultats peuvent être sauvegardés en JSON
+et comparés à une référence pour détecter les régressions.
+
+Usage :
+    python -m benchmarks.run_benchmarks --reports 5000
+    python -m benchmarks.run_benchmarks --output bench.json
+    python -m benchmarks.run_benchmarks --baseline bench.json --tolerance 0.2
+    python -m benchmarks.run_benchmarks --mongo-uri mongodb://localhost:27017/
+"""
+import argparse
+import contextlib
+import copy
+import io
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional
+
+# Ajouter le dossier racine au PYTHONPATH
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.synthetic import SyntheticFAERS
+
+
+def measure(name: str, func: Callable[[], Any], records: int, repeat: int = 1) -> Dict[str, Any]:
+    """
+    Exécute `func` et mesure son débit et son pic mémoire.
+
+    Le meilleur temps sur `repeat` exécutions est retenu ; la mémoire est mesurée
+    lors d'une exécution séparée, tracemalloc ralentissant le code mesuré.
+    Les sorties console de l'étape sont masquées.
+    """
+    result = {'name': name, 'records': records}
+    try:
+        best = float('inf')
+        for _ in range(repeat):
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                func()
+                best = min(best, time.perf_counter() - start)
+        tracemalloc.start()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                func()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        result.update({
+            'seconds': best,
+            'records_per_sec': records / best if best > 0 else float('inf'),
+            'peak_mb': peak / (1024 * 1024),
+        })
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    return result
+
+
+def bench_fda_client(n_reports: int, page_size: int = 100) -> Optional[Dict[str, Any]]:
+    try:
+        from benchmarks.mock_server import MockOpenFDAServer
+        from src.api.fda_client import FDAClient
+        from src.api.cache import RateLimiter
+    except ImportError as e:
+        return {'name': 'FDAClient._make_request', 'records': n_reports, 'error': f"ImportError: {e}"}
+
+    with MockOpenFDAServer(n_reports) as server:
+        # Sans limite de débit (les pages ne sont pas mises en cache) : on mesure le coût réel de chaque requête
+        client = FDAClient(base_url=server.base_url, rate_limiter=RateLimiter(max_calls=10 ** 9))
+
+        def run():
+            for skip in range(0, n_reports, page_size):
+                client._make_request(params={'search': 'synthetic', 'limit': page_size, 'skip': skip})
+
+        return measure('FDAClient._make_request', run, n_reports)
+
+
+def bench_transform(raw: List[Dict[str, Any]], repeat: int) -> Dict[str, Any]:
+    from src.etl.transform import Transformer
+    transformer = Transformer()
+    return measure('Transformer.transform_reports', lambda: transformer.transform_reports(raw), len(raw), repeat)
+
+
+def bench_cleaner(raw: List[Dict[str, Any]], repeat: int) -> Dict[str, Any]:
+    from src.etl.data_cleaner import DataCleaner
+    return measure('DataCleaner.clean_report', lambda: [DataCleaner.clean_report(r) for r in raw], len(raw), repeat)
+
+
+def bench_models(raw: List[Dict[str, Any]], repeat: int) -> List[Dict[str, Any]]:
+    from src.models.report import AdverseEventReport
+    reports = [AdverseEventReport.from_api_data(r) for r in raw]
+    dicts = [r.to_dict() for r in reports]
+
+    def from_dict():
+        # from_dict consomme ses clés : on travaille sur des copies
+        for d in dicts:
+            AdverseEventReport.from_dict(dict(d))
+
+    return [
+        measure('AdverseEventReport.from_api_data',
+                lambda: [AdverseEventReport.from_api_data(r) for r in raw], len(raw), repeat),
+        measure('AdverseEventReport.to_dict', lambda: [r.to_dict() for r in reports], len(raw), repeat),
+        measure('AdverseEventReport.from_dict', from_dict, len(raw), repeat),
+    ]
+
+
+def bench_loaders(raw: List[Dict[str, Any]], mongo_uri: str) -> List[Dict[str, Any]]:
+    import os
+    from src.etl.transform import Transformer
+    from src.etl.load import MongoDBLoader
+    from src.database.mongodb import MongoDBClient
+
+    db_name = 'eim_benchmark'
+    os.environ['MONGO_URI'] = mongo_uri
+    os.environ['DATABASE_NAME'] = db_name
+    transformed = Transformer().transform_reports(raw)
+    results = []
+
+    loader = MongoDBLoader()
+    try:
+        def load():
+            loader.client.drop_database(db_name)
+            loader.load_data(copy.deepcopy(transformed))
+        results.append(measure('MongoDBLoader.load_data', load, len(transformed)))
+    finally:
+        loader.client.drop_database(db_name)
+        loader.close()
+
+    client = MongoDBClient(mongo_uri, db_name)
+    if client.connect():
+        try:
+            def insert():
+                client.reports.delete_many({})
+                for report in copy.deepcopy(transformed):
+                    client.insert_report(report)
+            results.append(measure('MongoDBClient.insert_report', insert, len(transformed)))
+        finally:
+            client.client.drop_database(db_name)
+            client.close()
+    return results
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: str, tolerance: float) -> List[str]:
+    """Retourne la liste des étapes dont le débit a baissé de plus de `tolerance`."""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {r['name']: r for r in json.load(f)['results']}
+    regressions = []
+    for result in results:
+        ref = baseline.get(result['name'])
+        if not ref or 'records_per_sec' not in ref or 'records_per_sec' not in result:
+            continue
+        ratio = result['records_per_sec'] / ref['records_per_sec']
+        if ratio < 1 - tolerance:
+            regressions.append(f"{result['name']}: {ratio:.0%} du débit de référence")
+    return regressions
+
+
+def print_results(results: List[Dict[str, Any]]) -> None:
+    print(f"\n{'Étape':<36} {'Rapports':>9} {'Rapports/s':>12} {'Pic (Mo)':>9}")
+    print('-' * 70)
+    for r in results:
+        if 'error' in r:
+            print(f"{r['name']:<36} {r['records']:>9}   ❌ {r['error']}")
+        else:
+            print(f"{r['name']:<36} {r['records']:>9} {r['records_per_sec']:>12,.0f} {r['peak_mb']:>9.1f}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks du pipeline ETL PharmaTrack")
+    parser.add_argument('--reports', type=int, default=2000, help="Nombre de rapports synthétiques")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--drugs-per-report', type=float, default=2.5)
+    parser.add_argument('--reactions-per-report', type=float, default=2.0)
+    parser.add_argument('--skew', type=float, default=1.1, help="Exposant de Zipf des vocabulaires")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--skip-http', action='store_true', help="Ne pas mesurer FDAClient")
+    parser.add_argument('--mongo-uri', help="Mesurer aussi les loaders sur ce serveur MongoDB")
+    parser.add_argument('--output', help="Fichier JSON où sauvegarder les résultats")
+    parser.add_argument('--baseline', help="Fichier JSON de référence à comparer")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Baisse de débit tolérée (0-1)")
+    args = parser.parse_args(argv)
+
+    generator = SyntheticFAERS(seed=args.seed, drugs_per_report=args.drugs_per_report,
+                               reactions_per_report=args.reactions_per_report, skew=args.skew)
+    raw = generator.reports(args.reports)
+    print(f"🧪 {len(raw)} rapports synthétiques générés (graine {args.seed})")
+
+    results = []
+    if not args.skip_http:
+        results.append(bench_fda_client(args.reports))
+    results.append(bench_transform(raw, args.repeat))
+    results.append(bench_cleaner(raw, args.repeat))
+    results.extend(bench_models(raw, args.repeat))
+    if args.mongo_uri:
+        results.extend(bench_loaders(raw, args.mongo_uri))
+
+    print_results(results)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'config': vars(args), 'python': sys.version, 'results': results}, f, indent=2)
+        print(f"\n💾 Résultats sauvegardés dans {args.output}")
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+        if regressions:
+            print("\n⚠️ Régressions de performance détectées :")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print("\n✅ Aucune régression par rapport à la référence")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
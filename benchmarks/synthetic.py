@@ -0,0 +1,152 @@
+"""
+Générateur de rapports synthétiques au format openFDA (drug/event).
+
+Les médicaments et réactions suivent une loi de Zipf, comme dans FAERS où quelques
+produits concentrent la majorité des déclarations. Le générateur est déterministe
+pour une graine donnée, ce qui rend les benchmarks reproductibles.
+"""
+import random
+from itertools import accumulate
+from typing import Dict, Any, List, Iterator, Optional
+
+_SUBSTANCES = [
+    'IBUPROFEN', 'ACETAMINOPHEN', 'ASPIRIN', 'OMEPRAZOLE', 'METFORMIN HYDROCHLORIDE',
+    'AMLODIPINE BESYLATE', 'ATORVASTATIN CALCIUM', 'SERTRALINE HYDROCHLORIDE',
+    'ESCITALOPRAM OXALATE', 'LISINOPRIL', 'LEVOTHYROXINE SODIUM', 'WARFARIN SODIUM',
+    'PREDNISONE', 'GABAPENTIN', 'METOPROLOL TARTRATE', 'ADALIMUMAB', 'INSULIN GLARGINE',
+]
+_REACTIONS = [
+    'Nausea', 'Headache', 'Dizziness', 'Fatigue', 'Rash', 'Vomiting', 'Diarrhoea',
+    'Pruritus', 'Dyspnoea', 'Drug ineffective', 'Hepatitis', 'Abdominal pain',
+    'Hypersensitivity', 'Pyrexia', 'Arthralgia', 'Insomnia', 'Anxiety', 'Death',
+]
+_FORMS = ['TABLET', 'CAPSULE', 'INJECTION', 'SOLUTION', None]
+_INDICATIONS = ['PAIN', 'HYPERTENSION', 'DEPRESSION', 'DIABETES MELLITUS', 'PRODUCT USED FOR UNKNOWN INDICATION']
+
+
+class SyntheticFAERS:
+    """
+    Génère des rapports synthétiques ayant la forme des résultats openFDA.
+
+    Args:
+        seed: Graine du générateur aléatoire
+        n_drugs: Taille du vocabulaire de médicaments
+        n_reactions: Taille du vocabulaire de réactions
+        drugs_per_report: Nombre moyen de médicaments par rapport
+        reactions_per_report: Nombre moyen de réactions par rapport
+        skew: Exposant de Zipf (0 = uniforme, ~1.1 = proche de FAERS)
+        openfda_ratio: Proportion de médicaments ayant un bloc `openfda`
+    """
+
+    def __init__(self, seed: int = 42, n_drugs: int = 2000, n_reactions: int = 1500,
+                 drugs_per_report: float = 2.5, reactions_per_report: float = 2.0,
+                 skew: float = 1.1, openfda_ratio: float = 0.7):
+        self.rng = random.Random(seed)
+        self.drugs_per_report = drugs_per_report
+        self.reactions_per_report = reactions_per_report
+        self.openfda_ratio = openfda_ratio
+        self.drugs = [self._drug_name(i) for i in range(n_drugs)]
+        self.reactions = [self._reaction_name(i) for i in range(n_reactions)]
+        self._drug_weights = self._zipf_weights(n_drugs, skew)
+        self._reaction_weights = self._zipf_weights(n_reactions, skew)
+        self._next_id = 10000000
+
+    @staticmethod
+    def _zipf_weights(n: int, skew: float) -> List[float]:
+        return list(accumulate(1.0 / (rank ** skew) for rank in range(1, n + 1)))
+
+    @staticmethod
+    def _drug_name(i: int) -> str:
+        base = _SUBSTANCES[i % len(_SUBSTANCES)]
+        return base if i < len(_SUBSTANCES) else f"{base} {i}"
+
+    @staticmethod
+    def _reaction_name(i: int) -> str:
+        base = _REACTIONS[i % len(_REACTIONS)]
+        return base if i < len(_REACTIONS) else f"{base} {i}"
+
+    def _count(self, mean: float) -> int:
+        # Loi géométrique décalée : au moins 1, moyenne `mean`
+        p = 1.0 / max(mean, 1.0)
+        n = 1
+        while self.rng.random() > p and n < 50:
+            n += 1
+        return n
+
+    def _date(self) -> str:
+        return f"{self.rng.randint(2004, 2024)}{self.rng.randint(1, 12):02d}{self.rng.randint(1, 28):02d}"
+
+    def _drug(self) -> Dict[str, Any]:
+        rng = self.rng
+        substance = rng.choices(self.drugs, cum_weights=self._drug_weights)[0]
+        name = substance if rng.random() < 0.5 else f"{substance.split()[0].title()} {rng.choice([10, 20, 200, 500])}mg"
+        drug = {
+            'drugcharacterization': rng.choice(['1', '2', '3']),
+            'medicinalproduct': name,
+            'drugdosageform': rng.choice(_FORMS),
+            'drugindication': rng.choice(_INDICATIONS),
+            'drugstartdate': self._date(),
+            'drugenddate': self._date(),
+            'drugadministrationroute': '048',
+        }
+        if rng.random() < self.openfda_ratio:
+            drug['openfda'] = {
+                'substance_name': [substance],
+                'generic_name': [substance],
+                'brand_name': [substance.split()[0]],
+                'manufacturer_name': ['SYNTHETIC PHARMA INC'],
+                'product_type': ['HUMAN OTC DRUG'],
+                'route': ['ORAL'],
+                'rxcui': [str(rng.randint(100000, 999999))],
+            }
+        return {k: v for k, v in drug.items() if v is not None}
+
+    def report(self) -> Dict[str, Any]:
+        """Génère un rapport unique."""
+        rng = self.rng
+        self._next_id += 1
+        received = self._date()
+        report = {
+            'safetyreportid': str(self._next_id),
+            'safetyreportversion': str(rng.randint(1, 3)),
+            'receivedate': received,
+            'receiptdate': received,
+            'transmissiondate': received,
+            'serious': rng.choice(['1', '2']),
+            'primarysource': {'qualification': rng.choice(['1', '3', '5']), 'reportercountry': 'US'},
+            'patient': {
+                'patientonsetage': str(rng.randint(1, 95)),
+                'patientonsetageunit': '801',
+                'patientsex': rng.choice(['1', '2', '0']),
+                'patientweight': f"{rng.uniform(3, 140):.1f}",
+                'drug': [self._drug() for _ in range(self._count(self.drugs_per_report))],
+                'reaction': [
+                    {
+                        'reactionmeddrapt': rng.choices(self.reactions, cum_weights=self._reaction_weights)[0],
+                        'reactionoutcome': rng.choice(['1', '2', '3', '4', '5', '6']),
+                    }
+                    for _ in range(self._count(self.reactions_per_report))
+                ],
+            },
+        }
+        if rng.random() < 0.02:
+            report['seriousnessdeath'] = '1'
+        return report
+
+    def iter_reports(self, n: int) -> Iterator[Dict[str, Any]]:
+        for _ in range(n):
+            yield self.report()
+
+    def reports(self, n: int) -> List[Dict[str, Any]]:
+        """Génère `n` rapports."""
+        return list(self.iter_reports(n))
+
+    def response(self, results: List[Dict[str, Any]], total: Optional[int] = None, skip: int = 0) -> Dict[str, Any]:
+        """Enveloppe des résultats dans une réponse au format openFDA."""
+        return {
+            'meta': {
+                'disclaimer': 'Synthetic data for benchmarks',
+                'results': {'skip': skip, 'limit': len(results), 'total': total if total is not None else len(results)},
+            },
+            'results': results,
+        }
@@ -0,0 +1,3 @@
+# test_client.py est un script de vérification manuelle (API openFDA et MongoDB réelles) :
+# il n'est pas collecté par pytest
+collect_ignore = ['test_client.py']
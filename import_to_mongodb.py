@@ -1,4 +1,5 @@
 import sys
+import logging
 from pathlib import Path
 from typing import List, Optional
 
@@ -7,6 +8,8 @@ src_path = str(Path(__file__).parent / 'src')
 sys.path.insert(0, src_path)
 
 def main():
+    logging.basicConfig(level=logging.INFO)
+    
     # Demander le terme de recherche
     search_term = input("Entrez le nom du médicament à rechercher (par défaut: IBUPROFEN): ") or "IBUPROFEN"
     limit = int(input("Nombre maximum de rapports à importer (par défaut: 10): ") or "10")
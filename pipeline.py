@@ -11,6 +11,7 @@ try:
     from src.etl.extract import Extractor
     from src.etl.transform import Transformer
     from src.etl.load import MongoDBLoader
+    from src.etl.dedup import Deduplicator
     print("✅ Tous les modules importés avec succès")
 except ImportError as e:
     print(f"❌ Erreur d'importation : {e}")
@@ -25,7 +26,8 @@ def run_etl_pipeline(drug_name: str, limit: int = 100):
     
     # Étape 1: Extraction
     print("\n🔍 Étape 1/3 - Extraction des données...")
-    extractor = Extractor()
+    # Documents complets : ils sont archivés tels quels avant la transformation
+    extractor = Extractor(fields=None)
     raw_reports = extractor.extract_drug_reports(drug_name, limit)
     
     if not raw_reports:
@@ -40,6 +42,12 @@ def run_etl_pipeline(drug_name: str, limit: int = 100):
     transformer = Transformer()
     transformed_data = transformer.transform_reports(raw_reports)
     
+    # Consolidation des versions de suivi et des quasi-doublons
+    deduplicator = Deduplicator()
+    transformed_data = deduplicator.deduplicate(transformed_data)
+    print(f"🧹 {deduplicator.stats['follow_ups_removed']} versions de suivi et "
+          f"{deduplicator.stats['near_duplicates_removed']} quasi-doublons retirés")
+    
     # Étape 3: Chargement
     print("\n📤 Étape 3/3 - Chargement des données dans MongoDB...")
     loader = MongoDBLoader()
@@ -49,4 +57,6 @@ def run_etl_pipeline(drug_name: str, limit: int = 100):
     print(f"\n✅ Pipeline ETL terminé avec succès! {loaded_count} documents chargés")
 
 if __name__ == "__main__":
-    run_etl_pipeline("IBUPROFEN", limit=5)
\ No newline at end of file
+    # Exécution paramétrable : voir `python pipeline.py --help` (équivalent à `python -m src.cli`)
+    from src.cli import main
+    sys.exit(main())
@@ -0,0 +1,17 @@
+from importlib import import_module
+
+from .rules import Alert, Rule, ThresholdRule, SeriousOutcomeRule, SpikeRule, SlidingWindowCounter, load_rules
+
+__all__ = [
+    'Alert', 'Rule', 'ThresholdRule', 'SeriousOutcomeRule', 'SpikeRule',
+    'SlidingWindowCounter', 'load_rules', 'AlertService'
+]
+
+
+def __getattr__(name):
+    # Le service dépend de pymongo : chargé seulement s'il est utilisé
+    if name == 'AlertService':
+        value = import_module('.service', __name__).AlertService
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
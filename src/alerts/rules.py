@@ -0,0 +1,241 @@
+import json
+import time
+from collections import deque, defaultdict
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Hashable, Iterable, Set
+
+# Issue de réaction « décès » dans openFDA (reactionoutcome)
+FATAL_OUTCOME = '5'
+
+
+@dataclass
+class Alert:
+    rule: str
+    severity: str
+    message: str
+    report_id: Optional[str] = None
+    key: Optional[str] = None
+    count: Optional[int] = None
+    created_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class SlidingWindowCounter:
+    """
+    Compteurs par clé sur une fenêtre glissante, agrégés par tranches de `resolution` secondes.
+
+    La mémoire est proportionnelle au nombre de clés actives et de tranches de la
+    fenêtre, et non au nombre d'événements.
+    """
+
+    def __init__(self, window: float, resolution: float = 60.0):
+        self.window = window
+        self.resolution = resolution
+        self._buckets: Dict[Hashable, deque] = defaultdict(deque)
+        self._totals: Dict[Hashable, int] = defaultdict(int)
+
+    def __len__(self) -> int:
+        return len(self._totals)
+
+    def _expire(self, key: Hashable, now: float) -> None:
+        buckets = self._buckets.get(key)
+        if buckets is None:
+            return
+        cutoff = now - self.window
+        while buckets and buckets[0][0] + self.resolution <= cutoff:
+            self._totals[key] -= buckets.popleft()[1]
+        if not buckets:
+            del self._buckets[key]
+            self._totals.pop(key, None)
+
+    def add(self, key: Hashable, now: Optional[float] = None, amount: int = 1) -> int:
+        """Ajoute `amount` événements pour `key` et retourne le total sur la fenêtre."""
+        now = time.time() if now is None else now
+        self._expire(key, now)
+        start = now - (now % self.resolution)
+        buckets = self._buckets[key]
+        if buckets and buckets[-1][0] == start:
+            buckets[-1][1] += amount
+        else:
+            buckets.append([start, amount])
+        self._totals[key] += amount
+        return self._totals[key]
+
+    def count(self, key: Hashable, now: Optional[float] = None) -> int:
+        self._expire(key, time.time() if now is None else now)
+        return self._totals.get(key, 0)
+
+    def prune(self, now: Optional[float] = None) -> None:
+        """Retire les clés dont toutes les tranches ont expiré."""
+        now = time.time() if now is None else now
+        for key in list(self._buckets):
+            self._expire(key, now)
+
+
+def report_drugs(report: Dict[str, Any]) -> Set[str]:
+    """Noms (normalisés si possible) des médicaments d'un rapport stocké."""
+    names = set()
+    for drug in report.get('drugs') or []:
+        name = drug.get('normalized_name') or drug.get('name')
+        if name:
+            names.add(name.upper())
+    return names
+
+
+def report_reactions(report: Dict[str, Any]) -> Set[str]:
+    return {r['term'].upper() for r in report.get('reactions') or [] if r.get('term')}
+
+
+class Rule:
+    """Règle d'alerte évaluée sur chaque rapport nouvellement chargé."""
+
+    name = 'rule'
+
+    def evaluate(self, report: Dict[str, Any], now: float) -> List[Alert]:
+        raise NotImplementedError
+
+
+class ThresholdRule(Rule):
+    """
+    Alerte quand un médicament (et éventuellement une réaction) dépasse `threshold`
+    rapports sur la fenêtre. L'alerte n'est émise qu'une fois par franchissement.
+    """
+
+    name = 'threshold'
+
+    def __init__(self, drug: str, threshold: int, reaction: Optional[str] = None,
+                 window_minutes: float = 60.0, severity: str = 'warning'):
+        self.drug = drug.upper()
+        self.reaction = reaction.upper() if reaction else None
+        self.threshold = threshold
+        self.severity = severity
+        self.counter = SlidingWindowCounter(window_minutes * 60, resolution=min(60.0, window_minutes * 6))
+        self._fired = False
+
+    def evaluate(self, report: Dict[str, Any], now: float) -> List[Alert]:
+        if self.drug not in report_drugs(report):
+            return []
+        if self.reaction and self.reaction not in report_reactions(report):
+            return []
+        key = (self.drug, self.reaction)
+        count = self.counter.add(key, now)
+        if count < self.threshold:
+            self._fired = False
+            return []
+        if self._fired:
+            return []
+        self._fired = True
+        target = f"{self.drug} / {self.reaction}" if self.reaction else self.drug
+        return [Alert(
+            rule=self.name,
+            severity=self.severity,
+            message=f"{count} rapports pour {target} sur la fenêtre (seuil {self.threshold})",
+            report_id=report.get('report_id'),
+            key=target,
+            count=count
+        )]
+
+
+class SeriousOutcomeRule(Rule):
+    """Alerte sur chaque rapport grave (décès, ou `serious` = 1 si `include_serious`)."""
+
+    name = 'serious_outcome'
+
+    def __init__(self, drugs: Optional[Iterable[str]] = None, include_serious: bool = False,
+                 severity: str = 'critical'):
+        self.drugs = {d.upper() for d in drugs} if drugs else None
+        self.include_serious = include_serious
+        self.severity = severity
+
+    def evaluate(self, report: Dict[str, Any], now: float) -> List[Alert]:
+        drugs = report_drugs(report)
+        if self.drugs is not None and not drugs & self.drugs:
+            return []
+        fatal = any(str(r.get('outcome')) == FATAL_OUTCOME for r in report.get('reactions') or [])
+        serious = self.include_serious and str(report.get('serious')) == '1'
+        if not fatal and not serious:
+            return []
+        kind = "décès" if fatal else "rapport grave"
+        return [Alert(
+            rule=self.name,
+            severity=self.severity,
+            message=f"{kind} déclaré pour {', '.join(sorted(drugs)) or 'médicament inconnu'}",
+            report_id=report.get('report_id'),
+            key=', '.join(sorted(drugs))
+        )]
+
+
+class SpikeRule(Rule):
+    """
+    Alerte quand le nombre de rapports d'un médicament sur une fenêtre courte dépasse
+    `factor` fois le nombre attendu d'après une fenêtre de référence plus longue.
+    """
+
+    name = 'spike'
+
+    def __init__(self, short_minutes: float = 60.0, baseline_hours: float = 24.0,
+                 factor: float = 3.0, min_count: int = 10, severity: str = 'warning'):
+        self.short = SlidingWindowCounter(short_minutes * 60, resolution=60.0)
+        self.baseline = SlidingWindowCounter(baseline_hours * 3600, resolution=600.0)
+        self.ratio = (short_minutes * 60) / (baseline_hours * 3600)
+        self.factor = factor
+        self.min_count = min_count
+        self.severity = severity
+        self._fired: Set[str] = set()
+
+    def evaluate(self, report: Dict[str, Any], now: float) -> List[Alert]:
+        alerts = []
+        for drug in report_drugs(report):
+            recent = self.short.add(drug, now)
+            total = self.baseline.add(drug, now)
+            # Le taux attendu exclut la fenêtre courte elle-même
+            expected = max((total - recent) * self.ratio, 1.0)
+            if recent < self.min_count or recent <= self.factor * expected:
+                self._fired.discard(drug)
+                continue
+            if drug in self._fired:
+                continue
+            self._fired.add(drug)
+            alerts.append(Alert(
+                rule=self.name,
+                severity=self.severity,
+                message=f"Pic de rapports pour {drug}: {recent} contre {expected:.1f} attendus",
+                report_id=report.get('report_id'),
+                key=drug,
+                count=recent
+            ))
+        return alerts
+
+    def prune(self, now: float) -> None:
+        self.short.prune(now)
+        self.baseline.prune(now)
+
+
+RULE_TYPES = {
+    'threshold': ThresholdRule,
+    'serious_outcome': SeriousOutcomeRule,
+    'spike': SpikeRule,
+}
+
+
+def load_rules(path: str) -> List[Rule]:
+    """
+    Charge des règles depuis un fichier JSON.
+
+    Format : liste d'objets avec une clé `type` (threshold, serious_outcome, spike)
+    et les paramètres de la règle, ex :
+        [{"type": "threshold", "drug": "IBUPROFEN", "reaction": "Hepatitis", "threshold": 5}]
+    """
+    with open(path, encoding='utf-8') as f:
+        config = json.load(f)
+    rules = []
+    for entry in config:
+        params = dict(entry)
+        rule_type = params.pop('type')
+        if rule_type not in RULE_TYPES:
+            raise ValueError(f"Type de règle inconnu: {rule_type}")
+        rules.append(RULE_TYPES[rule_type](**params))
+    return rules
@@ -0,0 +1,195 @@
+import logging
+import threading
+import time
+from typing import Callable, Dict, Any, List, Optional, Iterator
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from ..database.partitions import UNKNOWN, list_partitions
+from .rules import Alert, Rule, SeriousOutcomeRule, SpikeRule
+
+logger = logging.getLogger(__name__)
+
+AlertHandler = Callable[[Alert], None]
+
+
+def log_alert(alert: Alert) -> None:
+    """Gestionnaire par défaut : écrit l'alerte dans les logs."""
+    level = logging.CRITICAL if alert.severity == 'critical' else logging.WARNING
+    logger.log(level, f"🚨 [{alert.rule}] {alert.message} (rapport {alert.report_id})")
+
+
+class AlertService:
+    """
+    Surveille les rapports nouvellement chargés et évalue les règles d'alerte.
+
+    Utilise un change stream MongoDB sur la collection `reports` ; sur un serveur
+    autonome (sans replica set), bascule sur une interrogation périodique des
+    documents dont l'`_id` est plus récent que le dernier vu.
+
+    En mode partitionné, le change stream est ouvert sur la base et filtré sur
+    les partitions annuelles ; l'interrogation parcourt chaque partition, y
+    compris celles créées après le démarrage (rapports d'une nouvelle année,
+    rapports tardifs d'une année archivée).
+    """
+
+    def __init__(self, collection, rules: Optional[List[Rule]] = None,
+                 handlers: Optional[List[AlertHandler]] = None,
+                 poll_interval: float = 2.0, alerts_collection=None,
+                 partition_base: Optional[str] = None):
+        """
+        Args:
+            collection: Collection pymongo surveillée (ex: db_client.reports), ou la
+                base (`db_client.db`) avec `partition_base`
+            rules: Règles à évaluer (par défaut : décès et pics de rapports)
+            handlers: Fonctions appelées pour chaque alerte (par défaut : log)
+            poll_interval: Intervalle (s) du mode interrogation
+            alerts_collection: Collection où historiser les alertes (optionnel)
+            partition_base: Nom de base des partitions annuelles surveillées (`reports`
+                pour `reports_YYYY`), None sans partitionnement
+        """
+        self.collection = collection
+        self.partition_base = partition_base
+        self.rules = rules if rules is not None else [SeriousOutcomeRule(), SpikeRule()]
+        self.handlers = handlers if handlers is not None else [log_alert]
+        self.poll_interval = poll_interval
+        self.alerts_collection = alerts_collection
+        self.mode: Optional[str] = None
+        self.processed = 0
+        self.alerts_emitted = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_prune = time.time()
+
+    def process(self, report: Dict[str, Any], now: Optional[float] = None) -> List[Alert]:
+        """Évalue toutes les règles sur un rapport et émet les alertes produites."""
+        now = time.time() if now is None else now
+        alerts = []
+        for rule in self.rules:
+            try:
+                alerts.extend(rule.evaluate(report, now))
+            except Exception as e:
+                logger.error(f"Erreur dans la règle {rule.name} pour {report.get('report_id')}: {e}")
+        self.processed += 1
+        for alert in alerts:
+            self._emit(alert)
+        if now - self._last_prune > 300:
+            for rule in self.rules:
+                if hasattr(rule, 'prune'):
+                    rule.prune(now)
+            self._last_prune = now
+        return alerts
+
+    def _emit(self, alert: Alert) -> None:
+        self.alerts_emitted += 1
+        if self.alerts_collection is not None:
+            try:
+                self.alerts_collection.insert_one(alert.to_dict())
+            except PyMongoError as e:
+                logger.error(f"Impossible d'historiser l'alerte: {e}")
+        for handler in self.handlers:
+            try:
+                handler(alert)
+            except Exception as e:
+                logger.error(f"Erreur du gestionnaire d'alerte: {e}")
+
+    def _collections(self) -> Dict[str, Any]:
+        """Collections surveillées, par nom (partitions présentes en base en mode partitionné)."""
+        if self.partition_base is None:
+            return {self.collection.name: self.collection}
+        return {name: self.collection[name] for name in list_partitions(self.collection, self.partition_base)}
+
+    def _watch(self) -> Iterator[Dict[str, Any]]:
+        match: Dict[str, Any] = {'operationType': {'$in': ['insert', 'replace']}}
+        if self.partition_base is not None:
+            # Change stream de la base : seules les partitions annuelles sont retenues
+            match['ns.coll'] = {'$regex': f"^{self.partition_base}_(\\d{{4}}|{UNKNOWN})$"}
+        with self.collection.watch([{'$match': match}], max_await_time_ms=1000) as stream:
+            self.mode = 'change_stream'
+            logger.info("Surveillance des rapports via change stream")
+            while not self._stop.is_set():
+                change = stream.try_next()
+                if change is not None:
+                    yield change['fullDocument']
+
+    def _poll(self) -> Iterator[Dict[str, Any]]:
+        self.mode = 'polling'
+        logger.info(f"Surveillance des rapports par interrogation ({self.poll_interval}s)")
+        last_ids = {}
+        for name, collection in self._collections().items():
+            last = collection.find_one({}, {'_id': 1}, sort=[('_id', -1)])
+            last_ids[name] = last['_id'] if last else None
+        while not self._stop.is_set():
+            # Une partition apparue depuis le démarrage ne contient que des rapports nouveaux
+            for name, collection in self._collections().items():
+                last_id = last_ids.get(name)
+                query = {'_id': {'$gt': last_id}} if last_id is not None else {}
+                for report in collection.find(query).sort('_id', 1):
+                    last_ids[name] = report['_id']
+                    yield report
+            self._stop.wait(self.poll_interval)
+
+    def _source(self) -> Iterator[Dict[str, Any]]:
+        try:
+            yield from self._watch()
+        except OperationFailure as e:
+            # Code 40573 : change streams réservés aux replica sets / clusters
+            logger.warning(f"Change stream indisponible ({e.code}), bascule en mode interrogation")
+            yield from self._poll()
+
+    def run(self) -> None:
+        """Traite les nouveaux rapports jusqu'à l'appel de `stop()`."""
+        self._stop.clear()
+        for report in self._source():
+            self.process(report)
+
+    def start(self) -> 'AlertService':
+        """Démarre la surveillance dans un thread d'arrière-plan."""
+        self._thread = threading.Thread(target=self.run, name='alert-service', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+def main():
+    """Lance le service d'alertes sur la base configurée (MONGO_URI / DATABASE_NAME)."""
+    import argparse
+    import os
+    from ..database.mongodb import DEFAULT_COLLECTION, DEFAULT_DATABASE, MongoDBClient
+    from .rules import load_rules
+
+    parser = argparse.ArgumentParser(description="Alertes en temps réel sur les nouveaux rapports")
+    parser.add_argument('--rules', help="Fichier JSON de règles (par défaut : décès et pics)")
+    parser.add_argument('--mongo-uri', default=os.getenv('MONGO_URI', 'mongodb://localhost:27017/'))
+    parser.add_argument('--db', default=os.getenv('DATABASE_NAME', DEFAULT_DATABASE))
+    parser.add_argument('--collection', default=DEFAULT_COLLECTION)
+    parser.add_argument('--poll-interval', type=float, default=2.0)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    client = MongoDBClient(args.mongo_uri, args.db, collection=args.collection)
+    if not client.connect():
+        return
+    rules = load_rules(args.rules) if args.rules else None
+    if client.partitioned:
+        # Les rapports sont rangés par année de réception : toutes les partitions sont surveillées
+        service = AlertService(client.db, rules, poll_interval=args.poll_interval,
+                               alerts_collection=client.db['alerts'], partition_base=client.collection_name)
+    else:
+        service = AlertService(client.reports, rules, poll_interval=args.poll_interval,
+                               alerts_collection=client.db['alerts'])
+    try:
+        service.run()
+    except KeyboardInterrupt:
+        logger.info(f"Arrêt : {service.processed} rapports traités, {service.alerts_emitted} alertes")
+    finally:
+        client.close()
+
+
+if __name__ == '__main__':
+    main()
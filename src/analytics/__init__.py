@@ -0,0 +1,22 @@
+from importlib import import_module
+
+# Exports chargés au premier accès : numpy n'est importé que si une analyse est utilisée
+_EXPORTS = {
+    'DailyCounts': '.temporal',
+    'SpikeDetector': '.temporal',
+    'ReportBatch': '.risk',
+    'RiskModel': '.risk',
+    'InteractionMiner': '.interactions',
+    'SnapshotBuilder': '.snapshot',
+    'Snapshot': '.snapshot',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
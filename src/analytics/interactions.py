@@ -0,0 +1,222 @@
+import math
+from collections import Counter
+from itertools import combinations
+from typing import Callable, Dict, Any, List, Hashable, Iterable, Optional, Set, Tuple
+
+
+class BoundedCounter:
+    """
+    Compteur à capacité bornée (comptage approximatif des éléments fréquents).
+
+    Quand le nombre de clés dépasse `capacity`, la moitié des clés la moins
+    fréquente (par rang : des comptes égaux ne vident pas le compteur) est
+    supprimée. `error`, somme des plus grands comptes supprimés à chaque
+    élagage, borne la sous-estimation d'une clé supprimée puis réintroduite
+    (éventuellement plusieurs fois) : les clés fréquentes (« heavy hitters »)
+    sont conservées avec un compte exact ou presque.
+    """
+
+    def __init__(self, capacity: int, on_prune: Optional[Callable[[Set[Hashable]], None]] = None):
+        """
+        Args:
+            capacity: Nombre maximal de clés suivies
+            on_prune: Appelée avec l'ensemble des clés supprimées à chaque élagage
+        """
+        self.capacity = capacity
+        self.on_prune = on_prune
+        self.error = 0
+        self.pruned = 0
+        self._counts: Dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def __getitem__(self, key: Hashable) -> int:
+        return self._counts.get(key, 0)
+
+    def items(self):
+        return self._counts.items()
+
+    def add(self, key: Hashable, amount: int = 1) -> None:
+        counts = self._counts
+        counts[key] = counts.get(key, 0) + amount
+        if len(counts) > self.capacity:
+            self._prune()
+
+    def _prune(self) -> None:
+        ranked = sorted(self._counts.items(), key=lambda item: item[1])
+        half = max(len(ranked) // 2, 1)
+        removed = {k for k, _ in ranked[:half]}
+        self._counts = dict(ranked[half:])
+        self.pruned += len(removed)
+        # Une clé supprimée à chaque élagage perd au plus la somme des seuils
+        self.error += ranked[half - 1][1]
+        if self.on_prune is not None:
+            self.on_prune(removed)
+
+    def discard(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Supprime les clés vérifiant `predicate` ; retourne le nombre de clés supprimées."""
+        before = len(self._counts)
+        self._counts = {k: v for k, v in self._counts.items() if not predicate(k)}
+        self.pruned += before - len(self._counts)
+        return before - len(self._counts)
+
+
+def _drug_names(report: Dict[str, Any]) -> List[str]:
+    names = {
+        (d.get('normalized_name') or d.get('name')).upper()
+        for d in report.get('drugs') or [] if d.get('normalized_name') or d.get('name')
+    }
+    return sorted(names)
+
+
+def _reaction_terms(report: Dict[str, Any]) -> List[str]:
+    return sorted({r['term'].upper() for r in report.get('reactions') or [] if r.get('term')})
+
+
+def omega(observed: int, n_pair: int, f10: float, f01: float, f00: float) -> Tuple[float, float, float]:
+    """
+    Mesure d'interaction Ω (modèle additif sur les cotes, Norén et al. 2008).
+
+    Args:
+        observed: Rapports avec les deux médicaments et la réaction
+        n_pair: Rapports avec les deux médicaments
+        f10, f01: Taux de la réaction avec un seul des deux médicaments
+        f00: Taux de la réaction sans aucun des deux
+
+    Returns:
+        (attendu, Ω, borne inférieure approchée à 95 %)
+    """
+    def odds(f: float) -> float:
+        f = min(f, 0.999999)
+        return f / (1.0 - f)
+
+    combined = max(odds(f10) + odds(f01) - odds(f00), 0.0)
+    g11 = combined / (1.0 + combined)
+    expected = g11 * n_pair
+    value = math.log2((observed + 0.5) / (expected + 0.5))
+    lower = value - 3.3 * (observed + 0.5) ** -0.5 - 2.0 * (observed + 0.5) ** -1.5
+    return expected, value, lower
+
+
+class InteractionMiner:
+    """
+    Recherche de signaux d'interaction médicamenteuse dans les rapports de polymédication.
+
+    Les comptes par médicament et par réaction sont exacts ; les comptes par
+    médicament × réaction, par paire de médicaments et par paire × réaction,
+    dont le nombre croît avec la combinatoire, sont tenus dans des compteurs
+    bornés qui ne gardent que les combinaisons fréquentes.
+    """
+
+    def __init__(self, pair_capacity: int = 1_000_000, triple_capacity: int = 4_000_000,
+                 max_drugs: int = 20, smoothing: float = 10.0, drug_reaction_capacity: int = 1_000_000):
+        """
+        Args:
+            pair_capacity: Nombre maximal de paires suivies
+            triple_capacity: Nombre maximal de triplets (paire, réaction) suivis
+            max_drugs: Au-delà, seuls les `max_drugs` premiers médicaments (ordre
+                alphabétique) d'un rapport forment des paires
+            smoothing: Poids (en rapports) du taux global dans le lissage des taux
+            drug_reaction_capacity: Nombre maximal de couples (médicament, réaction) suivis
+        """
+        self.max_drugs = max_drugs
+        self.smoothing = smoothing
+        self.n_reports = 0
+        self.drugs: Counter = Counter()
+        self.reactions: Counter = Counter()
+        self.drug_reactions = BoundedCounter(drug_reaction_capacity)
+        # Les triplets d'une paire élaguée sont élagués avec elle : le compte d'un
+        # triplet ne dépasse jamais celui de sa paire
+        self.pairs = BoundedCounter(pair_capacity, on_prune=self._prune_pair_reactions)
+        self.pair_reactions = BoundedCounter(triple_capacity)
+
+    def _prune_pair_reactions(self, pairs: Set[Tuple[str, str]]) -> None:
+        self.pair_reactions.discard(lambda key: key[0] in pairs)
+
+    def add_report(self, report: Dict[str, Any]) -> None:
+        drugs = _drug_names(report)
+        reactions = _reaction_terms(report)
+        if not drugs:
+            return
+        self.n_reports += 1
+        self.drugs.update(drugs)
+        self.reactions.update(reactions)
+        for drug in drugs:
+            for reaction in reactions:
+                self.drug_reactions.add((drug, reaction))
+        if len(drugs) < 2:
+            return
+        for pair in combinations(drugs[:self.max_drugs], 2):
+            # Triplets avant la paire : un élagage déclenché par la paire retire aussi ses triplets
+            for reaction in reactions:
+                self.pair_reactions.add((pair, reaction))
+            self.pairs.add(pair)
+
+    def add_reports(self, reports: Iterable[Dict[str, Any]]) -> int:
+        count = 0
+        for report in reports:
+            self.add_report(report)
+            count += 1
+        return count
+
+    def signals(self, min_count: int = 3, top: Optional[int] = 100,
+                min_lower: Optional[float] = 0.0) -> List[Dict[str, Any]]:
+        """
+        Calcule Ω pour chaque triplet (paire, réaction) suivi.
+
+        Args:
+            min_count: Nombre minimal de rapports observés pour le triplet
+            top: Nombre de signaux retournés (None pour tous)
+            min_lower: Borne inférieure minimale de Ω (None pour ne pas filtrer)
+
+        Returns:
+            Signaux triés par borne inférieure décroissante
+        """
+        n = max(self.n_reports, 1)
+        results = []
+        for ((drug_a, drug_b), reaction), observed in self.pair_reactions.items():
+            if observed < min_count:
+                continue
+            n_pair = self.pairs[(drug_a, drug_b)]
+            if not n_pair or observed > n_pair:
+                continue
+            n_a, n_b = self.drugs[drug_a], self.drugs[drug_b]
+            r_a = self.drug_reactions[(drug_a, reaction)]
+            r_b = self.drug_reactions[(drug_b, reaction)]
+            # Taux avec un seul des deux médicaments, puis avec aucun des deux, lissés
+            # vers le taux global de la réaction pour stabiliser les petites strates
+            prior = self.reactions[reaction] / n
+            k = self.smoothing
+            f10 = (max(r_a - observed, 0) + k * prior) / (max(n_a - n_pair, 0) + k)
+            f01 = (max(r_b - observed, 0) + k * prior) / (max(n_b - n_pair, 0) + k)
+            f00 = (max(self.reactions[reaction] - r_a - r_b + observed, 0) + k * prior) / \
+                (max(n - n_a - n_b + n_pair, 0) + k)
+            expected, value, lower = omega(observed, n_pair, f10, f01, f00)
+            if min_lower is not None and lower < min_lower:
+                continue
+            results.append({
+                'drug_a': drug_a,
+                'drug_b': drug_b,
+                'reaction': reaction,
+                'observed': observed,
+                'pair_reports': n_pair,
+                'expected': expected,
+                'omega': value,
+                'omega_lower': lower
+            })
+        results.sort(key=lambda s: s['omega_lower'], reverse=True)
+        return results[:top] if top is not None else results
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'reports': self.n_reports,
+            'drugs': len(self.drugs),
+            'pairs_tracked': len(self.pairs),
+            'pairs_pruned': self.pairs.pruned,
+            'pair_reactions_tracked': len(self.pair_reactions),
+            'pair_reactions_pruned': self.pair_reactions.pruned,
+            'drug_reactions_tracked': len(self.drug_reactions),
+            'drug_reactions_pruned': self.drug_reactions.pruned,
+            'max_undercount': max(self.pairs.error, self.pair_reactions.error, self.drug_reactions.error)
+        }
@@ -0,0 +1,218 @@
+import zlib
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Iterable
+
+import numpy as np
+
+# Facteurs de conversion en années des unités d'âge openFDA (patientonsetageunit)
+AGE_UNIT_YEARS = {
+    '800': 10.0, 'decade': 10.0,
+    '801': 1.0, 'year': 1.0,
+    '802': 1 / 12, 'month': 1 / 12,
+    '803': 1 / 52, 'week': 1 / 52,
+    '804': 1 / 365, 'day': 1 / 365,
+    '805': 1 / 8760, 'hour': 1 / 8760,
+}
+SEX_CODES = {'1': 1, 'male': 1, '2': 2, 'female': 2}
+
+DENSE_FEATURES = [
+    'age', 'age_missing', 'child', 'elderly',
+    'male', 'female', 'weight', 'weight_missing',
+    'n_drugs', 'polypharmacy_5', 'polypharmacy_10',
+]
+
+
+def _to_float(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def age_in_years(age: Any, unit: Any) -> float:
+    """Convertit un âge openFDA en années (NaN si inconnu)."""
+    value = _to_float(age)
+    if np.isnan(value):
+        return np.nan
+    factor = AGE_UNIT_YEARS.get(str(unit).strip().lower() if unit is not None else '801')
+    if factor is None:
+        return np.nan
+    return value * factor
+
+
+def hash_ingredient(name: str, dim: int) -> int:
+    """Indice stable (indépendant du processus) d'un ingrédient dans l'espace haché."""
+    return zlib.crc32(name.upper().encode('utf-8')) % dim
+
+
+def is_serious(report: Dict[str, Any]) -> bool:
+    """Cible d'apprentissage : rapport grave ou réaction d'issue fatale."""
+    if str(report.get('serious')) == '1':
+        return True
+    return any(str(r.get('outcome')) == '5' for r in report.get('reactions') or [])
+
+
+@dataclass
+class ReportBatch:
+    """
+    Lot de rapports sous forme de tableaux colonnes.
+
+    Les ingrédients sont stockés au format CSR (`indptr`, `indices`) dans un
+    espace haché de dimension `hash_dim`.
+    """
+    report_ids: List[Optional[str]]
+    age_years: np.ndarray
+    sex: np.ndarray
+    weight: np.ndarray
+    n_drugs: np.ndarray
+    indptr: np.ndarray
+    indices: np.ndarray
+    hash_dim: int
+    labels: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.report_ids)
+
+    @classmethod
+    def from_reports(cls, reports: Iterable[Dict[str, Any]], hash_dim: int = 4096,
+                     with_labels: bool = False) -> 'ReportBatch':
+        """Construit un lot à partir de rapports au format de `Transformer.transform_report`."""
+        ids, ages, sexes, weights, counts, labels = [], [], [], [], [], []
+        indptr, indices = [0], []
+        for report in reports:
+            patient = report.get('patient') or {}
+            drugs = report.get('drugs') or []
+            ids.append(report.get('report_id'))
+            ages.append(age_in_years(patient.get('age'), patient.get('age_unit')))
+            sexes.append(SEX_CODES.get(str(patient.get('sex')).strip().lower(), 0))
+            weights.append(_to_float(patient.get('weight')))
+            counts.append(len(drugs))
+            ingredients = set()
+            for drug in drugs:
+                names = drug.get('active_ingredients') or [drug.get('normalized_name') or drug.get('name')]
+                ingredients.update(hash_ingredient(n, hash_dim) for n in names if n)
+            indices.extend(sorted(ingredients))
+            indptr.append(len(indices))
+            if with_labels:
+                labels.append(is_serious(report))
+        return cls(
+            report_ids=ids,
+            age_years=np.asarray(ages, dtype=np.float32),
+            sex=np.asarray(sexes, dtype=np.int8),
+            weight=np.asarray(weights, dtype=np.float32),
+            n_drugs=np.asarray(counts, dtype=np.int16),
+            indptr=np.asarray(indptr, dtype=np.int64),
+            indices=np.asarray(indices, dtype=np.int32),
+            hash_dim=hash_dim,
+            labels=np.asarray(labels, dtype=np.float32) if with_labels else None
+        )
+
+    def dense_features(self) -> np.ndarray:
+        """Matrice `rapports x DENSE_FEATURES` (valeurs manquantes remplacées par 0)."""
+        age_missing = np.isnan(self.age_years)
+        weight_missing = np.isnan(self.weight)
+        age = np.where(age_missing, 0.0, self.age_years)
+        return np.column_stack([
+            age / 100.0,
+            age_missing,
+            ~age_missing & (age < 18),
+            ~age_missing & (age >= 65),
+            self.sex == 1,
+            self.sex == 2,
+            np.where(weight_missing, 0.0, self.weight) / 100.0,
+            weight_missing,
+            self.n_drugs / 10.0,
+            self.n_drugs >= 5,
+            self.n_drugs >= 10,
+        ]).astype(np.float32)
+
+    def row_ids(self) -> np.ndarray:
+        """Indice de rapport de chaque entrée de `indices`."""
+        return np.repeat(np.arange(len(self)), np.diff(self.indptr))
+
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-np.clip(z, -30, 30)))
+
+
+class RiskModel:
+    """
+    Régression logistique sur les caractéristiques patient et les ingrédients hachés.
+
+    L'entraînement et la prédiction sont entièrement vectorisés : la partie creuse
+    (ingrédients) est calculée avec `np.bincount` sur la représentation CSR.
+    """
+
+    def __init__(self, hash_dim: int = 4096, l2: float = 1e-4):
+        self.hash_dim = hash_dim
+        self.l2 = l2
+        self.dense_weights = np.zeros(len(DENSE_FEATURES), dtype=np.float64)
+        self.sparse_weights = np.zeros(hash_dim, dtype=np.float64)
+        self.bias = 0.0
+
+    def _check(self, batch: ReportBatch) -> None:
+        if batch.hash_dim != self.hash_dim:
+            raise ValueError(f"hash_dim du lot ({batch.hash_dim}) différent du modèle ({self.hash_dim})")
+
+    def _logits(self, dense: np.ndarray, batch: ReportBatch, rows: np.ndarray) -> np.ndarray:
+        sparse = np.bincount(rows, weights=self.sparse_weights[batch.indices], minlength=len(batch))
+        return dense @ self.dense_weights + sparse + self.bias
+
+    def fit(self, batch: ReportBatch, epochs: int = 200, learning_rate: float = 0.5) -> 'RiskModel':
+        """Entraîne le modèle par descente de gradient sur un lot étiqueté."""
+        self._check(batch)
+        if batch.labels is None:
+            raise ValueError("Le lot doit contenir des étiquettes (with_labels=True)")
+        dense = batch.dense_features().astype(np.float64)
+        rows = batch.row_ids()
+        y = batch.labels.astype(np.float64)
+        n = max(len(batch), 1)
+        for _ in range(epochs):
+            error = _sigmoid(self._logits(dense, batch, rows)) - y
+            grad_dense = dense.T @ error / n + self.l2 * self.dense_weights
+            grad_sparse = np.bincount(batch.indices, weights=error[rows], minlength=self.hash_dim) / n
+            grad_sparse += self.l2 * self.sparse_weights
+            self.dense_weights -= learning_rate * grad_dense
+            self.sparse_weights -= learning_rate * grad_sparse
+            self.bias -= learning_rate * error.mean()
+        return self
+
+    def predict_batch(self, batch: ReportBatch) -> np.ndarray:
+        """Probabilité de rapport grave pour chaque rapport du lot."""
+        self._check(batch)
+        dense = batch.dense_features().astype(np.float64)
+        return _sigmoid(self._logits(dense, batch, batch.row_ids()))
+
+    def predict_reports(self, reports: Iterable[Dict[str, Any]], batch_size: int = 50000) -> List[Dict[str, Any]]:
+        """Évalue des rapports par lots ; retourne `{'report_id', 'risk'}` pour chacun."""
+        results, chunk = [], []
+        for report in reports:
+            chunk.append(report)
+            if len(chunk) >= batch_size:
+                results.extend(self._score_chunk(chunk))
+                chunk = []
+        if chunk:
+            results.extend(self._score_chunk(chunk))
+        return results
+
+    def _score_chunk(self, reports: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        batch = ReportBatch.from_reports(reports, self.hash_dim)
+        scores = self.predict_batch(batch)
+        return [{'report_id': rid, 'risk': float(s)} for rid, s in zip(batch.report_ids, scores)]
+
+    def save(self, path: str) -> str:
+        """Sauvegarde les poids au format .npz ; retourne le chemin du fichier."""
+        if not path.endswith('.npz'):
+            path += '.npz'
+        np.savez(path, dense=self.dense_weights, sparse=self.sparse_weights,
+                 bias=self.bias, l2=self.l2)
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> 'RiskModel':
+        data = np.load(path)
+        model = cls(hash_dim=len(data['sparse']), l2=float(data['l2']))
+        model.dense_weights = data['dense']
+        model.sparse_weights = data['sparse']
+        model.bias = float(data['bias'])
+        return model
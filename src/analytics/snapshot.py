@@ -0,0 +1,331 @@
+"""
+Instantanés analytiques du tableau de bord.
+
+Les jeux de données affichés par l'application (effets les plus déclarés,
+rapports par mois, démographie, derniers rapports) sont précalculés par
+médicament à partir des rapports stockés, puis écrits en fichiers Arrow IPC
+(ou Parquet) accompagnés d'un manifeste. Chaque table est triée par
+médicament et le manifeste donne la plage de lignes de chacun : l'application
+lit une tranche d'un fichier mappé en mémoire, sans appel à openFDA ni à MongoDB.
+"""
+import heapq
+import json
+import os
+from collections import Counter, defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+from .risk import AGE_UNIT_YEARS, SEX_CODES
+from .temporal import report_keys
+
+FORMAT_VERSION = 1
+MANIFEST = 'manifest.json'
+
+AGE_GROUPS = [(18, '<18'), (45, '18-44'), (65, '45-64'), (75, '65-74'), (float('inf'), '75+')]
+SEX_LABELS = {1: 'Male', 2: 'Female'}
+
+# Champs des rapports stockés lus pour construire un instantané
+SNAPSHOT_PROJECTION = {
+    'report_id': 1,
+    'received_date': 1,
+    'patient.age': 1,
+    'patient.age_unit': 1,
+    'patient.sex': 1,
+    'drugs.name': 1,
+    'drugs.normalized_name': 1,
+    'reactions.term': 1,
+}
+
+TABLES = ('top_reactions', 'monthly', 'demographics', 'recent_reports')
+
+
+def _pyarrow():
+    """pyarrow, importé à la première écriture ou lecture d'une table (dépendance optionnelle)."""
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401
+    except ImportError as e:
+        raise ImportError("Les instantanés nécessitent pyarrow (pip install pyarrow>=14.0.0)") from e
+    return pyarrow
+
+
+def _schemas(pa) -> Dict[str, Any]:
+    return {
+        'top_reactions': pa.schema([('drug', pa.string()), ('reaction', pa.string()), ('count', pa.int64())]),
+        'monthly': pa.schema([('drug', pa.string()), ('month', pa.string()), ('count', pa.int64())]),
+        'demographics': pa.schema([('drug', pa.string()), ('sex', pa.string()), ('age_group', pa.string()),
+                                   ('count', pa.int64())]),
+        'recent_reports': pa.schema([('drug', pa.string()), ('report_id', pa.string()),
+                                     ('received_date', pa.string()), ('drugs', pa.string()),
+                                     ('reactions', pa.string())]),
+    }
+
+
+def age_group(patient: Dict[str, Any]) -> str:
+    try:
+        age = float(patient.get('age'))
+    except (TypeError, ValueError):
+        return 'Unknown'
+    unit = str(patient.get('age_unit') or '801').lower()
+    years = age * AGE_UNIT_YEARS.get(unit, 1.0)
+    return next(label for bound, label in AGE_GROUPS if years < bound)
+
+
+def sex_label(patient: Dict[str, Any]) -> str:
+    return SEX_LABELS.get(SEX_CODES.get(str(patient.get('sex') or '').lower()), 'Unknown')
+
+
+def _month(value: Optional[str]) -> Optional[str]:
+    """'20230415' ou '2023-04-15...' -> '2023-04'."""
+    digits = str(value or '').replace('-', '')[:6]
+    return f"{digits[:4]}-{digits[4:]}" if len(digits) == 6 and digits.isdigit() else None
+
+
+class SnapshotBuilder:
+    """Agrège des rapports (format stocké) en jeux de données par médicament."""
+
+    def __init__(self, top_reactions: int = 50, recent_reports: int = 100):
+        """
+        Args:
+            top_reactions: Effets conservés par médicament
+            recent_reports: Derniers rapports conservés par médicament
+        """
+        self.top_reactions = top_reactions
+        self.recent_reports = recent_reports
+        self.reports = 0
+        self.drug_reports: Counter = Counter()
+        self.reactions: Dict[str, Counter] = defaultdict(Counter)
+        self.monthly: Counter = Counter()
+        self.demographics: Counter = Counter()
+        # Tas (date, report_id, ligne) des rapports les plus récents par médicament
+        self._recent: Dict[str, List[Tuple[str, str, Tuple]]] = defaultdict(list)
+
+    def add_report(self, report: Dict[str, Any]) -> None:
+        drugs = report_keys(report, pairs=False)
+        if not drugs:
+            return
+        self.reports += 1
+        reactions = {r['term'].upper() for r in report.get('reactions') or [] if r.get('term')}
+        month = _month(report.get('received_date'))
+        patient = report.get('patient') or {}
+        demographic = (sex_label(patient), age_group(patient))
+        received = str(report.get('received_date') or '')
+        row = (
+            str(report.get('report_id')), received,
+            ", ".join(d.get('name') or '' for d in report.get('drugs') or []),
+            ", ".join(sorted(reactions))
+        )
+        for drug in drugs:
+            self.drug_reports[drug] += 1
+            self.reactions[drug].update(reactions)
+            if month:
+                self.monthly[(drug, month)] += 1
+            self.demographics[(drug,) + demographic] += 1
+            recent = self._recent[drug]
+            entry = (received, row[0], row)
+            if len(recent) < self.recent_reports:
+                heapq.heappush(recent, entry)
+            elif entry > recent[0]:
+                heapq.heapreplace(recent, entry)
+
+    def add_reports(self, reports: Iterable[Dict[str, Any]]) -> int:
+        count = 0
+        for report in reports:
+            self.add_report(report)
+            count += 1
+        return count
+
+    def tables(self) -> Dict[str, 'pyarrow.Table']:
+        """Tables triées par médicament (puis par ordre d'affichage)."""
+        pa = _pyarrow()
+        schemas = _schemas(pa)
+        drugs = sorted(self.drug_reports)
+        rows: Dict[str, List[Tuple]] = {name: [] for name in TABLES}
+        monthly = defaultdict(list)
+        for (drug, month), count in self.monthly.items():
+            monthly[drug].append((drug, month, count))
+        demographics = defaultdict(list)
+        for (drug, sex, group), count in self.demographics.items():
+            demographics[drug].append((drug, sex, group, count))
+        for drug in drugs:
+            rows['top_reactions'].extend(
+                (drug, reaction, count) for reaction, count in self.reactions[drug].most_common(self.top_reactions)
+            )
+            rows['monthly'].extend(sorted(monthly[drug]))
+            rows['demographics'].extend(sorted(demographics[drug]))
+            rows['recent_reports'].extend((drug,) + row for _, _, row in sorted(self._recent[drug], reverse=True))
+        tables = {}
+        for name, table_rows in rows.items():
+            schema = schemas[name]
+            columns = list(zip(*table_rows)) or [[] for _ in schema]
+            tables[name] = pa.Table.from_arrays([pa.array(c, type=f.type) for c, f in zip(columns, schema)],
+                                                schema=schema)
+        return tables
+
+    def write(self, directory: str, file_format: str = 'arrow', source: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Écrit les tables puis le manifeste (en dernier, par remplacement atomique :
+        un lecteur voit toujours un instantané complet).
+
+        Args:
+            directory: Répertoire de l'instantané
+            file_format: 'arrow' (IPC non compressé, lu sans copie) ou 'parquet' (plus compact)
+            source: Origine des données, reportée dans le manifeste
+        """
+        if file_format not in ('arrow', 'parquet'):
+            raise ValueError(f"Format inconnu: {file_format}")
+        pa = _pyarrow()
+        path = Path(directory)
+        path.mkdir(parents=True, exist_ok=True)
+        created = datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')
+        manifest = {
+            'format_version': FORMAT_VERSION,
+            'created_at': datetime.utcnow().isoformat(),
+            'source': source,
+            'format': file_format,
+            'reports': self.reports,
+            'drugs': dict(sorted(self.drug_reports.items())),
+            'tables': {}
+        }
+        for name, table in self.tables().items():
+            # Nouveau nom à chaque instantané : les fichiers mappés par un lecteur restent valides
+            filename = f"{name}-{created}.{file_format}"
+            tmp = path / f".{filename}.tmp"
+            if file_format == 'arrow':
+                with pa.OSFile(str(tmp), 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            else:
+                import pyarrow.parquet as pq
+                pq.write_table(table, str(tmp), compression='zstd')
+            os.replace(tmp, path / filename)
+            manifest['tables'][name] = {'file': filename, 'rows': table.num_rows,
+                                        'ranges': _drug_ranges(table)}
+        previous = _read_manifest(path)
+        tmp = path / f".{MANIFEST}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(tmp, path / MANIFEST)
+        # L'instantané précédent est conservé (un lecteur peut encore ouvrir ses
+        # tables) ; les plus anciens sont supprimés
+        keep = {t['file'] for m in (manifest, previous or {}) for t in m.get('tables', {}).values()}
+        for name in TABLES:
+            for old in path.glob(f"{name}-*"):
+                if old.name not in keep:
+                    old.unlink(missing_ok=True)
+        return manifest
+
+
+def _drug_ranges(table: 'pyarrow.Table') -> Dict[str, List[int]]:
+    """Plage [première ligne, nombre de lignes] de chaque médicament (table triée)."""
+    ranges: Dict[str, List[int]] = {}
+    for i, drug in enumerate(table.column('drug').to_pylist()):
+        if drug in ranges:
+            ranges[drug][1] += 1
+        else:
+            ranges[drug] = [i, 1]
+    return ranges
+
+
+def _read_manifest(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path / MANIFEST, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+class Snapshot:
+    """Lecture d'un instantané : tables mappées en mémoire, tranches par médicament."""
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        manifest = _read_manifest(self.directory)
+        if manifest is None:
+            raise FileNotFoundError(f"Aucun instantané dans {directory} ({MANIFEST} absent)")
+        if manifest.get('format_version') != FORMAT_VERSION:
+            raise ValueError(f"Version d'instantané non supportée: {manifest.get('format_version')}")
+        self.manifest = manifest
+        self._tables: Dict[str, 'pyarrow.Table'] = {}
+
+    @staticmethod
+    def exists(directory: str) -> bool:
+        return (Path(directory) / MANIFEST).exists()
+
+    @property
+    def drugs(self) -> Dict[str, int]:
+        """Médicaments de l'instantané et leur nombre de rapports."""
+        return self.manifest['drugs']
+
+    def table(self, name: str) -> 'pyarrow.Table':
+        table = self._tables.get(name)
+        if table is None:
+            pa = _pyarrow()
+            path = str(self.directory / self.manifest['tables'][name]['file'])
+            if self.manifest['format'] == 'arrow':
+                table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+            else:
+                import pyarrow.parquet as pq
+                table = pq.read_table(path, memory_map=True)
+            self._tables[name] = table
+        return table
+
+    def drug_table(self, name: str, drug: str) -> 'pyarrow.Table':
+        """Lignes d'une table pour un médicament (tranche sans copie)."""
+        start, length = self.manifest['tables'][name]['ranges'].get(drug.upper(), (0, 0))
+        return self.table(name).slice(start, length)
+
+
+def main():
+    """Construction d'un instantané depuis MongoDB ou des fichiers JSON Lines."""
+    import argparse
+    import time
+    from ..database.mongodb import DEFAULT_COLLECTION, DEFAULT_DATABASE, MongoDBClient
+
+    parser = argparse.ArgumentParser(description="Instantané des jeux de données du tableau de bord")
+    parser.add_argument('--dir', default=os.getenv('SNAPSHOT_DIR', 'data/snapshot'), help="Répertoire de l'instantané")
+    parser.add_argument('--jsonl', nargs='+', help="Fichiers de rapports transformés (backend jsonl du pipeline)")
+    parser.add_argument('--mongo-uri', default=os.getenv('MONGO_URI', 'mongodb://localhost:27017/'))
+    parser.add_argument('--db', default=os.getenv('DATABASE_NAME', DEFAULT_DATABASE),
+                        help="Base chargée par le pipeline (DATABASE_NAME)")
+    parser.add_argument('--collection', default=DEFAULT_COLLECTION,
+                        help="Collection des rapports (nom de base des partitions annuelles)")
+    parser.add_argument('--format', choices=['arrow', 'parquet'], default='arrow')
+    parser.add_argument('--top-reactions', type=int, default=50)
+    parser.add_argument('--recent-reports', type=int, default=100)
+    args = parser.parse_args()
+    try:
+        _pyarrow()
+    except ImportError as e:
+        print(f"❌ {e}")
+        raise SystemExit(1)
+
+    builder = SnapshotBuilder(args.top_reactions, args.recent_reports)
+    started = time.perf_counter()
+    if args.jsonl:
+        from ..models import schemas
+        for path in args.jsonl:
+            with open(path, 'rb') as f:
+                builder.add_reports(schemas.loads(line) for line in f if line.strip())
+        source = ', '.join(args.jsonl)
+    else:
+        import sys
+        # Lecture par partition (REPORTS_PARTITIONED), années archivées comprises
+        client = MongoDBClient(args.mongo_uri, args.db, cache_size=0, collection=args.collection)
+        if not client.connect():
+            print(f"❌ Connexion à MongoDB impossible ({args.mongo_uri})")
+            sys.exit(1)
+        try:
+            builder.add_reports(client.iter_reports(projection=SNAPSHOT_PROJECTION, batch_size=10000,
+                                                    include_archived=True))
+        finally:
+            client.close()
+        source = f"{args.db}.{args.collection}"
+    manifest = builder.write(args.dir, args.format, source)
+    size = sum((Path(args.dir) / t['file']).stat().st_size for t in manifest['tables'].values())
+    print(f"✅ {manifest['reports']} rapports, {len(manifest['drugs'])} médicaments, "
+          f"{size / 1e6:.1f} Mo en {time.perf_counter() - started:.1f}s → {args.dir}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,254 @@
+from datetime import date, datetime, timedelta
+from typing import Dict, Any, List, Optional, Hashable, Iterable, Tuple
+
+import numpy as np
+
+
+def parse_day(value: Optional[str]) -> Optional[date]:
+    """Convertit une date openFDA (YYYYMMDD) ou ISO en `date`."""
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        if len(value) >= 10 and value[4] == '-':
+            return date.fromisoformat(value[:10])
+        return datetime.strptime(value[:8], '%Y%m%d').date()
+    except ValueError:
+        return None
+
+
+def report_keys(report: Dict[str, Any], pairs: bool = True) -> List[Hashable]:
+    """Séries alimentées par un rapport : chaque médicament et chaque paire médicament–réaction."""
+    drugs = {
+        (d.get('normalized_name') or d.get('name')).upper()
+        for d in report.get('drugs') or [] if d.get('normalized_name') or d.get('name')
+    }
+    keys: List[Hashable] = sorted(drugs)
+    if pairs:
+        reactions = {r['term'].upper() for r in report.get('reactions') or [] if r.get('term')}
+        keys.extend((d, r) for d in sorted(drugs) for r in sorted(reactions))
+    return keys
+
+
+class DailyCounts:
+    """
+    Comptes quotidiens par série (médicament ou paire médicament–réaction).
+
+    Les comptes sont stockés dans une matrice NumPy `séries x jours` utilisée comme
+    tampon circulaire sur l'axe des jours : avancer d'un jour recycle la colonne la
+    plus ancienne au lieu de recopier la matrice.
+    """
+
+    def __init__(self, days: int = 120, end: Optional[date] = None, initial_series: int = 1024):
+        self.days = days
+        # Sans date de fin explicite, la fenêtre se cale sur le rapport le plus récent
+        self.end = end
+        self._head = 0  # Colonne correspondant au jour le plus ancien
+        self._counts = np.zeros((initial_series, days), dtype=np.int32)
+        self._keys: List[Hashable] = []
+        self._index: Dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @property
+    def start(self) -> date:
+        return self.end - timedelta(days=self.days - 1)
+
+    @property
+    def keys(self) -> List[Hashable]:
+        return list(self._keys)
+
+    def _series(self, key: Hashable) -> int:
+        idx = self._index.get(key)
+        if idx is None:
+            idx = len(self._keys)
+            if idx == self._counts.shape[0]:
+                grown = np.zeros((idx * 2, self.days), dtype=np.int32)
+                grown[:idx] = self._counts
+                self._counts = grown
+            self._keys.append(key)
+            self._index[key] = idx
+        return idx
+
+    def advance(self, new_end: date) -> None:
+        """Décale la fenêtre jusqu'à `new_end` en remettant à zéro les jours sortants."""
+        if self.end is None:
+            self.end = new_end
+            return
+        shift = (new_end - self.end).days
+        if shift <= 0:
+            return
+        if shift >= self.days:
+            self._counts[:] = 0
+            self._head = 0
+        else:
+            cols = (self._head + np.arange(shift)) % self.days
+            self._counts[:, cols] = 0
+            self._head = (self._head + shift) % self.days
+        self.end = new_end
+
+    def add(self, key: Hashable, day: date, amount: int = 1) -> bool:
+        """Ajoute un compte ; retourne False si le jour est hors de la fenêtre."""
+        if self.end is None or day > self.end:
+            self.advance(day)
+        offset = (day - self.start).days
+        if offset < 0:
+            return False
+        # La série est créée avant l'indexation : _series() peut agrandir la matrice
+        row = self._series(key)
+        self._counts[row, (self._head + offset) % self.days] += amount
+        return True
+
+    def add_reports(self, reports: Iterable[Dict[str, Any]], pairs: bool = True,
+                    date_field: str = 'received_date') -> int:
+        """
+        Ajoute des rapports en lot ; retourne le nombre de rapports pris en compte.
+
+        Les couples (série, jour) sont d'abord accumulés puis ajoutés en une seule
+        opération vectorisée (`np.add.at`).
+        """
+        rows, days, used = [], [], 0
+        entries: List[Tuple[List[Hashable], date]] = []
+        for report in reports:
+            day = parse_day(report.get(date_field))
+            if day is not None:
+                entries.append((report_keys(report, pairs), day))
+        if not entries:
+            return 0
+        latest = max(day for _, day in entries)
+        if self.end is None or latest > self.end:
+            self.advance(latest)
+        start = self.start
+        for keys, day in entries:
+            offset = (day - start).days
+            if offset < 0 or not keys:
+                continue
+            used += 1
+            col = (self._head + offset) % self.days
+            for key in keys:
+                rows.append(self._series(key))
+                days.append(col)
+        if rows:
+            np.add.at(self._counts, (np.asarray(rows), np.asarray(days)), 1)
+        return used
+
+    def matrix(self) -> np.ndarray:
+        """Matrice `séries x jours` dans l'ordre chronologique (copie)."""
+        counts = self._counts[:len(self._keys)]
+        return np.roll(counts, -self._head, axis=1)
+
+
+def weekly(matrix: np.ndarray, period: int = 7) -> np.ndarray:
+    """Agrège une matrice quotidienne par périodes (les jours les plus anciens en trop sont ignorés)."""
+    n_periods = matrix.shape[1] // period
+    trimmed = matrix[:, matrix.shape[1] - n_periods * period:]
+    return trimmed.reshape(matrix.shape[0], n_periods, period).sum(axis=2)
+
+
+def poisson_scores(matrix: np.ndarray, window: int = 7, baseline: int = 56) -> Dict[str, np.ndarray]:
+    """
+    Score de Poisson de la dernière fenêtre contre le taux de référence des jours précédents.
+
+    Le score est le rapport de vraisemblance signé 2·(O·ln(O/E) − (O − E)), positif
+    quand l'observé O dépasse l'attendu E.
+    """
+    recent = matrix[:, -window:].sum(axis=1).astype(np.float64)
+    past = matrix[:, -(window + baseline):-window].sum(axis=1).astype(np.float64)
+    expected = np.maximum(past * window / baseline, 0.5)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        llr = 2.0 * (np.where(recent > 0, recent * np.log(recent / expected), 0.0) - (recent - expected))
+    score = np.where(recent > expected, llr, -llr)
+    return {'observed': recent, 'expected': expected, 'score': score}
+
+
+def ewma_scores(matrix: np.ndarray, alpha: float = 0.3, period: int = 7) -> Dict[str, np.ndarray]:
+    """
+    Score z de la dernière période contre une moyenne/variance EWMA des périodes précédentes.
+
+    La récurrence est faite période par période mais vectorisée sur toutes les séries.
+    """
+    periods = weekly(matrix, period).astype(np.float64)
+    history, last = periods[:, :-1], periods[:, -1]
+    mean = history[:, 0].copy() if history.shape[1] else np.zeros(len(periods))
+    var = np.zeros(len(periods))
+    for t in range(1, history.shape[1]):
+        diff = history[:, t] - mean
+        mean += alpha * diff
+        var = (1 - alpha) * (var + alpha * diff * diff)
+    # Plancher de variance poissonnienne pour les séries peu bruitées
+    std = np.sqrt(np.maximum(var, np.maximum(mean, 1.0)))
+    return {'observed': last, 'expected': mean, 'score': (last - mean) / std}
+
+
+def cusum_scores(matrix: np.ndarray, k: float = 0.5, period: int = 7,
+                 baseline_periods: int = 8) -> Dict[str, np.ndarray]:
+    """
+    CUSUM unilatéral sur les périodes standardisées par la moyenne et l'écart-type de référence.
+
+    Le score est la statistique cumulée finale ; une valeur > 4–5 signale une hausse durable.
+    """
+    periods = weekly(matrix, period).astype(np.float64)
+    base = periods[:, :baseline_periods]
+    mean = base.mean(axis=1)
+    std = np.sqrt(np.maximum(base.var(axis=1), np.maximum(mean, 1.0)))
+    z = (periods[:, baseline_periods:] - mean[:, None]) / std[:, None]
+    s = np.zeros(len(periods))
+    for t in range(z.shape[1]):
+        s = np.maximum(0.0, s + z[:, t] - k)
+    return {'observed': periods[:, -1], 'expected': mean, 'score': s}
+
+
+METHODS = {
+    'poisson': poisson_scores,
+    'ewma': ewma_scores,
+    'cusum': cusum_scores,
+}
+
+
+class SpikeDetector:
+    """Détecte les hausses anormales de rapports par médicament ou paire médicament–réaction."""
+
+    def __init__(self, days: int = 120, pairs: bool = True, end: Optional[date] = None):
+        self.counts = DailyCounts(days=days, end=end)
+        self.pairs = pairs
+
+    def add_reports(self, reports: Iterable[Dict[str, Any]]) -> int:
+        return self.counts.add_reports(reports, pairs=self.pairs)
+
+    def screen(self, method: str = 'poisson', top: int = 50, min_observed: int = 3,
+               **params) -> List[Dict[str, Any]]:
+        """
+        Évalue toutes les séries d'un coup et retourne les plus anormales.
+
+        Args:
+            method: 'poisson', 'ewma' ou 'cusum'
+            top: Nombre de résultats retournés
+            min_observed: Compte minimal sur la dernière période pour être classé
+            **params: Paramètres de la méthode de score
+
+        Returns:
+            Liste triée par score décroissant de dicts
+            {'drug', 'reaction', 'observed', 'expected', 'score'}
+        """
+        if method not in METHODS:
+            raise ValueError(f"Méthode inconnue: {method}")
+        if not len(self.counts):
+            return []
+        scores = METHODS[method](self.counts.matrix(), **params)
+        eligible = np.flatnonzero(scores['observed'] >= min_observed)
+        if not len(eligible):
+            return []
+        order = eligible[np.argsort(-scores['score'][eligible], kind='stable')][:top]
+        keys = self.counts.keys
+        results = []
+        for i in order:
+            key = keys[i]
+            drug, reaction = key if isinstance(key, tuple) else (key, None)
+            results.append({
+                'drug': drug,
+                'reaction': reaction,
+                'observed': int(scores['observed'][i]),
+                'expected': float(scores['expected'][i]),
+                'score': float(scores['score'][i])
+            })
+        return results
@@ -0,0 +1,72 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Hashable, Optional
+
+
+class RateLimiter:
+    """
+    Limiteur de débit à fenêtre glissante, partageable entre threads.
+
+    L'API OpenFDA autorise 240 requêtes par minute avec une clé (40 sans clé) :
+    `acquire()` bloque jusqu'à ce qu'un appel soit permis.
+    """
+
+    def __init__(self, max_calls: int = 240, period: float = 60.0):
+        self.max_calls = max_calls
+        self.period = period
+        self._calls = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                cutoff = now - self.period
+                while self._calls and self._calls[0] <= cutoff:
+                    self._calls.popleft()
+                if len(self._calls) < self.max_calls:
+                    self._calls.append(now)
+                    return
+                wait = self._calls[0] + self.period - now
+            time.sleep(wait)
+
+
+class TTLCache:
+    """Cache LRU borné dont les entrées expirent après `ttl` secondes."""
+
+    def __init__(self, maxsize: int = 256, ttl: float = 3600.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
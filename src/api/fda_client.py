@@ -1,33 +1,67 @@
 import os
-import sys
 import json
-import requests
-from dotenv import load_dotenv
-from typing import Dict, Optional, List, Any
+from typing import Dict, Optional, List, Any, TYPE_CHECKING
+from ..models import schemas
+from ..models.report import AdverseEventReport
+from .projection import FieldSet
+from .cache import RateLimiter, TTLCache
 
-print("=== Le script démarre ===")
-print(f"Python version: {sys.version}")
-print(f"Dossier de travail: {os.getcwd()}")
-print(f"Chemin du script: {__file__}")
+if TYPE_CHECKING:
+    import requests
 
-# Configuration du chargement des variables d'environnement
+# Fichier .env à la racine du projet, chargé à la création du premier client
 env_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), '.env')
-load_dotenv(env_path)
+_env_loaded = False
+
+
+def load_env() -> None:
+    """Charge le fichier .env une seule fois (aucune E/S à l'import du module)."""
+    global _env_loaded
+    if _env_loaded:
+        return
+    try:
+        from dotenv import load_dotenv
+        load_dotenv(env_path)
+    except ImportError:
+        pass
+    _env_loaded = True
+
+# Limiteur et cache partagés par tous les clients (les quotas OpenFDA sont par clé API)
+default_rate_limiter = RateLimiter(max_calls=240, period=60.0)
+default_cache = TTLCache(maxsize=512, ttl=3600.0)
+
+# L'API refuse les valeurs de `skip` supérieures à 25 000
+MAX_SKIP = 25000
 
 class FDAClient:
-    def __init__(self):
-        """Initialise le client FDA avec la configuration de base."""
-        self.base_url = "https://api.fda.gov/drug/event.json"
+    def __init__(self, base_url: Optional[str] = None, rate_limiter: Optional[RateLimiter] = None,
+                 cache: Optional[TTLCache] = None):
+        """
+        Initialise le client FDA avec la configuration de base.
+        
+        Args:
+            base_url: URL de l'endpoint (par défaut OPENFDA_BASE_URL ou l'API publique)
+            rate_limiter: Limiteur de débit (par défaut, celui partagé par le module)
+            cache: Cache des réponses des requêtes qui le demandent (agrégations, tableau
+                de bord) ; par défaut, celui partagé par le module
+        """
+        load_env()
+        # L'URL peut être redirigée (ex: serveur simulé des benchmarks)
+        self.base_url = base_url or os.getenv("OPENFDA_BASE_URL", "https://api.fda.gov/drug/event.json")
         # Utilisation de la clé API depuis les variables d'environnement
         self.api_key = os.getenv("OPENFDA_API_KEY", "BCfAjSGaZqrs2pYSgJajLmUm6Rfv4FQqPussNGgz")
+        self.rate_limiter = rate_limiter if rate_limiter is not None else default_rate_limiter
+        self.cache = cache if cache is not None else default_cache
         
         if not self.api_key:
             print("⚠️ Attention: Aucune clé API n'a été trouvée")
             print("Veuillez créer un fichier .env avec votre clé API:")
             print("OPENFDA_API_KEY=votre_cle_api_ici")
     
-    def _make_request(self, endpoint: str = "", params: Optional[Dict] = None) -> Optional[Dict]:
-        """Effectue une requête à l'API OpenFDA."""
+    def _send_request(self, endpoint: str = "", params: Optional[Dict] = None) -> Optional['requests.Response']:
+        """Envoie une requête à l'API OpenFDA et retourne la réponse HTTP brute."""
+        import requests
+        
         if params is None:
             params = {}
             
@@ -38,6 +72,7 @@ class FDAClient:
             print(f"\n🔍 Envoi de la requête à {self.base_url}")
             print(f"Paramètres: {json.dumps(params, indent=2)}")
             
+            self.rate_limiter.acquire()
             response = requests.get(
                 f"{self.base_url}{endpoint}",
                 params=params,
@@ -46,12 +81,7 @@ class FDAClient:
             
             print(f"✅ Réponse reçue - Statut: {response.status_code}")
             response.raise_for_status()
-            
-            data = response.json()
-            total = data.get('meta', {}).get('results', {}).get('total', 0)
-            print(f"📊 {total} résultats trouvés")
-            
-            return data
+            return response
             
         except requests.exceptions.RequestException as e:
             print(f"\n❌ Erreur lors de la requête:")
@@ -61,14 +91,53 @@ class FDAClient:
             else:
                 print(f"Détails: {str(e)}")
             return None
+
+    def _make_request(self, endpoint: str = "", params: Optional[Dict] = None,
+                      fields: Optional[FieldSet] = None, cache: bool = False) -> Optional[Dict]:
+        """
+        Effectue une requête à l'API OpenFDA.
+        
+        Si `fields` est fourni, chaque résultat est réduit à ces champs dès le
+        décodage (l'API ne permet pas de sélectionner les champs côté serveur).
+        
+        Avec `cache=True`, la réponse (déjà projetée) est conservée dans le cache
+        du client : ne pas la modifier en place. Les pages de l'extraction ne sont
+        jamais mises en cache, elles ne sont lues qu'une fois.
+        """
+        cache_key = None
+        if cache:
+            cache_key = (self.base_url, endpoint, tuple(sorted((params or {}).items())),
+                         tuple(fields.paths) if fields is not None else None)
+            data = self.cache.get(cache_key)
+            if data is not None:
+                return data
+        
+        response = self._send_request(endpoint, dict(params or {}))
+        if response is None:
+            return None
+        
+        # orjson si disponible, sinon json standard
+        data = schemas.loads(response.content)
+        total = data.get('meta', {}).get('results', {}).get('total', 0)
+        print(f"📊 {total} résultats trouvés")
         
-    def search_reports(self, search_term: str, limit: int = 5) -> Optional[Dict]:
+        if fields is not None and 'results' in data:
+            data = dict(data, results=fields.apply_many(data['results']))
+        if cache_key is not None:
+            self.cache.set(cache_key, data)
+        
+        return data
+        
+    def search_reports(self, search_term: str, limit: int = 5,
+                       fields: Optional[FieldSet] = None, cache: bool = False) -> Optional[Dict]:
         """
         Recherche des rapports d'effets indésirables
         
         Args:
             search_term: Terme de recherche (ex: 'patient.drug.medicinalproduct:"IBUPROFEN"')
             limit: Nombre maximum de résultats à retourner (1-100)
+            fields: Champs à conserver dans chaque résultat (ex: TRANSFORM_FIELDS)
+            cache: Réutilise une réponse récente (recherches répétées du tableau de bord)
             
         Returns:
             Dictionnaire contenant les résultats de la recherche ou None en cas d'erreur
@@ -80,9 +149,130 @@ class FDAClient:
             'limit': min(max(1, limit), 100)  # S'assure que la limite est entre 1 et 100
         }
         
-        return self._make_request(params=params)
+        return self._make_request(params=params, fields=fields, cache=cache)
+
+    def count_by(self, field: str, search: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Agrège les rapports côté serveur avec le paramètre `count` d'OpenFDA.
+        
+        Args:
+            field: Champ à compter (ex: 'patient.reaction.reactionmeddrapt.exact', 'receivedate')
+            search: Filtre de recherche optionnel (ex: 'patient.drug.medicinalproduct:"IBUPROFEN"')
+            limit: Nombre maximum de valeurs retournées (1-1000)
+            
+        Returns:
+            Liste de `{'term': ..., 'count': ...}` (ou `{'time': ..., 'count': ...}` pour
+            un champ date), vide en cas d'erreur. Les agrégations sont mises en cache.
+        """
+        print(f"\n📈 Comptage de {field}" + (f" pour: {search}" if search else ""))
+        
+        params = {
+            'count': field,
+            'limit': min(max(1, limit), 1000)
+        }
+        if search:
+            params['search'] = search
+        
+        data = self._make_request(params=params, cache=True)
+        if not data:
+            return []
+        return data.get('results', [])
+
+    def fetch_reports(self, search_term: str, limit: int = 5) -> List[AdverseEventReport]:
+        """
+        Recherche des rapports et les retourne directement sous forme de modèles.
+        
+        Avec msgspec, la réponse est décodée en structures typées (seuls les champs
+        utilisés sont lus) ; sinon, on passe par les dictionnaires de `_make_request`.
+        
+        Args:
+            search_term: Terme de recherche openFDA
+            limit: Nombre maximum de résultats à retourner (1-100)
+            
+        Returns:
+            Liste des rapports (vide en cas d'erreur)
+        """
+        params = {
+            'search': search_term,
+            'limit': min(max(1, limit), 100)
+        }
+        
+        if not schemas.FAST_DECODE_AVAILABLE:
+            data = self._make_request(params=params)
+            if not data:
+                return []
+            return [AdverseEventReport.from_api_data(r) for r in data.get('results', [])]
+        
+        response = self._send_request(params=params)
+        if response is None:
+            return []
+        try:
+            decoded = schemas.decode_response(response.content)
+        except schemas.DecodeError as e:
+            # Document openFDA hors schéma : décodage standard, comme sans msgspec
+            print(f"⚠️ Décodage typé impossible ({e}), décodage standard de la réponse")
+            try:
+                data = schemas.loads(response.content)
+            except ValueError as e:
+                print(f"❌ Réponse JSON invalide: {e}")
+                return []
+            print(f"📊 {data.get('meta', {}).get('results', {}).get('total', 0)} résultats trouvés")
+            return [AdverseEventReport.from_api_data(r) for r in data.get('results', [])]
+        print(f"📊 {schemas.total_results(decoded)} résultats trouvés")
+        return [AdverseEventReport.from_struct(r) for r in decoded.results]
+
+    @staticmethod
+    def drug_search(drug_name: str, start_date: Optional[str] = None,
+                    end_date: Optional[str] = None) -> str:
+        """
+        Construit la requête openFDA d'un médicament, éventuellement bornée par date.
+
+        Args:
+            drug_name: Nom du médicament (medicinalproduct)
+            start_date, end_date: Bornes de `receivedate` au format YYYYMMDD ou YYYY-MM-DD
+        """
+        search = f'patient.drug.medicinalproduct:"{drug_name.upper()}"'
+        if start_date or end_date:
+            start = (start_date or '19000101').replace('-', '')
+            end = (end_date or '29991231').replace('-', '')
+            search += f' AND receivedate:[{start} TO {end}]'
+        return search
+
+    def get_drug_reports(self, drug_name: str, limit: int = 100, start_date: Optional[str] = None,
+                         end_date: Optional[str] = None, fields: Optional[FieldSet] = None) -> List[Dict]:
+        """
+        Récupère jusqu'à `limit` rapports bruts d'un médicament, page par page (`skip`).
+
+        Args:
+            drug_name: Nom du médicament
+            limit: Nombre maximum de rapports (au-delà de 100, plusieurs requêtes)
+            start_date, end_date: Bornes de `receivedate` (optionnelles)
+            fields: Champs à conserver dans chaque rapport
+
+        Returns:
+            Liste des rapports bruts (éventuellement partielle en cas d'erreur)
+        """
+        search = self.drug_search(drug_name, start_date, end_date)
+        reports: List[Dict] = []
+        while len(reports) < limit and len(reports) < MAX_SKIP:
+            page_size = min(100, limit - len(reports))
+            params = {'search': search, 'limit': page_size}
+            if reports:
+                params['skip'] = len(reports)
+            data = self._make_request(params=params, fields=fields)
+            if not data or not data.get('results'):
+                break
+            reports.extend(data['results'])
+            total = data.get('meta', {}).get('results', {}).get('total', 0)
+            if len(data['results']) < page_size or len(reports) >= total:
+                break
+        else:
+            if len(reports) < limit:
+                print(f"⚠️ {drug_name}: {len(reports)} rapports sur {limit} demandés, limite de pagination "
+                      f"openFDA atteinte (skip ≤ {MAX_SKIP}) ; découpez la période avec start_date/end_date")
+        return reports
+
 
-    
     def main():
         """Fonction principale pour tester le client."""
         print("=== Test du client OpenFDA ===\n")
@@ -111,6 +301,8 @@ class FDAClient:
 
     def test_connection(self) -> bool:
         """Teste la connexion à l'API OpenFDA avec une requête simple."""
+        import requests
+        
         try:
             response = requests.get(
                 self.base_url,
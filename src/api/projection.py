@@ -0,0 +1,88 @@
+from typing import Dict, Any, Iterable, List
+
+
+class FieldSet:
+    """
+    Ensemble déclaratif de champs à conserver dans un document (chemins pointés).
+
+    Les listes sont traversées de manière transparente : `patient.drug.medicinalproduct`
+    conserve `medicinalproduct` dans chaque élément de `patient.drug`.
+
+    Exemple :
+        FieldSet(['safetyreportid', 'patient.reaction.reactionmeddrapt'])
+    """
+
+    def __init__(self, paths: Iterable[str]):
+        self.paths = sorted(set(paths))
+        self._tree: Dict[str, Any] = {}
+        for path in self.paths:
+            node = self._tree
+            parts = path.split('.')
+            for part in parts[:-1]:
+                child = node.get(part)
+                if child is True:
+                    break  # Le parent est déjà conservé en entier
+                node = node.setdefault(part, {})
+            else:
+                node[parts[-1]] = True
+
+    def __iter__(self):
+        return iter(self.paths)
+
+    def __or__(self, other: 'FieldSet') -> 'FieldSet':
+        return FieldSet(list(self.paths) + list(other.paths))
+
+    @classmethod
+    def _project(cls, value: Any, tree: Dict[str, Any]) -> Any:
+        if isinstance(value, dict):
+            return {
+                key: value[key] if sub is True else cls._project(value[key], sub)
+                for key, sub in tree.items() if key in value
+            }
+        if isinstance(value, list):
+            return [cls._project(item, tree) for item in value]
+        return value
+
+    def apply(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Retourne une copie du document réduite aux champs déclarés."""
+        return self._project(record, self._tree)
+
+    def apply_many(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [self._project(r, self._tree) for r in records]
+
+    def to_mongo(self) -> Dict[str, int]:
+        """Projection MongoDB équivalente (`{'champ.sous_champ': 1, ...}`)."""
+        return {path: 1 for path in self.paths}
+
+
+# Champs openFDA lus par Transformer.transform_report (et la normalisation des noms)
+TRANSFORM_FIELDS = FieldSet([
+    'safetyreportid',
+    'safetyreportversion',
+    'receivedate',
+    'receiptdate',
+    'transmissiondate',
+    'serious',
+    'patient.patientonsetage',
+    'patient.patientonsetageunit',
+    'patient.patientsex',
+    'patient.patientweight',
+    'patient.drug.medicinalproduct',
+    'patient.drug.drugdosageform',
+    'patient.drug.drugindication',
+    'patient.drug.drugstartdate',
+    'patient.drug.drugenddate',
+    'patient.drug.openfda.substance_name',
+    'patient.drug.openfda.generic_name',
+    'patient.reaction.reactionmeddrapt',
+    'patient.reaction.reactionoutcome',
+])
+
+# Champs des rapports stockés nécessaires à un affichage en liste
+REPORT_SUMMARY_FIELDS = FieldSet([
+    'report_id',
+    'received_date',
+    'drugs.name',
+    'drugs.normalized_name',
+    'reactions.term',
+])
@@ -0,0 +1,414 @@
+"""
+Point d'entrée en ligne de commande du pipeline ETL (utilisable depuis cron).
+
+Exemples :
+    python -m src.cli --drug IBUPROFEN --limit 500
+    python -m src.cli --drugs-file drugs.txt --start-date 2023-01-01 --end-date 2023-12-31 \\
+        --workers 4 --batch-size 500 --backend mongodb
+    python -m src.cli --source csv --input exports/ --workers 8
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Set
+
+from .etl.extract import Extractor
+from .etl.transform import Transformer
+from .etl.dedup import Deduplicator
+from .etl.validation import BatchValidator, Quarantine
+
+BACKENDS = ['mongodb', 'jsonl', 'none']
+SOURCES = ['fda', 'csv', 'fhir']
+
+# Attente maximale du chargement du spool en fin d'exécution (le reste est
+# chargé à l'exécution suivante)
+SPOOL_FLUSH_TIMEOUT = 300.0
+
+
+@dataclass
+class DrugResult:
+    """Bilan du traitement d'un médicament."""
+    drug: str
+    extracted: int = 0
+    quarantined: int = 0
+    deduplicated: int = 0
+    loaded: int = 0
+    queued: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+
+@dataclass
+class RunSummary:
+    """Bilan global d'une exécution."""
+    results: List[DrugResult] = field(default_factory=list)
+    seconds: float = 0.0
+    # Bilan d'une destination asynchrone (spool...), relevé après sa fermeture
+    sink: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def failed(self) -> List[DrugResult]:
+        return [r for r in self.results if r.error]
+
+    def total(self, name: str) -> int:
+        return sum(getattr(r, name) for r in self.results)
+
+    def to_dict(self) -> Dict:
+        return {
+            'drugs': len(self.results),
+            'failed': len(self.failed),
+            'extracted': self.total('extracted'),
+            'quarantined': self.total('quarantined'),
+            'queued': self.total('queued'),
+            'loaded': self.sink.get('loaded', self.total('loaded')),
+            'failed_batches': self.sink.get('failed_batches', 0),
+            'seconds': round(self.seconds, 3),
+            'reports_per_second': round(self.total('extracted') / self.seconds, 1) if self.seconds else 0.0,
+            **{f'sink_{k}': v for k, v in self.sink.items()}
+        }
+
+
+class JsonlSink:
+    """Écrit les rapports transformés dans un fichier JSON Lines (une ligne par rapport)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def load_data(self, data: List[Dict]) -> int:
+        for report in data:
+            self._file.write(json.dumps(report, ensure_ascii=False, default=str) + '\n')
+        self._file.flush()
+        return len(data)
+
+    def close(self):
+        self._file.close()
+
+
+class NullSink:
+    """Ne charge rien (exécution à blanc)."""
+
+    def load_data(self, data: List[Dict]) -> int:
+        return len(data)
+
+    def close(self):
+        pass
+
+
+def create_sink(backend: str, output: Optional[str] = None, spool: Optional[str] = None,
+                load_workers: int = 1):
+    """Instancie la destination des rapports transformés (MongoDB éventuellement via un spool)."""
+    if backend == 'mongodb':
+        from .etl.load import MongoDBLoader
+        if load_workers > 1:
+            from .etl.sharded_load import ShardedLoader
+            return ShardedLoader(workers=load_workers)
+        if spool:
+            from .etl.spool import SpooledLoader
+            return SpooledLoader(MongoDBLoader(), spool, flush_timeout=SPOOL_FLUSH_TIMEOUT)
+        return MongoDBLoader()
+    if backend == 'jsonl':
+        return JsonlSink(output or f"reports_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl")
+    if backend == 'none':
+        return NullSink()
+    raise ValueError(f"Destination inconnue: {backend}")
+
+
+def load_into(sink, records: List[Dict], result: DrugResult) -> None:
+    """Charge un lot ; une destination asynchrone ne fait que le mettre en file."""
+    count = sink.load_data(records)
+    if getattr(sink, 'asynchronous', False):
+        result.queued += count
+    else:
+        result.loaded += count
+
+
+def sink_stats(sink) -> Dict[str, int]:
+    return sink.stats() if getattr(sink, 'asynchronous', False) else {}
+
+
+def read_drug_list(path: str) -> List[str]:
+    """Lit un fichier de médicaments (un par ligne, lignes vides et commentaires # ignorés)."""
+    drugs = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            name = line.split('#', 1)[0].strip()
+            if name and name.upper() not in drugs:
+                drugs.append(name.upper())
+    return drugs
+
+
+class BatchRunner:
+    """
+    Exécute le pipeline ETL pour plusieurs médicaments en parallèle.
+
+    Les threads partagent le limiteur de débit du module `fda_client` : le quota
+    OpenFDA est respecté quel que soit le nombre de workers. Les chargements
+    passent par une destination unique protégée par un verrou. Un rapport citant
+    plusieurs médicaments de la liste n'est chargé qu'une fois par exécution.
+    """
+
+    def __init__(self, sink, limit: int = 100, start_date: Optional[str] = None,
+                 end_date: Optional[str] = None, workers: int = 4, batch_size: int = 500,
+                 save_raw: bool = False, quarantine: Optional[Quarantine] = None):
+        self.sink = sink
+        self.limit = limit
+        self.start_date = start_date
+        self.end_date = end_date
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.save_raw = save_raw
+        self.quarantine = quarantine
+        self._sink_lock = threading.Lock()
+        self._seen_ids: Set[str] = set()
+        self._seen_lock = threading.Lock()
+
+    def _first_seen(self, reports: List[Dict]) -> List[Dict]:
+        """Écarte les rapports déjà traités pour un autre médicament de l'exécution."""
+        with self._seen_lock:
+            fresh = [r for r in reports if r.get('report_id') not in self._seen_ids]
+            self._seen_ids.update(r.get('report_id') for r in fresh)
+        return fresh
+
+    def run_drug(self, drug: str) -> DrugResult:
+        result = DrugResult(drug)
+        started = time.perf_counter()
+        try:
+            # Documents complets seulement s'ils sont archivés ; sinon, réduits aux champs transformés
+            extractor = Extractor(fields=None) if self.save_raw else Extractor()
+            raw_reports = extractor.extract_drug_reports(drug, self.limit, self.start_date, self.end_date)
+            result.extracted = len(raw_reports)
+            if raw_reports and self.save_raw:
+                extractor.save_raw_data(raw_reports, drug)
+            # Les rapports malformés sont écartés (et comptés) au lieu d'interrompre le lot
+            validation = BatchValidator().validate(raw_reports)
+            result.quarantined = len(validation.quarantined)
+            if self.quarantine is not None:
+                self.quarantine.write(validation.quarantined, source=drug)
+            reports = self._first_seen(Deduplicator().deduplicate(Transformer().transform_reports(validation.valid)))
+            result.deduplicated = len(validation.valid) - len(reports)
+            for i in range(0, len(reports), self.batch_size):
+                batch = reports[i:i + self.batch_size]
+                with self._sink_lock:
+                    load_into(self.sink, batch, result)
+        except Exception as e:
+            result.error = str(e)
+        result.seconds = time.perf_counter() - started
+        return result
+
+    def run(self, drugs: List[str]) -> RunSummary:
+        summary = RunSummary()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='etl') as pool:
+            futures = {pool.submit(self.run_drug, drug): drug for drug in drugs}
+            for future in as_completed(futures):
+                result = future.result()
+                status = f"❌ {result.error}" if result.error else f"✅ {_loaded_label(result)}"
+                print(f"[{len(summary.results) + 1}/{len(drugs)}] {result.drug}: "
+                      f"{result.extracted} extraits, {status} ({result.seconds:.1f}s)")
+                summary.results.append(result)
+        summary.seconds = time.perf_counter() - started
+        summary.results.sort(key=lambda r: drugs.index(r.drug))
+        return summary
+
+
+class SourceRunner:
+    """
+    Exécute le pipeline pour une source de fichiers (`src.sources`) : les
+    fichiers sont lus, validés et transformés en parallèle par `workers`
+    processus, puis chargés par lots dans la destination.
+    """
+
+    def __init__(self, sink, workers: int = 4, batch_size: int = 500,
+                 quarantine: Optional[Quarantine] = None):
+        self.sink = sink
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.quarantine = quarantine
+
+    def run(self, source) -> RunSummary:
+        from .sources.runner import PartitionDone, read_partitions
+
+        summary = RunSummary()
+        started = time.perf_counter()
+        results: Dict[str, DrugResult] = {}
+        for item in read_partitions(source, self.workers, self.batch_size):
+            result = results.setdefault(item.partition, DrugResult(item.partition))
+            if isinstance(item, PartitionDone):
+                result.extracted, result.seconds, result.error = item.extracted, item.seconds, item.error
+                status = f"❌ {result.error}" if result.error else f"✅ {_loaded_label(result)}"
+                print(f"[{len(summary.results) + 1}] {result.drug}: {result.extracted} lus, "
+                      f"{status} ({result.seconds:.1f}s)")
+                summary.results.append(result)
+                continue
+            result.quarantined += len(item.quarantined)
+            result.deduplicated += item.deduplicated
+            if self.quarantine is not None:
+                self.quarantine.write(item.quarantined, source=item.partition)
+            if item.records:
+                load_into(self.sink, item.records, result)
+        summary.seconds = time.perf_counter() - started
+        return summary
+
+
+def _loaded_label(result: DrugResult) -> str:
+    return f"{result.queued} mis en file" if result.queued else f"{result.loaded} chargés"
+
+
+def print_summary(summary: RunSummary) -> None:
+    totals = summary.to_dict()
+    # Destination asynchrone : le chargement par médicament n'est pas connu, seul le total l'est
+    queued = totals['queued'] > 0
+    column = 'En file' if queued else 'Chargés'
+    print("\n📊 RÉSUMÉ DE L'EXÉCUTION")
+    print(f"{'Médicament / fichier':<30} {'Extraits':>9} {'Rejetés':>9} {'Doublons':>9} {column:>9} {'Durée (s)':>10}")
+    for r in summary.results:
+        print(f"{r.drug[:30]:<30} {r.extracted:>9} {r.quarantined:>9} {r.deduplicated:>9} "
+              f"{r.queued if queued else r.loaded:>9} {r.seconds:>10.1f}"
+              + (f"  ❌ {r.error}" if r.error else ""))
+    print(f"- Médicaments / fichiers traités: {totals['drugs']} ({totals['failed']} en échec)")
+    print(f"- Rapports extraits: {totals['extracted']}")
+    print(f"- Rapports rejetés (quarantaine): {totals['quarantined']}")
+    if queued:
+        print(f"- Rapports mis en file: {totals['queued']}")
+    print(f"- Rapports chargés: {totals['loaded']}")
+    if totals['failed_batches']:
+        print(f"- Lots en échec au chargement: {totals['failed_batches']}")
+    if summary.sink.get('pending_segments'):
+        print(f"- Segments restant dans le spool (chargés à la prochaine exécution): "
+              f"{summary.sink['pending_segments']}")
+    print(f"- Durée totale: {totals['seconds']:.1f}s")
+    print(f"- Débit: {totals['reports_per_second']} rapports/s")
+
+
+def _date(value: str) -> str:
+    """Valide une date YYYY-MM-DD ou YYYYMMDD et la retourne au format YYYYMMDD."""
+    for fmt in ('%Y-%m-%d', '%Y%m%d'):
+        try:
+            return datetime.strptime(value, fmt).strftime('%Y%m%d')
+        except ValueError:
+            continue
+    raise argparse.ArgumentTypeError(f"Date invalide: {value} (attendu YYYY-MM-DD)")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Pipeline ETL OpenFDA → stockage, sans interaction")
+    source = parser.add_argument_group('source')
+    source.add_argument('--source', choices=SOURCES, default='fda',
+                        help="Origine des rapports : openFDA, exports CSV ou FHIR (JSON/NDJSON)")
+    source.add_argument('--drug', action='append', default=[], help="Médicament (option répétable)")
+    source.add_argument('--drugs-file', help="Fichier contenant un médicament par ligne")
+    source.add_argument('--input', action='append', default=[],
+                        help="Fichier ou répertoire à importer (sources csv et fhir, option répétable)")
+    source.add_argument('--columns', help="Correspondance champ -> colonne CSV (fichier JSON)")
+    source.add_argument('--id-prefix', help="Préfixe des identifiants importés (défaut: csv: ou fhir:)")
+    parser.add_argument('--start-date', type=_date, help="Date de réception minimale (YYYY-MM-DD)")
+    parser.add_argument('--end-date', type=_date, help="Date de réception maximale (YYYY-MM-DD)")
+    parser.add_argument('--limit', type=int, default=100, help="Rapports maximum par médicament")
+    parser.add_argument('--workers', type=int, default=4, help="Médicaments (ou fichiers) traités en parallèle")
+    parser.add_argument('--batch-size', type=int, default=500, help="Taille des lots de chargement")
+    parser.add_argument('--backend', choices=BACKENDS, default='mongodb', help="Destination des rapports")
+    parser.add_argument('--output', help="Fichier de sortie (backend jsonl)")
+    parser.add_argument('--spool', metavar='DIR',
+                        help="Spool local avant MongoDB : chargement en arrière-plan, sans perte si la base est lente")
+    parser.add_argument('--load-workers', type=int, default=1,
+                        help="Processus de chargement MongoDB (partition par report_id)")
+    parser.add_argument('--save-raw', action='store_true', help="Sauvegarde aussi les données brutes")
+    parser.add_argument('--quarantine', metavar='DIR', help="Écrit les rapports rejetés (JSON Lines) dans ce répertoire")
+    parser.add_argument('--summary-json', help="Écrit le bilan au format JSON dans ce fichier")
+    profiling = parser.add_argument_group('profilage')
+    profiling.add_argument('--profile', metavar='DIR', default=os.getenv('PROFILE_DIR'),
+                           help="Chronomètre les fonctions chaudes et écrit le profil dans ce répertoire "
+                                "(défaut: PROFILE_DIR)")
+    profiling.add_argument('--profile-sample', type=float, default=float(os.getenv('PROFILE_SAMPLE_RATE', '0.01')),
+                           help="Fraction des appels tracés en détail et passés sous cProfile")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    drugs = [d.upper() for d in args.drug]
+    if args.drugs_file:
+        drugs += [d for d in read_drug_list(args.drugs_file) if d not in drugs]
+    file_source = None
+    if args.source == 'fda':
+        if not drugs:
+            parser.error("aucun médicament : utilisez --drug ou --drugs-file")
+    else:
+        if not args.input:
+            parser.error(f"la source {args.source} nécessite --input")
+        from .sources.base import create_source
+        options = {'id_prefix': args.id_prefix} if args.id_prefix is not None else {}
+        if args.columns:
+            if args.source != 'csv':
+                parser.error("--columns ne s'applique qu'à la source csv")
+            with open(args.columns, encoding='utf-8') as f:
+                options['columns'] = json.load(f)
+        file_source = create_source(args.source, args.input, **options)
+    if args.spool and args.load_workers > 1:
+        parser.error("--spool et --load-workers > 1 ne peuvent pas être combinés")
+    if args.start_date and args.end_date and args.start_date > args.end_date:
+        parser.error("--start-date est postérieure à --end-date")
+
+    if file_source is None:
+        print(f"🚀 {len(drugs)} médicament(s), {args.workers} worker(s), destination: {args.backend}")
+    else:
+        print(f"🚀 Source {args.source}: {', '.join(args.input)}, {args.workers} worker(s), "
+              f"destination: {args.backend}")
+    from .etl.normalize import load_vocabulary, save_vocabulary
+    learned = load_vocabulary()
+    if learned:
+        print(f"📖 Vocabulaire des médicaments: {learned} correspondances")
+    profiler = None
+    if args.profile:
+        from .profiling import Profiler
+        profiler = Profiler(sample_rate=args.profile_sample).start()
+    try:
+        sink = create_sink(args.backend, args.output, args.spool, args.load_workers)
+    except RuntimeError as e:
+        # Ex: spool déjà ouvert par une autre exécution
+        print(f"❌ {e}")
+        if profiler is not None:
+            profiler.stop()
+        return 1
+    if profiler is not None:
+        sink = profiler.wrap_sink(sink)
+    quarantine = Quarantine(args.quarantine) if args.quarantine else None
+    try:
+        if file_source is not None:
+            summary = SourceRunner(sink, workers=args.workers, batch_size=args.batch_size,
+                                   quarantine=quarantine).run(file_source)
+        else:
+            runner = BatchRunner(sink, limit=args.limit, start_date=args.start_date, end_date=args.end_date,
+                                 workers=args.workers, batch_size=args.batch_size, save_raw=args.save_raw,
+                                 quarantine=quarantine)
+            summary = runner.run(drugs)
+    finally:
+        sink.close()
+        if profiler is not None:
+            profiler.stop()
+        save_vocabulary()
+    summary.sink = sink_stats(sink)
+
+    print_summary(summary)
+    if profiler is not None:
+        profiler.print_report()
+        print(f"⏱️ Profil écrit dans {profiler.dump(args.profile)}")
+    if args.summary_json:
+        with open(args.summary_json, 'w', encoding='utf-8') as f:
+            json.dump(dict(summary.to_dict(), results=[r.__dict__ for r in summary.results]), f, indent=2)
+    return 1 if summary.failed or summary.sink.get('failed_batches') else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,3 +1,18 @@
-from .mongodb import db_client, MongoDBClient
+from importlib import import_module
 
-__all__ = ['db_client', 'MongoDBClient']
\ No newline at end of file
+# Exports chargés au premier accès : importer le paquet n'importe pas pymongo
+_EXPORTS = {
+    'db_client': '.mongodb',
+    'MongoDBClient': '.mongodb',
+    'Vocabulary': '.vocabulary',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,249 @@
+"""
+Export en flux des rapports stockés (NDJSON, CSV, Parquet).
+
+Le curseur MongoDB est parcouru par lots (`batch_size`) et chaque lot est
+écrit dès sa réception : la mémoire utilisée ne dépend pas du nombre de
+rapports exportés et la sortie commence immédiatement (y compris sur la
+sortie standard, pour `| gzip` ou un transfert HTTP).
+"""
+import csv
+import sys
+from typing import Dict, Any, Iterable, List, Optional
+
+from ..models import schemas
+
+EXPORT_FORMATS = ['ndjson', 'csv', 'parquet']
+
+# Champs internes exclus des exports (identifiant MongoDB, encodage des vocabulaires)
+EXPORT_PROJECTION = {'_id': 0, 'drug_ids': 0, 'reaction_ids': 0}
+
+# Colonnes des formats tabulaires (CSV, Parquet) : un rapport par ligne, listes jointes par " | "
+FLAT_COLUMNS = [
+    'report_id', 'report_version', 'received_date', 'receipt_date', 'serious',
+    'patient_age', 'patient_age_unit', 'patient_sex', 'patient_weight',
+    'drugs', 'normalized_drugs', 'active_ingredients', 'reactions', 'reaction_outcomes',
+    'source',
+]
+LIST_SEPARATOR = ' | '
+
+
+def _join(values: Iterable[Any]) -> str:
+    return LIST_SEPARATOR.join(str(v) for v in values if v is not None and v != '')
+
+
+def flatten(report: Dict[str, Any]) -> Dict[str, Any]:
+    """Rapport stocké -> ligne des formats tabulaires."""
+    patient = report.get('patient') or {}
+    drugs = report.get('drugs') or []
+    reactions = report.get('reactions') or []
+    return {
+        'report_id': report.get('report_id'),
+        'report_version': report.get('report_version'),
+        'received_date': report.get('received_date'),
+        'receipt_date': report.get('receipt_date'),
+        'serious': report.get('serious'),
+        'patient_age': patient.get('age'),
+        'patient_age_unit': patient.get('age_unit'),
+        'patient_sex': patient.get('sex'),
+        'patient_weight': patient.get('weight'),
+        'drugs': _join(d.get('name') for d in drugs),
+        'normalized_drugs': _join(d.get('normalized_name') for d in drugs),
+        'active_ingredients': _join(sorted({i for d in drugs for i in d.get('active_ingredients') or []})),
+        'reactions': _join(r.get('term') for r in reactions),
+        'reaction_outcomes': _join(r.get('outcome') for r in reactions),
+        'source': report.get('source'),
+    }
+
+
+def date_range_query(field: str, start_date: Optional[str] = None, end_date: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Filtre de période sur un champ date stocké au format openFDA (YYYYMMDD) ou ISO
+    (rapports nettoyés par DataCleaner) ; les bornes sont au format YYYYMMDD.
+    """
+    if not start_date and not end_date:
+        return {}
+    compact_range, iso_range = {}, {}
+    if start_date:
+        compact_range['$gte'] = start_date
+        iso_range['$gte'] = f"{start_date[:4]}-{start_date[4:6]}-{start_date[6:8]}"
+    if end_date:
+        compact_range['$lte'] = end_date
+        # '2023-12-31T...' est postérieur à '2023-12-31' : la borne couvre toute la journée
+        iso_range['$lte'] = f"{end_date[:4]}-{end_date[4:6]}-{end_date[6:8]}T99"
+    return {'$or': [{field: compact_range}, {field: iso_range}]}
+
+
+class _Output:
+    """Fichier de sortie, ou sortie standard pour '-'."""
+
+    def __init__(self, path: str, binary: bool):
+        self.stdout = path == '-'
+        if self.stdout:
+            self.file = sys.stdout.buffer if binary else sys.stdout
+        else:
+            self.file = open(path, 'wb') if binary else open(path, 'w', newline='', encoding='utf-8')
+
+    def close(self) -> None:
+        self.file.flush()
+        if not self.stdout:
+            self.file.close()
+
+
+class NDJSONWriter:
+    """Un document JSON par ligne (rapports complets)."""
+
+    def __init__(self, path: str):
+        self.output = _Output(path, binary=True)
+
+    def write(self, reports: List[Dict[str, Any]]) -> None:
+        self.output.file.write(b''.join(schemas.dumps(report) + b'\n' for report in reports))
+
+    def close(self) -> None:
+        self.output.close()
+
+
+class CSVWriter:
+    """Un rapport par ligne (`FLAT_COLUMNS`)."""
+
+    def __init__(self, path: str):
+        self.output = _Output(path, binary=False)
+        self.writer = csv.DictWriter(self.output.file, fieldnames=FLAT_COLUMNS)
+        self.writer.writeheader()
+
+    def write(self, reports: List[Dict[str, Any]]) -> None:
+        self.writer.writerows(flatten(report) for report in reports)
+
+    def close(self) -> None:
+        self.output.close()
+
+
+class ParquetWriter:
+    """
+    Fichier Parquet (`FLAT_COLUMNS`, compression zstd), écrit par groupes de
+    `row_group_size` lignes : seul le groupe en cours est gardé en mémoire.
+    """
+
+    def __init__(self, path: str, row_group_size: int = 50000):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if path == '-':
+            raise ValueError("Le format parquet ne peut pas être écrit sur la sortie standard")
+        self._pa = pa
+        self.schema = pa.schema([
+            (name, pa.float64() if name in ('patient_age', 'patient_weight') else pa.string())
+            for name in FLAT_COLUMNS
+        ])
+        self.writer = pq.ParquetWriter(path, self.schema, compression='zstd')
+        self.row_group_size = row_group_size
+        self._rows: List[Dict[str, Any]] = []
+
+    @staticmethod
+    def _number(value: Any) -> Optional[float]:
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+
+    def _flush(self) -> None:
+        if not self._rows:
+            return
+        columns = {}
+        for name, column_type in zip(FLAT_COLUMNS, self.schema.types):
+            if column_type == self._pa.float64():
+                columns[name] = [self._number(row[name]) for row in self._rows]
+            else:
+                columns[name] = [None if row[name] is None else str(row[name]) for row in self._rows]
+        self.writer.write_table(self._pa.Table.from_pydict(columns, schema=self.schema))
+        self._rows = []
+
+    def write(self, reports: List[Dict[str, Any]]) -> None:
+        self._rows.extend(flatten(report) for report in reports)
+        if len(self._rows) >= self.row_group_size:
+            self._flush()
+
+    def close(self) -> None:
+        self._flush()
+        self.writer.close()
+
+
+WRITERS = {'ndjson': NDJSONWriter, 'csv': CSVWriter, 'parquet': ParquetWriter}
+
+
+def iter_batches(cursor, batch_size: int) -> Iterable[List[Dict[str, Any]]]:
+    """Regroupe les documents d'un curseur en lots de `batch_size`."""
+    batch = []
+    for document in cursor:
+        batch.append(document)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def write_reports(reports: Iterable[Dict[str, Any]], path: str, file_format: str = 'ndjson',
+                  batch_size: int = 2000) -> int:
+    """Écrit des rapports (curseur ou itérable) au format demandé ; retourne le nombre écrit."""
+    if file_format not in WRITERS:
+        raise ValueError(f"Format inconnu: {file_format}")
+    writer = WRITERS[file_format](path)
+    count = 0
+    try:
+        for batch in iter_batches(reports, batch_size):
+            writer.write(batch)
+            count += len(batch)
+    finally:
+        writer.close()
+    return count
+
+
+def main():
+    """Export filtré des rapports stockés."""
+    import argparse
+    import logging
+    import os
+    import time
+
+    from ..api.fda_client import load_env
+    from ..cli import _date
+    from .mongodb import DEFAULT_COLLECTION, DEFAULT_DATABASE, MongoDBClient
+
+    load_env()
+    parser = argparse.ArgumentParser(description="Export en flux des rapports stockés")
+    parser.add_argument('--db', default=os.getenv('DATABASE_NAME', DEFAULT_DATABASE),
+                        help="Base chargée par le pipeline (DATABASE_NAME)")
+    parser.add_argument('--collection', default=DEFAULT_COLLECTION,
+                        help="Collection des rapports (nom de base des partitions annuelles)")
+    parser.add_argument('--format', choices=EXPORT_FORMATS, default='ndjson')
+    parser.add_argument('--output', default='-', help="Fichier de sortie ('-' : sortie standard)")
+    parser.add_argument('--drug', help="Médicament (nom normalisé)")
+    parser.add_argument('--reaction', help="Effet indésirable (terme MedDRA)")
+    parser.add_argument('--start-date', type=_date, help="Date de réception minimale (YYYY-MM-DD)")
+    parser.add_argument('--end-date', type=_date, help="Date de réception maximale (YYYY-MM-DD)")
+    parser.add_argument('--limit', type=int, default=0, help="Nombre maximum de rapports (0 : tous)")
+    parser.add_argument('--batch-size', type=int, default=2000, help="Documents par lot du curseur")
+    parser.add_argument('--include-archived', action='store_true',
+                        help="Inclut les partitions archivées de la période (mode partitionné)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING, stream=sys.stderr)
+
+    client = MongoDBClient(os.getenv('MONGO_URI', 'mongodb://localhost:27017/'), args.db, cache_size=0,
+                           collection=args.collection)
+    if not client.connect():
+        sys.exit(1)
+    started = time.perf_counter()
+    try:
+        count = client.export_reports(args.output, args.format, drug=args.drug, reaction=args.reaction,
+                                      start_date=args.start_date, end_date=args.end_date,
+                                      limit=args.limit, batch_size=args.batch_size,
+                                      include_archived=args.include_archived)
+    finally:
+        client.close()
+    # Sur la sortie standard, le bilan va sur stderr pour ne pas polluer l'export
+    print(f"✅ {count} rapports exportés ({args.format}) en {time.perf_counter() - started:.1f}s",
+          file=sys.stderr if args.output == '-' else sys.stdout)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,24 +1,107 @@
-from pymongo import MongoClient
-from pymongo.errors import ConnectionFailure, DuplicateKeyError
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List, Union, Iterable, Iterator
 import logging
+import os
+import time
 
-# Configuration du logging
-logging.basicConfig(level=logging.INFO)
+from ..api.cache import TTLCache
+from ..api.projection import FieldSet
+from .partitions import BASE_NAME, archived_partitions, ensure_partition, list_partitions, partition_name, partitions_in_range
+
+# pymongo (et le module des vocabulaires qui en dépend) est importé à la connexion :
+# importer ce module ne coûte rien aux scripts qui n'utilisent pas la base
+
+# Base et collection écrites par le pipeline (MongoDBLoader) : valeurs par défaut
+# des outils en ligne de commande et de l'application (DATABASE_NAME remplace la base)
+DEFAULT_DATABASE = 'eim_platform'
+DEFAULT_COLLECTION = 'adverse_events'
+
+# Projection MongoDB : dict {'champ': 1}, liste de champs ou FieldSet
+Projection = Optional[Union[Dict[str, Any], Iterable[str]]]
+
+
+def _mongo_projection(projection: Projection):
+    """Convertit une projection (FieldSet, liste ou dict) au format pymongo."""
+    if projection is None or isinstance(projection, dict):
+        return projection
+    if hasattr(projection, 'to_mongo'):
+        return projection.to_mongo()
+    return list(projection)
+
+
+def _cached_projection(projection: Projection):
+    """
+    Projection applicable en mémoire à un document complet du cache.
+
+    Retourne (FieldSet, conserver `_id`) — FieldSet None pour le document
+    entier, par exemple avec {'_id': 0} — ou None pour une projection par
+    exclusion ({'champ': 0}) : la lecture passe alors directement par la base.
+    """
+    if projection is None:
+        return None, True
+    if isinstance(projection, FieldSet):
+        return projection, True
+    if isinstance(projection, dict):
+        keep_id = bool(projection.get('_id', 1))
+        fields = [k for k, v in projection.items() if k != '_id']
+        if not all(projection[k] for k in fields):
+            return None
+        return (FieldSet(fields) if fields else None), keep_id
+    return FieldSet(projection), True
+
+
+def _project(document: Dict[str, Any], fields: Optional[FieldSet], keep_id: bool) -> Dict[str, Any]:
+    if fields is None:
+        # Copie : le document est partagé avec le cache
+        return document if keep_id else {k: v for k, v in document.items() if k != '_id'}
+    projected = fields.apply(document)
+    if keep_id and '_id' in document:
+        projected['_id'] = document['_id']
+    elif not keep_id:
+        projected.pop('_id', None)
+    return projected
+# La configuration du logging (niveau, format) revient aux points d'entrée
 logger = logging.getLogger(__name__)
 
+# Délai après lequel la liste des partitions est relue (partitions créées par un autre processus)
+PARTITION_REFRESH_SECONDS = 60.0
+
 
 
 class MongoDBClient:
-    def __init__(self, connection_string: str = "mongodb://localhost:27017/", db_name: str = "eim"):
+    def __init__(self, connection_string: str = "mongodb://localhost:27017/", db_name: str = "eim",
+                 cache_size: int = 1024, cache_ttl: float = 300.0, partitioned: Optional[bool] = None,
+                 archive_dir: Optional[str] = None, collection: str = BASE_NAME):
         """
         Initialise la connexion à MongoDB.
+        
+        Args:
+            connection_string: URI de connexion
+            db_name: Nom de la base
+            cache_size: Rapports complets gardés en mémoire par `get_report(s)` (0 : pas de cache)
+            cache_ttl: Durée de validité (secondes) d'un rapport en cache
+            partitioned: Une collection par année de réception (`reports_YYYY`, voir
+                `src.database.partitions`) ; par défaut selon REPORTS_PARTITIONED
+            archive_dir: Répertoire des partitions archivées (PARTITION_ARCHIVE_DIR)
+            collection: Collection des rapports (nom de base des partitions en mode partitionné)
         """
         self.connection_string = connection_string
         self.db_name = db_name
+        self.collection_name = collection
+        # Le cache survit à close()/connect() : l'application se reconnecte à chaque rendu
+        self.cache = TTLCache(cache_size, cache_ttl) if cache_size > 0 else None
+        self.cache_hits = 0
+        self.cache_misses = 0
+        if partitioned is None:
+            partitioned = os.getenv('REPORTS_PARTITIONED', '').lower() in ('1', 'true', 'yes')
+        self.partitioned = partitioned
+        self.archive_dir = archive_dir or os.getenv('PARTITION_ARCHIVE_DIR', 'data/archive')
+        self._partitions: List[str] = []
+        self._partitions_checked = 0.0
         self.client = None
         self.db = None
         self.reports = None
+        self.drug_vocab = None
+        self.reaction_vocab = None
         
     def is_connected(self) -> bool:
         """Vérifie si la connexion est active."""
@@ -33,15 +116,31 @@ class MongoDBClient:
         
     def connect(self) -> bool:
         """Établit la connexion à MongoDB."""
+        from pymongo import MongoClient
+        from pymongo.errors import ConnectionFailure
+        from .vocabulary import Vocabulary
+        
         try:
             self.client = MongoClient(self.connection_string, serverSelectionTimeoutMS=5000)
             # Test de la connexion
             self.client.server_info()
             self.db = self.client[self.db_name]
-            self.reports = self.db['reports']
             
-            # Création d'un index unique sur report_id pour éviter les doublons
-            self.reports.create_index("report_id", unique=True)
+            # Vocabulaires encodés en entiers (médicaments, réactions)
+            self.drug_vocab = Vocabulary(self.db['drug_vocab'], self.db['counters'])
+            self.reaction_vocab = Vocabulary(self.db['reaction_vocab'], self.db['counters'])
+            self.drug_vocab.ensure_indexes()
+            self.reaction_vocab.ensure_indexes()
+            
+            if self.partitioned:
+                # Les index de chaque partition sont créés à sa première écriture
+                self.refresh_partitions()
+            else:
+                self.reports = self.db[self.collection_name]
+                # Création d'un index unique sur report_id pour éviter les doublons
+                self.reports.create_index("report_id", unique=True)
+                self.reports.create_index("drug_ids")
+                self.reports.create_index("reaction_ids")
             
             logger.info(f"Connecté à MongoDB: {self.connection_string}")
             logger.info(f"Base de données: {self.db_name}")
@@ -61,15 +160,50 @@ class MongoDBClient:
             self.client = None
             self.db = None
             self.reports = None
+            self.drug_vocab = None
+            self.reaction_vocab = None
+            self._partitions = []
             logger.info("Connexion à MongoDB fermée")
     
+    def refresh_partitions(self) -> List[str]:
+        """Relit la liste des partitions présentes en base (des plus récentes aux plus anciennes)."""
+        self._partitions = list_partitions(self.db, self.collection_name)
+        self._partitions_checked = time.monotonic()
+        return self._partitions
+    
+    def partition_for(self, received_date: Any):
+        """Partition de destination d'un rapport reçu à cette date (créée si besoin)."""
+        name = partition_name(received_date, self.collection_name)
+        if name not in self._partitions:
+            ensure_partition(self.db, name)
+            self._partitions = partitions_in_range(self._partitions + [name])
+        return self.db[name]
+    
+    def collections(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> list:
+        """
+        Collections à interroger pour une période de réception (YYYYMMDD) : les
+        seules partitions concernées, des plus récentes aux plus anciennes, ou
+        la collection des rapports sans partitionnement.
+        """
+        if not self.partitioned:
+            return [self.reports]
+        if time.monotonic() - self._partitions_checked > PARTITION_REFRESH_SECONDS:
+            self.refresh_partitions()
+        return [self.db[name] for name in partitions_in_range(self._partitions, start_date, end_date)]
+    
+    def _target(self, report_data: Dict[str, Any]):
+        """Collection où écrire un rapport."""
+        return self.partition_for(report_data.get('received_date')) if self.partitioned else self.reports
+    
     def insert_report(self, report_data: Dict[str, Any]) -> bool:
         """
         Insère un nouveau rapport dans la base de données.
         """
+        from pymongo.errors import DuplicateKeyError
+        
         try:
             # Vérification de la connexion
-            if not self.is_connected() or not hasattr(self, 'reports') or self.reports is None:
+            if not self.is_connected() or self.db is None:
                 logger.error("Non connecté à la base de données")
                 return False
             
@@ -78,8 +212,11 @@ class MongoDBClient:
                 logger.error("Le rapport doit avoir un report_id")
                 return False
             
-            # Insertion du rapport
-            result = self.reports.insert_one(report_data)
+            # Encodage des médicaments et réactions, puis insertion du rapport
+            self.encode_reports([report_data])
+            self.invalidate(report_data['report_id'])
+            # En mode partitionné, l'unicité de report_id est garantie au sein de l'année de réception
+            result = self._target(report_data).insert_one(report_data)
             logger.info(f"Rapport {report_data['report_id']} inséré avec l'ID: {result.inserted_id}")
             return True
             
@@ -90,40 +227,141 @@ class MongoDBClient:
             logger.error(f"Erreur lors de l'insertion du rapport {report_data.get('report_id')}: {e}")
             return False
 
-    # ... (le reste des méthodes reste inchangé)
-    def get_report(self, report_id: str) -> Optional[Dict[str, Any]]:
+    def encode_reports(self, reports: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Ajoute aux rapports les tableaux `drug_ids` et `reaction_ids`.
+        
+        Les noms d'origine sont conservés pour l'affichage ; les identifiants
+        entiers servent aux index et aux agrégations.
+        """
+        from .vocabulary import encode_reports
+        
+        if self.drug_vocab is None or self.reaction_vocab is None:
+            raise RuntimeError("Non connecté à la base de données")
+        return encode_reports(reports, self.drug_vocab, self.reaction_vocab)
+
+    def upsert_report(self, report_data: Dict[str, Any]) -> bool:
+        """
+        Insère un rapport ou remplace sa version existante (même report_id).
+        """
+        try:
+            if self.db is None:
+                logger.error("Non connecté à la base de données")
+                return False
+            if not report_data.get("report_id"):
+                logger.error("Le rapport doit avoir un report_id")
+                return False
+            
+            self.encode_reports([report_data])
+            self.invalidate(report_data['report_id'])
+            document = {k: v for k, v in report_data.items() if k != '_id'}
+            target = self._target(report_data)
+            target.replace_one({"report_id": report_data['report_id']}, document, upsert=True)
+            if self.partitioned:
+                # Nouvelle version avec une autre date de réception : l'ancienne est retirée de son année
+                for collection in self.collections():
+                    if collection.name != target.name:
+                        collection.delete_many({"report_id": report_data['report_id']})
+            return True
+            
+        except Exception as e:
+            logger.error(f"Erreur lors de la mise à jour du rapport {report_data.get('report_id')}: {e}")
+            return False
+
+    def invalidate(self, report_id: Optional[str] = None) -> None:
+        """Retire un rapport du cache de lecture (tout le cache sans argument)."""
+        if self.cache is None:
+            return
+        if report_id is None:
+            self.cache.clear()
+        else:
+            self.cache.pop(report_id)
+
+    def get_report(self, report_id: str, projection: Projection = None) -> Optional[Dict[str, Any]]:
         """
         Récupère un rapport par son ID.
         
+        Avec le cache, le document complet est conservé en mémoire et la
+        projection appliquée localement. Les documents retournés peuvent être
+        partagés avec le cache : ne pas les modifier en place.
+        
         Args:
             report_id: ID du rapport à récupérer
+            projection: Champs à retourner (par défaut, le document complet)
             
         Returns:
             Le rapport s'il existe, None sinon
         """
+        found = self.get_reports([report_id], projection)
+        return found[0] if found else None
+
+    def get_reports(self, report_ids: Iterable[str], projection: Projection = None) -> List[Dict[str, Any]]:
+        """
+        Récupère plusieurs rapports : ceux en cache sont servis depuis la mémoire,
+        les autres lus en une seule requête `$in`.
+        
+        Args:
+            report_ids: IDs des rapports
+            projection: Champs à retourner (par défaut, les documents complets)
+            
+        Returns:
+            Les rapports trouvés, dans l'ordre des IDs demandés
+        """
+        report_ids = list(dict.fromkeys(report_ids))
+        if not report_ids:
+            return []
         try:
-            if not self.reports:
+            if self.db is None:
                 logger.error("Non connecté à la base de données")
-                return None
-                
-            report = self.reports.find_one({"report_id": report_id})
-            if report:
-                logger.info(f"Rapport {report_id} trouvé")
-            else:
-                logger.info(f"Rapport {report_id} non trouvé")
-            return report
+                return []
+            
+            cached = _cached_projection(projection) if self.cache is not None else None
+            if cached is None:
+                found = self._find_by_ids(report_ids, _mongo_projection(projection))
+                return [found[i] for i in report_ids if i in found]
+            
+            fields, keep_id = cached
+            found = {}
+            misses = []
+            for report_id in report_ids:
+                document = self.cache.get(report_id)
+                if document is None:
+                    misses.append(report_id)
+                else:
+                    found[report_id] = document
+            self.cache_hits += len(found)
+            self.cache_misses += len(misses)
+            if misses:
+                for report_id, document in self._find_by_ids(misses).items():
+                    self.cache.set(report_id, document)
+                    found[report_id] = document
+            logger.debug(f"{len(report_ids)} rapports demandés, {len(misses)} lus en base")
+            return [_project(found[i], fields, keep_id) for i in report_ids if i in found]
             
         except Exception as e:
-            logger.error(f"Erreur lors de la récupération du rapport {report_id}: {e}")
-            return None
+            logger.error(f"Erreur lors de la récupération des rapports {report_ids[:5]}: {e}")
+            return []
+    
+    def _find_by_ids(self, report_ids: List[str], projection=None) -> Dict[str, Dict[str, Any]]:
+        """Lit des rapports par ID, partition après partition jusqu'à les avoir tous trouvés."""
+        found: Dict[str, Dict[str, Any]] = {}
+        remaining = report_ids
+        for collection in self.collections():
+            query = {"report_id": remaining[0]} if len(remaining) == 1 else {"report_id": {"$in": remaining}}
+            for document in collection.find(query, projection):
+                found[document['report_id']] = document
+            remaining = [i for i in remaining if i not in found]
+            if not remaining:
+                break
+        return found
     
     def count_reports(self) -> int:
         """Retourne le nombre total de rapports dans la base."""
         try:
-            if not self.reports:
+            if self.db is None:
                 logger.error("Non connecté à la base de données")
                 return 0
-            return self.reports.count_documents({})
+            return sum(collection.count_documents({}) for collection in self.collections())
         except Exception as e:
             logger.error(f"Erreur lors du comptage des rapports: {e}")
             return 0
@@ -139,12 +377,17 @@ class MongoDBClient:
             bool: True si la suppression a réussi, False sinon
         """
         try:
-            if not self.reports:
+            if self.db is None:
                 logger.error("Non connecté à la base de données")
                 return False
                 
-            result = self.reports.delete_one({"report_id": report_id})
-            if result.deleted_count > 0:
+            self.invalidate(report_id)
+            deleted = 0
+            for collection in self.collections():
+                deleted = collection.delete_one({"report_id": report_id}).deleted_count
+                if deleted:
+                    break
+            if deleted > 0:
                 logger.info(f"Rapport {report_id} supprimé")
                 return True
             else:
@@ -155,22 +398,28 @@ class MongoDBClient:
             logger.error(f"Erreur lors de la suppression du rapport {report_id}: {e}")
             return False
     
-    def list_reports(self, limit: int = 10) -> list:
+    def list_reports(self, limit: int = 10, projection: Projection = None) -> list:
         """
         Liste les rapports avec une limite.
         
         Args:
             limit: Nombre maximum de rapports à retourner
+            projection: Champs à retourner (ex: REPORT_SUMMARY_FIELDS)
             
         Returns:
             Liste des rapports
         """
         try:
-            if not self.reports:
+            if self.db is None:
                 logger.error("Non connecté à la base de données")
                 return []
                 
-            reports = list(self.reports.find().limit(limit))
+            reports = []
+            for collection in self.collections():
+                remaining = limit - len(reports) if limit else 0
+                reports.extend(collection.find({}, _mongo_projection(projection)).limit(remaining))
+                if limit and len(reports) >= limit:
+                    break
             logger.info(f"{len(reports)} rapports récupérés")
             return reports
             
@@ -178,5 +427,117 @@ class MongoDBClient:
             logger.error(f"Erreur lors de la liste des rapports: {e}")
             return []
 
-# Instance globale pour une utilisation facile
-db_client = MongoDBClient()
\ No newline at end of file
+    def report_query(self, drug: Optional[str] = None, reaction: Optional[str] = None,
+                     start_date: Optional[str] = None, end_date: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Filtre MongoDB des rapports d'un médicament, d'un effet et/ou d'une période.
+        
+        Le médicament et l'effet sont résolus via les vocabulaires (champs indexés
+        `drug_ids`/`reaction_ids`) ; retourne None si l'un d'eux est inconnu de la base.
+        """
+        from .export import date_range_query
+        
+        query: Dict[str, Any] = {}
+        if drug:
+            from ..etl.normalize import drug_normalizer
+            drug_id = self.drug_vocab.lookup(drug_normalizer.normalize(drug) or drug)
+            if drug_id is None:
+                drug_id = self.drug_vocab.lookup(drug)
+            if drug_id is None:
+                return None
+            query['drug_ids'] = drug_id
+        if reaction:
+            reaction_id = self.reaction_vocab.lookup(reaction)
+            if reaction_id is None:
+                return None
+            query['reaction_ids'] = reaction_id
+        query.update(date_range_query('received_date', start_date, end_date))
+        return query
+
+    def iter_reports(self, drug: Optional[str] = None, reaction: Optional[str] = None,
+                     start_date: Optional[str] = None, end_date: Optional[str] = None,
+                     projection: Projection = None, batch_size: int = 2000,
+                     limit: int = 0, include_archived: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        Parcourt les rapports filtrés sans les charger en mémoire (curseur lu par
+        lots de `batch_size`). Contrairement à `list_reports`, aucune limite par défaut.
+        
+        En mode partitionné, seules les années de la période sont interrogées,
+        des plus récentes aux plus anciennes.
+        
+        Args:
+            drug, reaction: Médicament et effet (noms), optionnels
+            start_date, end_date: Période de réception (YYYYMMDD), bornes incluses
+            projection: Champs à retourner (par défaut, tout sauf les champs internes)
+            batch_size: Documents reçus par aller-retour avec le serveur
+            limit: Nombre maximum de rapports (0 : tous)
+            include_archived: Lit aussi les partitions archivées de la période (fichiers compressés)
+        """
+        from .export import EXPORT_PROJECTION
+        
+        if self.db is None:
+            raise RuntimeError("Non connecté à la base de données")
+        query = self.report_query(drug, reaction, start_date, end_date)
+        if query is None:
+            logger.info(f"Aucun rapport pour le filtre (médicament={drug}, effet={reaction})")
+            return
+        projection = EXPORT_PROJECTION if projection is None else _mongo_projection(projection)
+        count = 0
+        for collection in self.collections(start_date, end_date):
+            # Sans délai d'inactivité : un consommateur lent (export réseau) ne perd pas le curseur
+            cursor = collection.find(query, projection, batch_size=batch_size, limit=limit - count if limit else 0,
+                                     no_cursor_timeout=True)
+            try:
+                for document in cursor:
+                    count += 1
+                    yield document
+            finally:
+                cursor.close()
+            if limit and count >= limit:
+                return
+        if include_archived and self.partitioned:
+            yield from self._iter_archived(query, start_date, end_date, projection, limit - count if limit else 0)
+    
+    def _iter_archived(self, query: Dict[str, Any], start_date: Optional[str], end_date: Optional[str],
+                       projection: Dict[str, Any], limit: int = 0) -> Iterator[Dict[str, Any]]:
+        """Rapports des partitions archivées correspondant au filtre de `report_query`."""
+        from ..etl.archive import RawArchive
+        
+        archives = archived_partitions(self.db, self.collection_name)
+        cached = _cached_projection(projection)
+        count = 0
+        for name in partitions_in_range(archives, start_date, end_date):
+            archive = RawArchive(archives[name]['path'], id_field='report_id')
+            # La période est filtrée sur l'index de l'archive : seuls ses blocs sont décompressés
+            for document in archive.iter_range(start_date, end_date):
+                if 'drug_ids' in query and query['drug_ids'] not in document.get('drug_ids', []):
+                    continue
+                if 'reaction_ids' in query and query['reaction_ids'] not in document.get('reaction_ids', []):
+                    continue
+                if cached is None:
+                    document = {k: v for k, v in document.items() if k not in projection}
+                else:
+                    document = _project(document, *cached)
+                count += 1
+                yield document
+                if limit and count >= limit:
+                    return
+
+    def export_reports(self, output: str, file_format: str = 'ndjson', batch_size: int = 2000,
+                       **filters) -> int:
+        """
+        Exporte en flux les rapports filtrés (voir `iter_reports`) en NDJSON, CSV ou Parquet.
+        
+        Returns:
+            Nombre de rapports exportés
+        """
+        from .export import write_reports
+        
+        limit = filters.pop('limit', 0)
+        reports = self.iter_reports(batch_size=batch_size, limit=limit, **filters)
+        count = write_reports(reports, output, file_format, batch_size)
+        logger.info(f"{count} rapports exportés vers {output} ({file_format})")
+        return count
+
+# Instance globale pour une utilisation facile (aucune connexion avant `connect()`)
+db_client = MongoDBClient(db_name=os.getenv('DATABASE_NAME', DEFAULT_DATABASE), collection=DEFAULT_COLLECTION)
\ No newline at end of file
@@ -0,0 +1,307 @@
+"""
+Partitionnement annuel des rapports stockés et archivage des années anciennes.
+
+En mode partitionné, `MongoDBClient` range chaque rapport dans la collection
+`reports_<année de réception>` (`reports_unknown` sans date exploitable).
+Chaque partition a ses propres index, de taille bornée : une requête sur
+une période n'interroge que les années concernées et le coût d'une requête
+sur les données récentes ne dépend plus de la profondeur de l'historique.
+
+Les années anciennes sont archivées (`archive_partition`) en segments JSON
+Lines compressés (format de `src.etl.archive`, indexés par report_id et date
+de réception) puis supprimées de la base. Le registre `report_partitions`
+garde l'état de chaque partition (active ou archivée) et l'emplacement de
+son archive.
+"""
+import logging
+import re
+import shutil
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Any, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+BASE_NAME = 'reports'
+UNKNOWN = 'unknown'
+REGISTRY = 'report_partitions'
+ACTIVE = 'active'
+ARCHIVED = 'archived'
+
+_PARTITION_RE = re.compile(r'^(?P<base>\w+?)_(?P<key>\d{4}|unknown)$')
+
+
+def partition_key(received_date: Any) -> str:
+    """Année de réception (YYYYMMDD ou ISO), 'unknown' si la date est absente ou invalide."""
+    year = str(received_date or '')[:4]
+    return year if year.isdigit() and year >= '1900' else UNKNOWN
+
+
+def partition_name(received_date: Any, base: str = BASE_NAME) -> str:
+    return f"{base}_{partition_key(received_date)}"
+
+
+def partition_year(name: str) -> Optional[int]:
+    """Année d'une partition (None pour `<base>_unknown` ou un nom étranger)."""
+    match = _PARTITION_RE.match(name)
+    return int(match.group('key')) if match and match.group('key') != UNKNOWN else None
+
+
+def is_partition(name: str, base: str = BASE_NAME) -> bool:
+    match = _PARTITION_RE.match(name)
+    return match is not None and match.group('base') == base
+
+
+def partitions_in_range(names: Iterable[str], start_date: Optional[str] = None,
+                        end_date: Optional[str] = None) -> List[str]:
+    """
+    Partitions pouvant contenir des rapports reçus dans la période, des plus
+    récentes aux plus anciennes. Un filtre de date exclut la partition `unknown`.
+    """
+    low = int(start_date[:4]) if start_date else None
+    high = int(end_date[:4]) if end_date else None
+    selected = []
+    for name in names:
+        year = partition_year(name)
+        if year is None:
+            if low is None and high is None:
+                selected.append(name)
+            continue
+        if (low is None or year >= low) and (high is None or year <= high):
+            selected.append(name)
+    # Tri décroissant par année, `unknown` en dernier
+    return sorted(selected, key=lambda n: partition_year(n) or 0, reverse=True)
+
+
+def split_by_partition(reports: Iterable[Dict[str, Any]], base: str = BASE_NAME) -> Dict[str, List[Dict[str, Any]]]:
+    """Regroupe des rapports par partition de destination."""
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for report in reports:
+        groups.setdefault(partition_name(report.get('received_date'), base), []).append(report)
+    return groups
+
+
+def list_partitions(db, base: str = BASE_NAME) -> List[str]:
+    """Partitions présentes en base (collections `<base>_YYYY` et `<base>_unknown`)."""
+    return partitions_in_range(name for name in db.list_collection_names() if is_partition(name, base))
+
+
+def ensure_partition_indexes(collection) -> None:
+    """Index d'une partition (identiques à ceux de la collection non partitionnée)."""
+    collection.create_index("report_id", unique=True)
+    collection.create_index("drug_ids")
+    collection.create_index("reaction_ids")
+
+
+def register_partition(db, name: str, **fields) -> None:
+    """Crée ou met à jour l'entrée d'une partition dans le registre."""
+    fields.setdefault('status', ACTIVE)
+    db[REGISTRY].update_one({'_id': name}, {'$set': dict(fields, year=partition_year(name))}, upsert=True)
+
+
+def ensure_partition(db, name: str):
+    """
+    Prépare une partition avant sa première écriture (index, entrée du registre).
+
+    Une année déjà archivée qui reçoit des rapports tardifs reste marquée
+    archivée : ses nouveaux rapports seront ajoutés à l'archive existante.
+    """
+    collection = db[name]
+    ensure_partition_indexes(collection)
+    db[REGISTRY].update_one({'_id': name}, {'$setOnInsert': {'status': ACTIVE, 'year': partition_year(name)}},
+                            upsert=True)
+    return collection
+
+
+def archived_partitions(db, base: str = BASE_NAME) -> Dict[str, Dict[str, Any]]:
+    """Partitions archivées : nom -> entrée du registre (chemin, nombre de rapports...)."""
+    return {entry['_id']: entry for entry in db[REGISTRY].find({'status': ARCHIVED})
+            if is_partition(entry['_id'], base)}
+
+
+def archive_partition(db, name: str, directory: str = 'data/archive', batch_size: int = 2000,
+                      drop: bool = True) -> int:
+    """
+    Archive une partition dans `directory/<nom>` puis la supprime de la base.
+
+    L'archive est écrite dans un répertoire temporaire, relue et comptée avant
+    d'être renommée : la collection n'est supprimée qu'une fois l'archive
+    complète, et une archive interrompue est simplement recommencée.
+    L'archive d'une partition restaurée (`restore_partition`) est remplacée ;
+    celle d'une année archivée ayant reçu des rapports tardifs est complétée.
+
+    Returns:
+        Nombre de rapports archivés
+    """
+    from ..etl.archive import RawArchive, RawArchiveWriter
+
+    collection = db[name]
+    live = collection.count_documents({})
+    expected = live
+    entry = db[REGISTRY].find_one({'_id': name}) or {}
+    target = Path(entry['path'] if entry.get('status') == ARCHIVED and entry.get('path') else Path(directory) / name)
+    staging = target.with_name(f"{name}.tmp")
+    if staging.exists():
+        shutil.rmtree(staging)
+
+    writer = RawArchiveWriter(str(staging), id_field='report_id', date_field='received_date')
+    cursor = collection.find({}, {'_id': 0}, batch_size=batch_size, no_cursor_timeout=True)
+    try:
+        if entry.get('status') == ARCHIVED and target.exists():
+            previous = RawArchive(str(target), id_field='report_id')
+            expected += len(previous)
+            writer.add_many(previous, flush=False)
+        for document in cursor:
+            writer.add(document)
+    finally:
+        cursor.close()
+        writer.close()
+
+    archived = len(RawArchive(str(staging), id_field='report_id'))
+    if archived != expected or collection.count_documents({}) != live:
+        # Écritures concurrentes pendant l'archivage : la partition est conservée
+        shutil.rmtree(staging)
+        raise RuntimeError(f"{name}: {archived} rapports archivés pour {expected} attendus, archive abandonnée")
+    if target.exists():
+        # L'ancienne archive (restaurée ou recopiée ci-dessus) est remplacée
+        shutil.rmtree(target)
+    staging.rename(target)
+
+    register_partition(db, name, status=ARCHIVED, count=archived, path=str(target),
+                       archived_at=datetime.now(timezone.utc).isoformat())
+    if drop:
+        collection.drop()
+    logger.info(f"Partition {name} archivée ({archived} rapports) dans {target}")
+    return archived
+
+
+def restore_partition(db, name: str, batch_size: int = 2000) -> int:
+    """Recharge en base une partition archivée (l'archive est conservée)."""
+    from pymongo.errors import BulkWriteError
+
+    from ..etl.archive import RawArchive
+    from .export import iter_batches
+
+    entry = db[REGISTRY].find_one({'_id': name})
+    if entry is None or entry.get('status') != ARCHIVED:
+        raise ValueError(f"Partition non archivée: {name}")
+    collection = db[name]
+    ensure_partition_indexes(collection)
+    restored = 0
+    for batch in iter_batches(RawArchive(entry['path'], id_field='report_id'), batch_size):
+        try:
+            restored += len(collection.insert_many(batch, ordered=False).inserted_ids)
+        except BulkWriteError as e:
+            # Rapports déjà rechargés lors d'une tentative précédente
+            restored += e.details.get('nInserted', 0)
+    register_partition(db, name, status=ACTIVE, count=collection.count_documents({}))
+    logger.info(f"Partition {name} restaurée ({restored} rapports)")
+    return restored
+
+
+def migrate_collection(db, source: str = BASE_NAME, batch_size: int = 2000) -> Dict[str, int]:
+    """
+    Copie une collection non partitionnée vers les partitions annuelles.
+
+    La copie est idempotente (doublons ignorés) ; la collection source n'est
+    pas modifiée.
+
+    Returns:
+        Rapports copiés par partition
+    """
+    from pymongo.errors import BulkWriteError
+
+    from .export import iter_batches
+
+    copied: Dict[str, int] = {}
+    cursor = db[source].find({}, {'_id': 0}, batch_size=batch_size, no_cursor_timeout=True)
+    try:
+        for batch in iter_batches(cursor, batch_size):
+            for name, reports in split_by_partition(batch, source).items():
+                if name not in copied:
+                    ensure_partition(db, name)
+                    copied[name] = 0
+                try:
+                    copied[name] += len(db[name].insert_many(reports, ordered=False).inserted_ids)
+                except BulkWriteError as e:
+                    copied[name] += e.details.get('nInserted', 0)
+    finally:
+        cursor.close()
+    return copied
+
+
+def main():
+    """Gestion des partitions annuelles : état, migration, archivage, restauration."""
+    import argparse
+    import os
+    import sys
+
+    from ..api.fda_client import load_env
+    from .mongodb import DEFAULT_COLLECTION, DEFAULT_DATABASE, MongoDBClient
+
+    load_env()
+    parser = argparse.ArgumentParser(description="Partitions annuelles des rapports stockés")
+    parser.add_argument('--dir', default=None, help="Répertoire des archives (PARTITION_ARCHIVE_DIR)")
+    parser.add_argument('--db', default=os.getenv('DATABASE_NAME', DEFAULT_DATABASE),
+                        help="Base chargée par le pipeline (DATABASE_NAME)")
+    parser.add_argument('--collection', default=DEFAULT_COLLECTION,
+                        help="Collection des rapports (nom de base des partitions annuelles)")
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('list', help="Affiche les partitions actives et archivées")
+    migrate = sub.add_parser('migrate', help="Copie la collection non partitionnée vers les partitions annuelles")
+    migrate.add_argument('--drop', action='store_true', help="Supprime la collection source après vérification")
+    archive = sub.add_parser('archive', help="Archive les partitions anciennes puis les supprime de la base")
+    group = archive.add_mutually_exclusive_group(required=True)
+    group.add_argument('--before', type=int, help="Archive les années strictement antérieures")
+    group.add_argument('--keep-years', type=int, help="Nombre d'années récentes conservées en base")
+    restore = sub.add_parser('restore', help="Recharge une partition archivée")
+    restore.add_argument('name', help="Partition (ex: adverse_events_2015)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    directory = args.dir or os.getenv('PARTITION_ARCHIVE_DIR', 'data/archive')
+    base = args.collection
+    client = MongoDBClient(os.getenv('MONGO_URI', 'mongodb://localhost:27017/'), args.db,
+                           cache_size=0, partitioned=True, collection=base)
+    if not client.connect():
+        sys.exit(1)
+    db = client.db
+    try:
+        if args.command == 'migrate':
+            copied = migrate_collection(db, source=base)
+            for name, count in sorted(copied.items()):
+                print(f"📥 {name}: {count} rapports copiés")
+            source_count = db[base].count_documents({})
+            total = sum(db[name].count_documents({}) for name in list_partitions(db, base))
+            if args.drop:
+                if total < source_count:
+                    print(f"❌ {total} rapports en partitions pour {source_count} dans `{base}` : "
+                          f"source conservée")
+                    sys.exit(1)
+                db[base].drop()
+                print(f"🗑️ Collection `{base}` supprimée")
+        elif args.command == 'archive':
+            before = args.before if args.before is not None else datetime.now().year - args.keep_years + 1
+            for name in list_partitions(db, base):
+                year = partition_year(name)
+                if year is not None and year < before:
+                    started = datetime.now()
+                    count = archive_partition(db, name, directory)
+                    seconds = (datetime.now() - started).total_seconds()
+                    print(f"📦 {name}: {count} rapports archivés en {seconds:.1f}s")
+        elif args.command == 'restore':
+            if not is_partition(args.name, base):
+                print(f"❌ {args.name} n'est pas une partition de `{base}`")
+                sys.exit(1)
+            print(f"📥 {args.name}: {restore_partition(db, args.name)} rapports restaurés")
+
+        for name in list_partitions(db, base):
+            print(f"🗂️ {name}: {db[name].estimated_document_count()} rapports")
+        for name, entry in sorted(archived_partitions(db, base).items()):
+            print(f"📦 {name}: {entry.get('count', 0)} rapports archivés ({entry.get('path')})")
+    finally:
+        client.close()
+
+
+if __name__ == '__main__':
+    main()
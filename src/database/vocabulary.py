@@ -0,0 +1,134 @@
+from typing import Dict, Any, List, Optional, Iterable
+import logging
+
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+
+class Vocabulary:
+    """
+    Vocabulaire persistant nom -> identifiant entier.
+
+    Les entrées sont stockées dans une collection dédiée (`{_id: int, name: str}`)
+    et gardées dans un cache en mémoire : seuls les noms jamais vus déclenchent
+    des accès à la base.
+    """
+
+    def __init__(self, collection, counters):
+        self.collection = collection
+        self.counters = counters
+        self._ids: Dict[str, int] = {}
+        self._names: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @staticmethod
+    def key(name: Optional[str]) -> str:
+        """Clé de vocabulaire : nom en majuscules, espaces normalisés."""
+        return ' '.join(name.upper().split()) if name else ''
+
+    def ensure_indexes(self) -> None:
+        self.collection.create_index('name', unique=True)
+
+    def load(self) -> int:
+        """Précharge tout le vocabulaire dans le cache."""
+        for doc in self.collection.find({}, {'name': 1}):
+            self._remember(doc['name'], doc['_id'])
+        return len(self._ids)
+
+    def _remember(self, name: str, vocab_id: int) -> None:
+        self._ids[name] = vocab_id
+        self._names[vocab_id] = name
+
+    def _allocate(self, count: int) -> int:
+        """Réserve `count` identifiants consécutifs et retourne le premier."""
+        doc = self.counters.find_one_and_update(
+            {'_id': self.collection.name},
+            {'$inc': {'seq': count}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return doc['seq'] - count + 1
+
+    def encode_many(self, names: Iterable[Optional[str]]) -> List[int]:
+        """
+        Encode une liste de noms en identifiants (les noms vides sont ignorés).
+
+        Les noms inconnus du cache sont d'abord cherchés en base en une seule
+        requête, puis les nouveaux noms reçoivent un bloc d'identifiants.
+        """
+        keys = [k for k in (self.key(n) for n in names) if k]
+        missing = list({k for k in keys if k not in self._ids})
+        if missing:
+            for doc in self.collection.find({'name': {'$in': missing}}):
+                self._remember(doc['name'], doc['_id'])
+            new = [k for k in missing if k not in self._ids]
+            if new:
+                self._insert(new)
+        return [self._ids[k] for k in keys]
+
+    def _insert(self, names: List[str]) -> None:
+        first = self._allocate(len(names))
+        docs = [{'_id': first + i, 'name': name} for i, name in enumerate(names)]
+        try:
+            self.collection.insert_many(docs, ordered=False)
+        except BulkWriteError:
+            # Un autre processus a inséré certains noms entre-temps : on relit leurs IDs
+            logger.debug("Conflit d'insertion dans %s, relecture", self.collection.name)
+            for doc in self.collection.find({'name': {'$in': names}}):
+                self._remember(doc['name'], doc['_id'])
+            return
+        for doc in docs:
+            self._remember(doc['name'], doc['_id'])
+
+    def encode(self, name: Optional[str]) -> Optional[int]:
+        ids = self.encode_many([name])
+        return ids[0] if ids else None
+
+    def lookup(self, name: Optional[str]) -> Optional[int]:
+        """Identifiant d'un nom déjà connu (None sinon : contrairement à `encode`, rien n'est créé)."""
+        key = self.key(name)
+        if not key:
+            return None
+        vocab_id = self._ids.get(key)
+        if vocab_id is None:
+            doc = self.collection.find_one({'name': key})
+            if doc:
+                self._remember(doc['name'], doc['_id'])
+                vocab_id = doc['_id']
+        return vocab_id
+
+    def decode(self, vocab_id: int) -> Optional[str]:
+        """Retourne le nom associé à un identifiant."""
+        name = self._names.get(vocab_id)
+        if name is None:
+            doc = self.collection.find_one({'_id': vocab_id})
+            if doc:
+                self._remember(doc['name'], doc['_id'])
+                name = doc['name']
+        return name
+
+
+def drug_key(drug: Dict[str, Any]) -> Optional[str]:
+    """Nom utilisé pour encoder un médicament (nom normalisé si disponible)."""
+    return drug.get('normalized_name') or drug.get('name')
+
+
+def encode_reports(reports: List[Dict[str, Any]], drug_vocab: Vocabulary,
+                   reaction_vocab: Vocabulary) -> List[Dict[str, Any]]:
+    """
+    Ajoute `drug_ids` et `reaction_ids` à chaque rapport (modifiés en place).
+
+    Les noms de tout le lot sont encodés en un seul passage par vocabulaire.
+    """
+    drug_names = [[drug_key(d) for d in r.get('drugs') or []] for r in reports]
+    reaction_names = [[x.get('term') for x in r.get('reactions') or []] for r in reports]
+    drug_vocab.encode_many(n for names in drug_names for n in names)
+    reaction_vocab.encode_many(n for names in reaction_names for n in names)
+    for report, drugs, reactions in zip(reports, drug_names, reaction_names):
+        report['drug_ids'] = sorted(set(drug_vocab.encode_many(drugs)))
+        report['reaction_ids'] = sorted(set(reaction_vocab.encode_many(reactions)))
+    return reports
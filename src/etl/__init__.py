@@ -1,4 +1,22 @@
 # src/etl/__init__.py
-from .data_cleaner import DataCleaner
+from importlib import import_module
 
-__all__ = ['DataCleaner']
\ No newline at end of file
+# Exports chargés au premier accès (pymongo, requests et numpy ne sont importés
+# que par les étapes qui en ont besoin)
+_EXPORTS = {
+    'DataCleaner': '.data_cleaner',
+    'Extractor': '.extract',
+    'Transformer': '.transform',
+    'MongoDBLoader': '.load',
+    'Deduplicator': '.dedup',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,370 @@
+"""
+Archive des rapports bruts openFDA : segments JSON Lines compressés et index mappé en mémoire.
+
+Chaque segment `raw-NNNNNN.jsonl.zst` (ou `.jsonl.gz` sans zstandard) est une
+suite de blocs compressés indépendamment, lisible tel quel par `zstdcat`/`zcat`.
+Le fichier `.idx` associé contient une entrée binaire de taille fixe par
+rapport (hachage du safetyreportid, date de réception, position du bloc) ; il
+est mappé en mémoire par le lecteur pour l'accès direct et les plages de dates.
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from ..models import schemas
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+INDEX_DTYPE = np.dtype([
+    ('key', '<u8'),      # blake2b 64 bits du safetyreportid
+    ('date', '<u4'),     # receivedate (YYYYMMDD), 0 si inconnue
+    ('offset', '<u8'),   # position du bloc compressé dans le segment
+    ('length', '<u4'),   # taille du bloc compressé
+    ('line', '<u4'),     # ligne du rapport dans le bloc
+])
+
+ZSTD_EXT = '.jsonl.zst'
+GZIP_EXT = '.jsonl.gz'
+
+
+def report_key(report_id: Any) -> int:
+    return int.from_bytes(hashlib.blake2b(str(report_id).encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def date_key(value: Any) -> int:
+    """Convertit une date openFDA (YYYYMMDD ou YYYY-MM-DD) en entier YYYYMMDD (0 si invalide)."""
+    digits = str(value or '').replace('-', '')[:8]
+    return int(digits) if len(digits) == 8 and digits.isdigit() else 0
+
+
+def _compress(data: bytes, ext: str) -> bytes:
+    if ext == ZSTD_EXT:
+        return zstandard.ZstdCompressor(level=6).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def _decompress(data: bytes, ext: str) -> bytes:
+    if ext == ZSTD_EXT:
+        if zstandard is None:
+            raise RuntimeError("Segment zstd illisible : le module zstandard est absent")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def _segment_ext(path: Path) -> str:
+    return ZSTD_EXT if path.name.endswith(ZSTD_EXT) else GZIP_EXT
+
+
+class RawArchiveWriter:
+    """
+    Écrit des rapports bruts dans l'archive (thread-safe).
+
+    Chaque écrivain ouvre ses propres segments (numérotés après les existants) ;
+    un segment est fermé au-delà de `segment_records` rapports.
+    """
+
+    def __init__(self, directory: str = "data/raw", block_records: int = 256,
+                 segment_records: int = 100000, codec: Optional[str] = None,
+                 id_field: str = 'safetyreportid', date_field: str = 'receivedate'):
+        """
+        Args:
+            directory: Répertoire de l'archive
+            block_records: Rapports par bloc compressé (unité de lecture aléatoire)
+            segment_records: Rapports par segment
+            codec: 'zstd' ou 'gzip' (par défaut zstd si le module est installé)
+            id_field, date_field: Champs indexés (rapports stockés : 'report_id', 'received_date')
+        """
+        self.directory = Path(directory)
+        self.id_field = id_field
+        self.date_field = date_field
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.block_records = block_records
+        self.segment_records = segment_records
+        if codec is None:
+            codec = 'zstd' if zstandard is not None else 'gzip'
+        if codec == 'zstd' and zstandard is None:
+            raise ValueError("Le codec zstd nécessite le module zstandard")
+        self.ext = ZSTD_EXT if codec == 'zstd' else GZIP_EXT
+        self._lock = threading.Lock()
+        self._data = None
+        self._index = None
+        self._path: Optional[Path] = None
+        self._segment_count = 0
+        self._pending: List[Tuple[bytes, int, int]] = []
+        self.written = 0
+
+    def _open_segment(self) -> None:
+        existing = [int(p.name[4:10]) for p in self.directory.glob('raw-*.idx')]
+        seq = max(existing, default=0) + 1
+        self._path = self.directory / f'raw-{seq:06d}{self.ext}'
+        # L'index est créé en premier : le numéro de segment est réservé
+        self._index = open(self._path.with_name(f'raw-{seq:06d}.idx'), 'xb')
+        self._data = open(self._path, 'ab')
+        self._segment_count = 0
+
+    def _close_segment(self) -> None:
+        if self._data is not None:
+            self._data.close()
+            self._index.close()
+            self._data = self._index = None
+
+    def _write_block(self) -> Optional[str]:
+        """Écrit le bloc en cours ; renvoie le chemin du segment écrit (None si rien à écrire)."""
+        if not self._pending:
+            return None
+        if self._data is None:
+            self._open_segment()
+        block = _compress(b'\n'.join(line for line, _, _ in self._pending) + b'\n', self.ext)
+        offset = self._data.tell()
+        self._data.write(block)
+        self._data.flush()
+        entries = np.zeros(len(self._pending), dtype=INDEX_DTYPE)
+        entries['key'] = [key for _, key, _ in self._pending]
+        entries['date'] = [date for _, _, date in self._pending]
+        entries['offset'] = offset
+        entries['length'] = len(block)
+        entries['line'] = np.arange(len(self._pending))
+        # Les entrées d'index sont écrites après le bloc : un lecteur ne voit que des blocs complets
+        self._index.write(entries.tobytes())
+        self._index.flush()
+        self._segment_count += len(self._pending)
+        self._pending = []
+        path = str(self._path)
+        if self._segment_count >= self.segment_records:
+            self._close_segment()
+        return path
+
+    def _append(self, report: Dict[str, Any]) -> Optional[str]:
+        self._pending.append((
+            schemas.dumps(report),
+            report_key(report.get(self.id_field)),
+            date_key(report.get(self.date_field))
+        ))
+        self.written += 1
+        if len(self._pending) >= self.block_records:
+            return self._write_block()
+        return None
+
+    def add(self, report: Dict[str, Any]) -> None:
+        with self._lock:
+            self._append(report)
+
+    def add_many(self, reports: Iterable[Dict[str, Any]], flush: bool = True) -> int:
+        count = 0
+        for report in reports:
+            self.add(report)
+            count += 1
+        if flush:
+            self.flush()
+        return count
+
+    def write_batch(self, reports: Iterable[Dict[str, Any]]) -> List[str]:
+        """
+        Ajoute et écrit un lot de rapports sous un seul verrou.
+
+        Returns:
+            Segments dans lesquels le lot a été écrit (plusieurs si un segment
+            a été fermé en cours de lot), dans l'ordre d'écriture
+        """
+        segments: List[str] = []
+        with self._lock:
+            for report in reports:
+                path = self._append(report)
+                if path is not None and path not in segments:
+                    segments.append(path)
+            path = self._write_block()
+            if path is not None and path not in segments:
+                segments.append(path)
+        return segments
+
+    def flush(self) -> None:
+        """Écrit le bloc en cours (même incomplet)."""
+        with self._lock:
+            self._write_block()
+
+    @property
+    def current_segment(self) -> Optional[str]:
+        return str(self._path) if self._path is not None else None
+
+    def close(self) -> None:
+        with self._lock:
+            self._write_block()
+            self._close_segment()
+
+    def import_json(self, path: str) -> int:
+        """Importe un ancien fichier de `save_raw_data` (tableau JSON de rapports)."""
+        with open(path, encoding='utf-8') as f:
+            return self.add_many(json.load(f))
+
+
+class RawArchive:
+    """
+    Lecteur de l'archive : accès direct par safetyreportid et parcours par dates.
+
+    Les index des segments sont mappés en mémoire (`np.memmap`) ; les recherches
+    sont vectorisées sur l'index et seuls les blocs utiles sont décompressés.
+    L'accès par identifiant passe par un index global des clés trié (construit
+    au premier appel de `get`, après chaque `refresh`) : recherche dichotomique
+    au lieu d'un parcours des index de segments.
+    """
+
+    def __init__(self, directory: str = "data/raw", block_cache: int = 32, id_field: str = 'safetyreportid'):
+        self.directory = Path(directory)
+        self.id_field = id_field
+        self.block_cache = block_cache
+        self._blocks: 'OrderedDict[Tuple[int, int], List[bytes]]' = OrderedDict()
+        self.segments: List[Tuple[Path, np.ndarray]] = []
+        self._keys: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Recharge la liste des segments (et la taille de leurs index)."""
+        segments = []
+        for idx_path in sorted(self.directory.glob('raw-*.idx')):
+            data_path = next((idx_path.with_name(idx_path.stem + ext) for ext in (ZSTD_EXT, GZIP_EXT)
+                              if idx_path.with_name(idx_path.stem + ext).exists()), None)
+            count = idx_path.stat().st_size // INDEX_DTYPE.itemsize
+            if data_path is None or count == 0:
+                continue
+            segments.append((data_path, np.memmap(idx_path, dtype=INDEX_DTYPE, mode='r', shape=(count,))))
+        self.segments = segments
+        self._keys = None
+        self._blocks.clear()
+
+    def __len__(self) -> int:
+        return sum(len(index) for _, index in self.segments)
+
+    def _block(self, segment: int, offset: int, length: int) -> List[bytes]:
+        cache_key = (segment, offset)
+        lines = self._blocks.get(cache_key)
+        if lines is not None:
+            self._blocks.move_to_end(cache_key)
+            return lines
+        path = self.segments[segment][0]
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            lines = _decompress(f.read(length), _segment_ext(path)).splitlines()
+        self._blocks[cache_key] = lines
+        if len(self._blocks) > self.block_cache:
+            self._blocks.popitem(last=False)
+        return lines
+
+    def _read(self, segment: int, entry) -> Dict[str, Any]:
+        lines = self._block(segment, int(entry['offset']), int(entry['length']))
+        return schemas.loads(lines[int(entry['line'])])
+
+    def _key_index(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Clés de tous les segments triées, avec leur segment et leur position d'origine."""
+        if self._keys is None:
+            if not self.segments:
+                empty = np.zeros(0, dtype='<u8')
+                self._keys = (empty, empty.astype(np.int64), empty.astype(np.int64))
+            else:
+                keys = np.concatenate([index['key'] for _, index in self.segments])
+                segments = np.concatenate([np.full(len(index), i, dtype=np.int64)
+                                           for i, (_, index) in enumerate(self.segments)])
+                positions = np.concatenate([np.arange(len(index), dtype=np.int64) for _, index in self.segments])
+                # Tri stable : à clé égale, l'ordre d'écriture est conservé
+                order = np.argsort(keys, kind='stable')
+                self._keys = (keys[order], segments[order], positions[order])
+        return self._keys
+
+    def get(self, report_id: str) -> Optional[Dict[str, Any]]:
+        """Dernière version archivée d'un rapport (None si absent)."""
+        key = np.uint64(report_key(report_id))
+        keys, segments, positions = self._key_index()
+        low = int(np.searchsorted(keys, key, side='left'))
+        high = int(np.searchsorted(keys, key, side='right'))
+        # Du plus récent au plus ancien ; collisions de hachage écartées à la lecture
+        for i in range(high - 1, low - 1, -1):
+            segment = int(segments[i])
+            report = self._read(segment, self.segments[segment][1][positions[i]])
+            if str(report.get(self.id_field)) == str(report_id):
+                return report
+        return None
+
+    def iter_range(self, start_date: Optional[str] = None,
+                   end_date: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Parcourt les rapports reçus entre deux dates (incluses), segment par segment.
+
+        Chaque bloc est décompressé au plus une fois ; sans bornes, toute
+        l'archive est parcourue dans l'ordre d'écriture.
+        """
+        low = date_key(start_date) if start_date else 0
+        high = date_key(end_date) if end_date else 99999999
+        for segment, (path, index) in enumerate(self.segments):
+            selected = np.flatnonzero((index['date'] >= low) & (index['date'] <= high))
+            if not len(selected):
+                continue
+            ext = _segment_ext(path)
+            with open(path, 'rb') as f:
+                current, lines = None, None
+                for position in selected:
+                    entry = index[position]
+                    offset = int(entry['offset'])
+                    if offset != current:
+                        f.seek(offset)
+                        lines = _decompress(f.read(int(entry['length'])), ext).splitlines()
+                        current = offset
+                    yield schemas.loads(lines[int(entry['line'])])
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return self.iter_range()
+
+    def date_counts(self) -> Dict[int, int]:
+        """Nombre de rapports archivés par date de réception (à partir des index seuls)."""
+        if not self.segments:
+            return {}
+        dates = np.concatenate([index['date'] for _, index in self.segments])
+        values, counts = np.unique(dates, return_counts=True)
+        return dict(zip(values.tolist(), counts.tolist()))
+
+
+_writer: Optional[RawArchiveWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_raw_archive_writer() -> RawArchiveWriter:
+    """Écrivain partagé du processus, dans `RAW_ARCHIVE_DIR` (ou data/raw)."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = RawArchiveWriter(os.getenv('RAW_ARCHIVE_DIR', 'data/raw'))
+        return _writer
+
+
+def main():
+    """Import des anciens fichiers JSON et statistiques de l'archive."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Archive des rapports bruts openFDA")
+    parser.add_argument('--dir', default='data/raw', help="Répertoire de l'archive")
+    sub = parser.add_subparsers(dest='command', required=True)
+    imp = sub.add_parser('import', help="Importe des fichiers JSON de save_raw_data")
+    imp.add_argument('files', nargs='+')
+    sub.add_parser('stats', help="Affiche le contenu de l'archive")
+    args = parser.parse_args()
+
+    if args.command == 'import':
+        writer = RawArchiveWriter(args.dir)
+        for path in args.files:
+            print(f"📥 {path}: {writer.import_json(path)} rapports")
+        writer.close()
+    archive = RawArchive(args.dir)
+    size = sum(path.stat().st_size for path, _ in archive.segments)
+    print(f"📦 {len(archive)} rapports dans {len(archive.segments)} segment(s), {size / 1e6:.1f} Mo")
+
+
+if __name__ == '__main__':
+    main()
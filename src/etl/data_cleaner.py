@@ -1,6 +1,8 @@
 from datetime import datetime
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Iterable
 from ..models.report import AdverseEventReport, Patient, Drug, Reaction
+from .normalize import drug_normalizer
+from .validation import BatchValidator, ValidationResult
 
 class DataCleaner:
     @staticmethod
@@ -15,7 +17,7 @@ class DataCleaner:
 
         return Patient(
             age=age,
-            age_unit=patient_data.get('patientonsetageunit', '').lower() or None,
+            age_unit=(patient_data.get('patientonsetageunit') or '').lower() or None,
             sex={'1': 'Male', '2': 'Female'}.get(str(patient_data.get('patientsex')), 'Unknown'),
             weight=float(patient_data.get('patientweight')) if patient_data.get('patientweight') else None
         )
@@ -24,11 +26,14 @@ class DataCleaner:
     def clean_drug_data(drug_data: Dict[str, Any]) -> Drug:
         """Nettoie et valide les données d'un médicament."""
         return Drug(
-            name=drug_data.get('medicinalproduct', 'Inconnu').strip(),
-            active_igredients=drug_data.get('active_ingredients', []),
-            dosage_form=drug_data.get('drugdosageform', '').strip() or None,
+            name=(drug_data.get('medicinalproduct') or 'Inconnu').strip(),
+            active_ingredients=(drug_data.get('openfda') or {}).get('substance_name', []),
+            dosage_form=(drug_data.get('drugdosageform') or '').strip() or None,
             start_date=DataCleaner._parse_date(drug_data.get('drugstartdate')),
-            end_date=DataCleaner._parse_date(drug_data.get('drugenddate'))
+            end_date=DataCleaner._parse_date(drug_data.get('drugenddate')),
+            normalized_name=drug_normalizer.normalize(
+                drug_data.get('medicinalproduct'), drug_data.get('openfda')
+            )
         )
 
     @staticmethod
@@ -54,11 +59,32 @@ class DataCleaner:
             'drugs': [DataCleaner.clean_drug_data(drug) for drug in patient_data.get('drug', [])],
             'reactions': [
                 Reaction(
-                    term=reaction.get('reactionmeddrapt', 'Inconnue').strip(),
-                    outcome=reaction.get('reactionoutcome', '').strip() or None
+                    term=(reaction.get('reactionmeddrapt') or 'Inconnue').strip(),
+                    outcome=(reaction.get('reactionoutcome') or '').strip() or None
                 )
                 for reaction in patient_data.get('reaction', [])
             ],
             'source': 'openfda',
             'processed_at': datetime.utcnow().isoformat()
-        }
\ No newline at end of file
+        }
+
+    @staticmethod
+    def clean_batch(reports: Iterable[Dict[str, Any]],
+                    validator: Optional[BatchValidator] = None) -> ValidationResult:
+        """
+        Valide puis nettoie un lot de rapports bruts sans jamais lever d'exception.
+        
+        Les rapports invalides (ou dont le nettoyage échoue) sont placés dans
+        `quarantined` avec la cause ; `valid` contient les rapports nettoyés.
+        """
+        validator = validator or BatchValidator()
+        result = validator.validate(reports)
+        cleaned = []
+        for report in result.valid:
+            try:
+                cleaned.append(DataCleaner.clean_report(report))
+            except Exception as e:
+                result.errors[f"<clean>:{type(e).__name__}"] += 1
+                result.quarantined.append({'report': report, 'errors': [f"<clean>:{e}"]})
+        result.valid = cleaned
+        return result
@@ -0,0 +1,156 @@
+import hashlib
+import random
+from collections import defaultdict
+from typing import Dict, Any, List, Set, Tuple
+
+_MASK64 = (1 << 64) - 1
+
+
+def _hash_token(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'little')
+
+
+def report_tokens(report: Dict[str, Any]) -> Set[str]:
+    """
+    Caractéristiques d'un rapport transformé utilisées pour la comparaison :
+    âge/sexe du patient, ensemble des médicaments, ensemble des réactions et dates.
+    """
+    tokens = set()
+    patient = report.get('patient') or {}
+    if patient.get('age') is not None:
+        tokens.add(f"age:{patient.get('age')}{patient.get('age_unit') or ''}")
+    if patient.get('sex') is not None:
+        tokens.add(f"sex:{patient.get('sex')}")
+    for drug in report.get('drugs') or []:
+        name = drug.get('normalized_name') or drug.get('name')
+        if name:
+            tokens.add(f"drug:{name.upper()}")
+        if drug.get('start_date'):
+            tokens.add(f"start:{drug['start_date']}")
+    for reaction in report.get('reactions') or []:
+        if reaction.get('term'):
+            tokens.add(f"rx:{reaction['term'].upper()}")
+    for field in ('received_date', 'receipt_date'):
+        if report.get(field):
+            tokens.add(f"date:{report[field]}")
+    return tokens
+
+
+def _version_key(report: Dict[str, Any]) -> Tuple:
+    """Clé d'ordre : la version la plus récente d'un cas a la clé la plus grande."""
+    try:
+        version = int(report.get('report_version') or 0)
+    except (TypeError, ValueError):
+        version = 0
+    return (version, report.get('receipt_date') or '', report.get('received_date') or '')
+
+
+class Deduplicator:
+    """
+    Consolide les versions de suivi et les quasi-doublons de rapports.
+
+    1. Les rapports partageant un `report_id` sont réduits à leur dernière version.
+    2. Les rapports restants reçoivent une signature MinHash ; le découpage en
+       bandes (LSH) ne propose comme candidats que les rapports partageant une
+       bande, ce qui évite la comparaison de toutes les paires.
+    3. Les candidats dont la similarité de Jaccard dépasse `threshold` sont
+       regroupés et seule la version la plus récente de chaque groupe est gardée.
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, threshold: float = 0.8,
+                 min_tokens: int = 4, max_bucket: int = 50, seed: int = 42):
+        if num_perm % bands:
+            raise ValueError("num_perm doit être un multiple de bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.min_tokens = min_tokens
+        self.max_bucket = max_bucket
+        rng = random.Random(seed)
+        # Permutations affines modulo 2^64 (a impair) : moins coûteuses qu'un
+        # modulo premier, et suffisantes pour un blocage dont les candidats sont
+        # ensuite vérifiés par Jaccard exact
+        self._perms = [(rng.getrandbits(64) | 1, rng.getrandbits(64)) for _ in range(num_perm)]
+        self.stats: Dict[str, int] = {}
+
+    def signature(self, tokens: Set[str]) -> List[int]:
+        """Calcule la signature MinHash d'un ensemble de caractéristiques."""
+        hashes = [_hash_token(t) for t in tokens]
+        return [min((a * h + b) & _MASK64 for h in hashes) for a, b in self._perms]
+
+    @staticmethod
+    def latest_versions(reports: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Garde la dernière version de chaque `report_id`."""
+        latest: Dict[Any, Dict[str, Any]] = {}
+        without_id = []
+        for report in reports:
+            report_id = report.get('report_id')
+            if not report_id:
+                without_id.append(report)
+                continue
+            current = latest.get(report_id)
+            if current is None or _version_key(report) >= _version_key(current):
+                latest[report_id] = report
+        return list(latest.values()) + without_id
+
+    def deduplicate(self, reports: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Retourne les rapports consolidés (un par cas).
+
+        Args:
+            reports: Rapports au format de `Transformer.transform_report`
+
+        Returns:
+            Liste des rapports retenus ; `self.stats` décrit les suppressions
+        """
+        unique = self.latest_versions(reports)
+        token_sets = [report_tokens(r) for r in unique]
+
+        parent = list(range(len(unique)))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        buckets: Dict[Tuple, List[int]] = defaultdict(list)
+        compared = 0
+        for i, tokens in enumerate(token_sets):
+            # Les rapports trop pauvres en informations ne sont jamais fusionnés
+            if len(tokens) < self.min_tokens:
+                continue
+            sig = self.signature(tokens)
+            checked = set()
+            for band in range(self.bands):
+                key = (band, tuple(sig[band * self.rows:(band + 1) * self.rows]))
+                bucket = buckets[key]
+                for j in bucket:
+                    if j in checked:
+                        continue
+                    checked.add(j)
+                    compared += 1
+                    other = token_sets[j]
+                    jaccard = len(tokens & other) / len(tokens | other)
+                    if jaccard >= self.threshold:
+                        parent[find(i)] = find(j)
+                if len(bucket) < self.max_bucket:
+                    bucket.append(i)
+
+        groups: Dict[int, int] = {}
+        for i in range(len(unique)):
+            root = find(i)
+            best = groups.get(root)
+            if best is None or _version_key(unique[i]) >= _version_key(unique[best]):
+                groups[root] = i
+
+        kept = [unique[i] for i in sorted(groups.values())]
+        self.stats = {
+            'input': len(reports),
+            'follow_ups_removed': len(reports) - len(unique),
+            'near_duplicates_removed': len(unique) - len(kept),
+            'pairs_compared': compared,
+            'output': len(kept)
+        }
+        return kept
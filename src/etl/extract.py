@@ -1,33 +1,36 @@
 from typing import List, Dict, Optional
-from datetime import datetime
-import json
-from pathlib import Path
 from ..api.fda_client import FDAClient
+from ..api.projection import FieldSet, TRANSFORM_FIELDS
 
 class Extractor:
-    def __init__(self):
-        self.client = FDAClient()
+    def __init__(self, client: Optional[FDAClient] = None, fields: Optional[FieldSet] = TRANSFORM_FIELDS):
+        """
+        Args:
+            client: Client openFDA (par défaut, un nouveau client)
+            fields: Champs conservés dès le décodage de chaque rapport (None : documents
+                complets, nécessaires pour archiver les données brutes)
+        """
+        self.client = client if client is not None else FDAClient()
+        self.fields = fields
         
-    def extract_drug_reports(self, drug_name: str, limit: int = 100) -> List[Dict]:
-        """Extrait les rapports pour un médicament donné."""
+    def extract_drug_reports(self, drug_name: str, limit: int = 100, start_date: Optional[str] = None,
+                             end_date: Optional[str] = None) -> List[Dict]:
+        """Extrait les rapports pour un médicament donné (optionnellement sur une période)."""
         print(f"🔍 Extraction des rapports pour {drug_name}...")
-        reports = self.client.get_drug_reports(drug_name, limit)
+        reports = self.client.get_drug_reports(drug_name, limit, start_date, end_date, fields=self.fields)
         print(f"✅ {len(reports)} rapports extraits avec succès")
         return reports
     
-    def save_raw_data(self, data: List[Dict], drug_name: str) -> str:
-        """Sauvegarde les données brutes dans un fichier JSON."""
-        # Créer le dossier s'il n'existe pas
-        raw_dir = Path("data/raw")
-        raw_dir.mkdir(parents=True, exist_ok=True)
+    def save_raw_data(self, data: List[Dict], drug_name: str) -> Optional[str]:
+        """
+        Ajoute les données brutes à l'archive compressée (voir `etl.archive`).
         
-        # Générer un nom de fichier avec horodatage
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = raw_dir / f"{drug_name.lower()}_raw_{timestamp}.json"
+        Returns:
+            Chemin du dernier segment d'archive écrit (le lot peut en couvrir
+            plusieurs), None si `data` est vide
+        """
+        from .archive import get_raw_archive_writer
         
-        # Sauvegarder les données
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-            
-        print(f"💾 Données brutes sauvegardées dans {filename}")
-        return str(filename)
\ No newline at end of file
+        segments = get_raw_archive_writer().write_batch(data)
+        print(f"💾 {len(data)} rapports bruts ({drug_name}) archivés dans {', '.join(segments) or '-'}")
+        return segments[-1] if segments else None
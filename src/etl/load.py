@@ -1,30 +1,119 @@
-from typing import List, Dict
-from pymongo import MongoClient
-from pymongo.errors import PyMongoError
+from typing import List, Dict, Optional
 import os
-from dotenv import load_dotenv
 from pathlib import Path
 
+from ..database.mongodb import DEFAULT_COLLECTION, DEFAULT_DATABASE
+
 class MongoDBLoader:
-    def __init__(self):
+    def __init__(self, mongo_uri: Optional[str] = None, db_name: Optional[str] = None,
+                 collection: str = DEFAULT_COLLECTION, partitioned: Optional[bool] = None):
+        """
+        Args:
+            mongo_uri: URI de connexion (par défaut MONGO_URI)
+            db_name: Base de données (par défaut DATABASE_NAME)
+            collection: Collection des rapports (nom de base des partitions en mode partitionné)
+            partitioned: Une collection par année de réception (`<collection>_YYYY`, voir
+                `src.database.partitions`) ; par défaut selon REPORTS_PARTITIONED
+        """
+        from dotenv import load_dotenv
+        from pymongo import MongoClient
+        from ..database.vocabulary import Vocabulary
+        
         # Charger les variables d'environnement
         load_dotenv(Path(__file__).parent.parent.parent / '.env')
         
         # Connexion à MongoDB
-        self.client = MongoClient(os.getenv("MONGO_URI"))
-        self.db = self.client[os.getenv("DATABASE_NAME", "eim_platform")]
-        self.collection = self.db['adverse_events']
+        self.client = MongoClient(mongo_uri or os.getenv("MONGO_URI"))
+        self.db = self.client[db_name or os.getenv("DATABASE_NAME", DEFAULT_DATABASE)]
+        self.collection_name = collection
+        self.collection = self.db[collection]
+        if partitioned is None:
+            partitioned = os.getenv('REPORTS_PARTITIONED', '').lower() in ('1', 'true', 'yes')
+        self.partitioned = partitioned
+        # Partitions dont les index et l'entrée du registre sont déjà prêts
+        self._partitions = set()
+        
+        # Vocabulaires partagés avec MongoDBClient (cache en mémoire par loader)
+        self.drug_vocab = Vocabulary(self.db['drug_vocab'], self.db['counters'])
+        self.reaction_vocab = Vocabulary(self.db['reaction_vocab'], self.db['counters'])
+        self._indexes_ready = False
+        
+    def _ensure_indexes(self):
+        """Crée les index des vocabulaires, de report_id et des tableaux d'IDs (une seule fois)."""
+        from pymongo.errors import OperationFailure
+        
+        if self._indexes_ready:
+            return
+        self.drug_vocab.ensure_indexes()
+        self.reaction_vocab.ensure_indexes()
+        if self.partitioned:
+            # Index créés par partition, à sa première écriture (`_partition`)
+            self._indexes_ready = True
+            return
+        try:
+            self.collection.create_index("report_id", unique=True)
+        except OperationFailure as e:
+            # Collection remplie avant l'index : les doublons existants doivent être retirés
+            print(f"⚠️ Index unique sur report_id impossible ({e}) ; "
+                  f"les rechargements peuvent créer des doublons")
+        self.collection.create_index("drug_ids")
+        self.collection.create_index("reaction_ids")
+        self._indexes_ready = True
+    
+    def _partition(self, name: str):
+        from ..database.partitions import ensure_partition
+        
+        if name not in self._partitions:
+            ensure_partition(self.db, name)
+            self._partitions.add(name)
+        return self.db[name]
+    
+    @staticmethod
+    def _insert(collection, data: List[Dict]) -> int:
+        from pymongo.errors import BulkWriteError
+        
+        try:
+            return len(collection.insert_many(data, ordered=False).inserted_ids)
+        except BulkWriteError as e:
+            if any(err.get('code') != 11000 for err in e.details.get('writeErrors', [])):
+                raise
+            return e.details.get('nInserted', 0)
+        
+    def insert_batch(self, data: List[Dict]) -> int:
+        """
+        Insère un lot et retourne le nombre de documents insérés ; lève PyMongoError en cas d'échec.
+        
+        Un lot peut être réessayé ou rejoué tel quel (spool relu après un arrêt
+        brutal) : les rapports dont le `report_id` est déjà stocké (index unique)
+        sont ignorés et ne sont pas recomptés.
+        
+        En mode partitionné, le lot est réparti par année de réception, comme
+        les écritures de `MongoDBClient`.
+        """
+        from ..database.partitions import split_by_partition
+        from ..database.vocabulary import encode_reports
+        
+        if not data:
+            return 0
+        self._ensure_indexes()
+        encode_reports(data, self.drug_vocab, self.reaction_vocab)
+        if not self.partitioned:
+            return self._insert(self.collection, data)
+        return sum(self._insert(self._partition(name), reports)
+                   for name, reports in split_by_partition(data, self.collection_name).items())
         
     def load_data(self, data: List[Dict]) -> int:
         """Charge les données transformées dans MongoDB."""
+        from pymongo.errors import PyMongoError
+        
         if not data:
             print("⚠️ Aucune donnée à charger")
             return 0
             
         try:
-            result = self.collection.insert_many(data)
-            print(f"✅ {len(result.inserted_ids)} documents insérés avec succès")
-            return len(result.inserted_ids)
+            inserted = self.insert_batch(data)
+            print(f"✅ {inserted} documents insérés avec succès")
+            return inserted
         except PyMongoError as e:
             print(f"❌ Erreur lors du chargement dans MongoDB: {str(e)}")
             return 0
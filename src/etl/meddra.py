@@ -0,0 +1,172 @@
+import csv
+import os
+from array import array
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Iterable
+
+# Niveaux de la hiérarchie MedDRA, du plus fin au plus général
+LEVELS = ('pt', 'hlt', 'hlgt', 'soc')
+
+DEFAULT_HIERARCHY_PATH = Path(__file__).parent.parent.parent / 'data' / 'reference' / 'meddra_hierarchy.csv'
+
+
+class MeddraHierarchy:
+    """
+    Dictionnaire des termes de réaction (PT) et de leur hiérarchie HLT/HLGT/SOC.
+
+    Chaque terme est codé par un entier dense (sa position dans `names[level]`) et
+    les liens PT -> HLT -> HLGT -> SOC sont stockés dans des tableaux d'entiers
+    compacts, de sorte qu'un regroupement hiérarchique se résume à une indexation.
+    Le code -1 signifie « inconnu ».
+    """
+
+    def __init__(self):
+        self.names: Dict[str, List[str]] = {level: [] for level in LEVELS}
+        self._codes: Dict[str, Dict[str, int]] = {level: {} for level in LEVELS}
+        self.pt_to_hlt = array('i')
+        self.hlt_to_hlgt = array('i')
+        self.hlgt_to_soc = array('i')
+        # Raccourci PT -> SOC précalculé (la requête la plus fréquente)
+        self.pt_to_soc = array('i')
+
+    def __len__(self) -> int:
+        return len(self.names['pt'])
+
+    @staticmethod
+    def _key(term: Optional[str]) -> str:
+        return ' '.join(term.upper().split()) if term else ''
+
+    def _code(self, level: str, name: Optional[str]) -> int:
+        """Retourne le code d'un terme, en le créant si nécessaire (-1 si vide)."""
+        key = self._key(name)
+        if not key:
+            return -1
+        codes = self._codes[level]
+        code = codes.get(key)
+        if code is None:
+            code = len(self.names[level])
+            codes[key] = code
+            self.names[level].append(name.strip())
+            if level == 'pt':
+                self.pt_to_hlt.append(-1)
+                self.pt_to_soc.append(-1)
+            elif level == 'hlt':
+                self.hlt_to_hlgt.append(-1)
+            elif level == 'hlgt':
+                self.hlgt_to_soc.append(-1)
+        return code
+
+    def add(self, pt: str, hlt: Optional[str] = None, hlgt: Optional[str] = None,
+            soc: Optional[str] = None, primary: bool = False) -> None:
+        """
+        Ajoute un chemin PT -> HLT -> HLGT -> SOC.
+
+        Un PT rattaché à plusieurs SOC garde le chemin primaire (ou le premier lu
+        si aucun chemin n'est marqué primaire).
+        """
+        pt_code = self._code('pt', pt)
+        if pt_code < 0:
+            return
+        hlt_code = self._code('hlt', hlt)
+        hlgt_code = self._code('hlgt', hlgt)
+        soc_code = self._code('soc', soc)
+        if self.pt_to_hlt[pt_code] < 0 or primary:
+            self.pt_to_hlt[pt_code] = hlt_code
+            self.pt_to_soc[pt_code] = soc_code
+        if hlt_code >= 0 and self.hlt_to_hlgt[hlt_code] < 0:
+            self.hlt_to_hlgt[hlt_code] = hlgt_code
+        if hlgt_code >= 0 and self.hlgt_to_soc[hlgt_code] < 0:
+            self.hlgt_to_soc[hlgt_code] = soc_code
+
+    @classmethod
+    def from_file(cls, path: str) -> 'MeddraHierarchy':
+        """
+        Charge une hiérarchie depuis un fichier CSV.
+
+        Colonnes attendues : `pt`, `hlt`, `hlgt`, `soc` et, facultativement,
+        `primary` (Y/N) pour désigner le SOC primaire d'un PT multi-axial.
+        """
+        hierarchy = cls()
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                # Sans colonne `primary`, le premier chemin lu d'un PT est conservé
+                primary = (row.get('primary') or '').strip().upper() in ('Y', 'YES', '1', 'TRUE')
+                hierarchy.add(row.get('pt'), row.get('hlt'), row.get('hlgt'), row.get('soc'), primary)
+        return hierarchy
+
+    def pt_code(self, term: Optional[str]) -> int:
+        """Retourne le code d'un PT (-1 s'il est inconnu)."""
+        return self._codes['pt'].get(self._key(term), -1)
+
+    def name(self, level: str, code: int) -> Optional[str]:
+        """Retourne le libellé d'un code à un niveau donné."""
+        if code < 0:
+            return None
+        return self.names[level][code]
+
+    def rollup(self, pt_codes: Iterable[int], level: str = 'soc') -> List[int]:
+        """
+        Remonte une liste de codes PT au niveau demandé.
+
+        Args:
+            pt_codes: Codes PT (les valeurs -1 restent -1)
+            level: Niveau cible ('pt', 'hlt', 'hlgt' ou 'soc')
+
+        Returns:
+            Les codes au niveau cible, dans le même ordre
+        """
+        if level == 'pt':
+            return list(pt_codes)
+        if level == 'soc':
+            table = self.pt_to_soc
+            return [table[c] if c >= 0 else -1 for c in pt_codes]
+        hlt = [self.pt_to_hlt[c] if c >= 0 else -1 for c in pt_codes]
+        if level == 'hlt':
+            return hlt
+        if level == 'hlgt':
+            return [self.hlt_to_hlgt[c] if c >= 0 else -1 for c in hlt]
+        raise ValueError(f"Niveau MedDRA inconnu: {level}")
+
+    def annotate(self, term: Optional[str]) -> Dict[str, Any]:
+        """
+        Retourne les codes et libellés hiérarchiques d'un terme de réaction.
+
+        Seuls les niveaux connus sont retournés : un terme absent de la
+        hiérarchie donne un dictionnaire vide (aucune clé à None stockée).
+        """
+        pt = self.pt_code(term)
+        if pt < 0:
+            return {}
+        annotation: Dict[str, Any] = {'pt_code': pt}
+        hlt = self.pt_to_hlt[pt]
+        if hlt >= 0:
+            annotation['hlt_code'] = hlt
+            annotation['hlt'] = self.name('hlt', hlt)
+        soc = self.pt_to_soc[pt]
+        if soc >= 0:
+            annotation['soc_code'] = soc
+            annotation['soc'] = self.name('soc', soc)
+        return annotation
+
+
+_hierarchy: Optional[MeddraHierarchy] = None
+
+
+def get_meddra_hierarchy() -> MeddraHierarchy:
+    """
+    Retourne la hiérarchie partagée, chargée au premier appel.
+
+    Le fichier est lu depuis `MEDDRA_HIERARCHY_PATH` (ou data/reference/meddra_hierarchy.csv) ;
+    en son absence, une hiérarchie vide est utilisée et les codes restent à None.
+    """
+    global _hierarchy
+    if _hierarchy is None:
+        path = Path(os.getenv('MEDDRA_HIERARCHY_PATH', DEFAULT_HIERARCHY_PATH))
+        _hierarchy = MeddraHierarchy.from_file(str(path)) if path.exists() else MeddraHierarchy()
+    return _hierarchy
+
+
+def set_meddra_hierarchy(hierarchy: Optional[MeddraHierarchy]) -> None:
+    """Remplace la hiérarchie partagée (None force un rechargement au prochain appel)."""
+    global _hierarchy
+    _hierarchy = hierarchy
@@ -0,0 +1,241 @@
+import csv
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+from ..api.cache import TTLCache
+
+# Vocabulaire appris, rechargé au démarrage du pipeline : les noms normalisés
+# stockés ne dépendent pas de l'ordre d'ingestion d'une exécution à l'autre
+DEFAULT_VOCABULARY_PATH = 'data/drug_vocabulary.csv'
+
+# Jetons de dosage et de forme galénique retirés avant comparaison
+# ("IBUPROFEN 200MG TABLETS" -> "IBUPROFEN")
+_DOSAGE_RE = re.compile(r"\b\d+(?:[.,]\d+)?\s*(?:MG|G|MCG|UG|ML|L|IU|UI|UNITS?|%)(?:/\w+)?\b")
+_FORM_WORDS = {
+    'TABLET', 'TABLETS', 'TAB', 'TABS', 'CAPSULE', 'CAPSULES', 'CAP', 'CAPS',
+    'ORAL', 'INJECTION', 'INJECTABLE', 'SOLUTION', 'SUSPENSION', 'SYRUP',
+    'CREAM', 'GEL', 'OINTMENT', 'PATCH', 'SPRAY', 'DROPS', 'POWDER',
+    'FILM', 'COATED', 'CHEWABLE', 'EXTENDED', 'DELAYED', 'RELEASE',
+    'ER', 'XR', 'SR', 'CR', 'DR', 'IR', 'ODT', 'FORTE', 'GENERIC',
+}
+_PUNCT_RE = re.compile(r"[^A-Z0-9 ]+")
+_SPACES_RE = re.compile(r"\s+")
+
+
+def clean_product_name(name: Optional[str]) -> str:
+    """Réduit un nom de produit à une clé comparable (majuscules, sans dosage ni forme)."""
+    if not name or not isinstance(name, str):
+        return ''
+    text = _DOSAGE_RE.sub(' ', name.upper())
+    text = _PUNCT_RE.sub(' ', text)
+    words = [w for w in text.split() if w not in _FORM_WORDS and not w.isdigit()]
+    return _SPACES_RE.sub(' ', ' '.join(words)).strip()
+
+
+def trigrams(text: str) -> Set[str]:
+    """Retourne l'ensemble des trigrammes d'un texte (avec bornes de mot)."""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """Index inversé trigramme -> clés, pour la recherche approximative."""
+
+    def __init__(self):
+        self._keys: List[str] = []
+        self._key_ids: Dict[str, int] = {}
+        self._sizes: List[int] = []
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, key: str) -> None:
+        """Ajoute une clé à l'index (sans effet si elle existe déjà)."""
+        if not key or key in self._key_ids:
+            return
+        key_id = len(self._keys)
+        grams = trigrams(key)
+        self._keys.append(key)
+        self._key_ids[key] = key_id
+        self._sizes.append(len(grams))
+        for gram in grams:
+            self._postings[gram].append(key_id)
+
+    def best_match(self, text: str, min_score: float = 0.6) -> Optional[Tuple[str, float]]:
+        """
+        Retourne la clé la plus proche selon le coefficient de Dice sur les trigrammes.
+
+        Args:
+            text: Texte déjà nettoyé à rechercher
+            min_score: Score minimal (0-1) pour accepter une correspondance
+
+        Returns:
+            Tuple (clé, score) ou None si aucune clé n'atteint le seuil
+        """
+        grams = trigrams(text)
+        if not grams:
+            return None
+        shared = Counter()
+        for gram in grams:
+            postings = self._postings.get(gram)
+            if postings:
+                shared.update(postings)
+        best = None
+        best_score = min_score
+        size = len(grams)
+        for key_id, common in shared.items():
+            score = 2.0 * common / (size + self._sizes[key_id])
+            if score >= best_score:
+                best, best_score = key_id, score
+        if best is None:
+            return None
+        return self._keys[best], best_score
+
+
+class DrugNormalizer:
+    """
+    Associe les noms de produits (texte libre) à leur substance active canonique.
+
+    La résolution suit l'ordre suivant :
+    1. `openfda.substance_name` / `openfda.generic_name` quand ils sont présents
+       (la correspondance est mémorisée pour les rapports suivants) ;
+    2. correspondance exacte sur le nom nettoyé ;
+    3. correspondance approximative via l'index de trigrammes.
+    Les correspondances approximatives sont conservées dans un cache LRU ; un
+    nom sans correspondance est recherché à nouveau quand l'index a grandi.
+    """
+
+    def __init__(self, vocabulary: Optional[Dict[str, str]] = None,
+                 min_score: float = 0.6, cache_size: int = 65536):
+        self.min_score = min_score
+        self._canonical: Dict[str, str] = {}
+        self._index = TrigramIndex()
+        # nom nettoyé -> (clé approchée ou '', taille de l'index lors de la recherche)
+        self._fuzzy = TTLCache(cache_size, ttl=float('inf'))
+        # Les workers du pipeline partagent l'instance globale : l'index et le vocabulaire
+        # sont modifiés (learn) et parcourus (recherche approchée) sous ce verrou
+        self._lock = threading.RLock()
+        for product, ingredient in (vocabulary or {}).items():
+            self.learn(product, ingredient)
+
+    @staticmethod
+    def _read_vocabulary(path: str) -> Dict[str, str]:
+        with open(path, newline='', encoding='utf-8') as f:
+            return {row['product']: row['ingredient'] for row in csv.DictReader(f)}
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> 'DrugNormalizer':
+        """Charge un vocabulaire CSV (colonnes `product`, `ingredient`)."""
+        return cls(cls._read_vocabulary(path), **kwargs)
+
+    def load(self, path: str) -> int:
+        """Ajoute au vocabulaire celui d'un fichier CSV ; retourne le nombre de correspondances lues."""
+        vocabulary = self._read_vocabulary(path)
+        for product, ingredient in vocabulary.items():
+            self.learn(product, ingredient)
+        return len(vocabulary)
+
+    def save(self, path: str) -> str:
+        """Sauvegarde le vocabulaire appris au format CSV (remplacement atomique du fichier)."""
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['product', 'ingredient'])
+            with self._lock:
+                writer.writerows(sorted(self._canonical.items()))
+        os.replace(tmp_path, path)
+        return str(path)
+
+    def __len__(self) -> int:
+        return len(self._canonical)
+
+    def learn(self, product: Optional[str], ingredient: Optional[str]) -> None:
+        """Enregistre une correspondance produit -> substance canonique."""
+        key = clean_product_name(product)
+        canonical = ' '.join(ingredient.upper().split()) if ingredient else ''
+        if not key or not canonical:
+            return
+        with self._lock:
+            current = self._canonical.get(key)
+            # Une substance canonique connue n'est jamais redirigée vers une autre
+            if current == canonical or current == key:
+                return
+            self._canonical[key] = canonical
+            self._canonical.setdefault(canonical, canonical)
+            self._index.add(key)
+            self._index.add(canonical)
+            # Seul le nom appris est retiré du cache : les autres correspondances restent valables
+            self._fuzzy.pop(key)
+
+    @staticmethod
+    def _openfda_ingredient(openfda: Optional[Dict[str, Any]]) -> Optional[str]:
+        """Extrait la substance canonique du bloc `openfda` d'un médicament."""
+        if not openfda:
+            return None
+        names = openfda.get('substance_name') or openfda.get('generic_name')
+        if not names:
+            return None
+        if isinstance(names, str):
+            names = [names]
+        return ' + '.join(sorted({' '.join(n.upper().split()) for n in names if n}))
+
+    def _resolve(self, key: str) -> str:
+        canonical = self._canonical.get(key)
+        if canonical is not None:
+            return canonical
+        cached = self._fuzzy.get(key)
+        if cached is None or (not cached[0] and cached[1] != len(self._index)):
+            with self._lock:
+                match = self._index.best_match(key, self.min_score)
+                cached = (match[0] if match is not None else '', len(self._index))
+            self._fuzzy.set(key, cached)
+        match_key = cached[0]
+        # La substance est relue à chaque appel : une correspondance apprise ensuite est prise en compte
+        return self._canonical.get(match_key, match_key) if match_key else key
+
+    def normalize(self, product: Optional[str],
+                  openfda: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """
+        Retourne le nom canonique d'un produit.
+
+        Args:
+            product: Valeur brute de `medicinalproduct`
+            openfda: Bloc `openfda` du médicament, s'il existe
+
+        Returns:
+            La substance canonique, ou le nom nettoyé si aucune correspondance
+            n'a été trouvée (None si le nom est vide)
+        """
+        ingredient = self._openfda_ingredient(openfda)
+        if ingredient:
+            self.learn(product, ingredient)
+            return ingredient
+        key = clean_product_name(product)
+        if not key:
+            return None
+        return self._resolve(key)
+
+
+# Instance globale partagée par le pipeline ETL
+drug_normalizer = DrugNormalizer()
+
+
+def vocabulary_path() -> str:
+    return os.getenv('DRUG_VOCABULARY', DEFAULT_VOCABULARY_PATH)
+
+
+def load_vocabulary(path: Optional[str] = None) -> int:
+    """Charge le vocabulaire persistant dans `drug_normalizer` (0 s'il n'existe pas encore)."""
+    path = path or vocabulary_path()
+    return drug_normalizer.load(path) if os.path.exists(path) else 0
+
+
+def save_vocabulary(path: Optional[str] = None) -> str:
+    """Sauvegarde le vocabulaire appris par `drug_normalizer` pour les exécutions suivantes."""
+    return drug_normalizer.save(path or vocabulary_path())
@@ -0,0 +1,212 @@
+"""
+Chargement MongoDB réparti sur plusieurs processus.
+
+Les lots reçus par le processus principal sont partitionnés par hachage du
+`report_id` entre N processus ; chacun ouvre sa propre connexion MongoDB et
+accumule un tampon qu'il écrit par `insert_many`. Les acquittements remontent
+au processus principal par une file commune.
+"""
+import logging
+import multiprocessing as mp
+import queue
+import time
+import zlib
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Messages de la file d'acquittement : (type, worker, numéros de lots, valeur)
+ACK = 'ack'
+ERROR = 'error'
+DONE = 'done'
+
+
+def shard_of(report: Dict[str, Any], shards: int) -> int:
+    """Partition stable (identique dans tous les processus) d'un rapport."""
+    return zlib.crc32(str(report.get('report_id')).encode('utf-8')) % shards
+
+
+def _mongo_loader(mongo_uri: Optional[str], db_name: Optional[str]):
+    from .load import MongoDBLoader
+    return MongoDBLoader(mongo_uri, db_name)
+
+
+def _worker(worker_id: int, inbox, acks, loader_factory: Callable, factory_args: tuple,
+            buffer_size: int, max_retries: int) -> None:
+    """Boucle d'un processus de chargement : tampon, insertion, acquittement."""
+    loader = loader_factory(*factory_args)
+    buffer: List[Dict[str, Any]] = []
+    pending: List[int] = []
+
+    def flush():
+        nonlocal buffer, pending
+        if not buffer:
+            return
+        for attempt in range(max_retries + 1):
+            try:
+                inserted = loader.insert_batch(buffer)
+                acks.put((ACK, worker_id, pending, inserted))
+                break
+            except Exception as e:
+                if attempt == max_retries:
+                    acks.put((ERROR, worker_id, pending, f"{len(buffer)} rapports: {e}"))
+                else:
+                    time.sleep(min(2 ** attempt, 30))
+        buffer, pending = [], []
+
+    try:
+        while True:
+            message = inbox.get()
+            if message is None:
+                break
+            seq, records = message
+            buffer.extend(records)
+            pending.append(seq)
+            if len(buffer) >= buffer_size:
+                flush()
+        flush()
+    finally:
+        loader.close()
+        acks.put((DONE, worker_id, [], 0))
+
+
+@dataclass
+class LoadProgress:
+    """Progression agrégée des processus de chargement."""
+    queued: int = 0
+    inserted: int = 0
+    batches_acked: int = 0
+    failed_batches: int = 0
+    errors: List[str] = field(default_factory=list)
+    per_worker: Dict[int, int] = field(default_factory=dict)
+
+
+class ShardedLoader:
+    """
+    Destination utilisable comme `MongoDBLoader` (`load_data`, `close`), répartie
+    sur `workers` processus.
+
+    `load_data` partitionne le lot, le dépose dans les files (bornées : un
+    processus en retard ralentit l'appelant) et retourne aussitôt le nombre de
+    rapports mis en file ; `close` attend la fin des écritures. Le bilan réel
+    (rapports insérés, lots en échec) est donné par `stats`.
+    """
+
+    # `load_data` met en file : les rapports ne sont chargés qu'à la fermeture
+    asynchronous = True
+
+    def __init__(self, workers: int = 4, buffer_size: int = 1000, queue_size: int = 8,
+                 mongo_uri: Optional[str] = None, db_name: Optional[str] = None,
+                 loader_factory: Optional[Callable] = None, max_retries: int = 3):
+        """
+        Args:
+            workers: Nombre de processus de chargement
+            buffer_size: Rapports accumulés par processus avant chaque insert_many
+            queue_size: Lots en attente maximum par processus
+            mongo_uri, db_name: Connexion (par défaut MONGO_URI / DATABASE_NAME)
+            loader_factory: Fonction (importable) créant le chargeur de chaque processus
+            max_retries: Nouvelles tentatives d'insertion avant de déclarer un échec
+        """
+        self.workers = max(1, workers)
+        self.progress = LoadProgress()
+        self._seq = 0
+        # `spawn` : chaque processus démarre sans hériter d'un MongoClient du parent
+        ctx = mp.get_context('spawn')
+        self._acks = ctx.Queue()
+        self._inboxes = [ctx.Queue(maxsize=queue_size) for _ in range(self.workers)]
+        factory = loader_factory or _mongo_loader
+        args = () if loader_factory else (mongo_uri, db_name)
+        self._processes = [
+            ctx.Process(target=_worker, name=f'loader-{i}', daemon=True,
+                        args=(i, inbox, self._acks, factory, args, buffer_size, max_retries))
+            for i, inbox in enumerate(self._inboxes)
+        ]
+        for process in self._processes:
+            process.start()
+        self._running = set(range(self.workers))
+
+    def _handle(self, message) -> None:
+        kind, worker, seqs, value = message
+        if kind == ACK:
+            self.progress.inserted += value
+            self.progress.batches_acked += len(seqs)
+            self.progress.per_worker[worker] = self.progress.per_worker.get(worker, 0) + value
+        elif kind == ERROR:
+            self.progress.failed_batches += len(seqs)
+            self.progress.errors.append(f"worker {worker}: {value}")
+            logger.error(f"Échec du chargement (worker {worker}): {value}")
+        elif kind == DONE:
+            self._running.discard(worker)
+
+    def poll(self) -> LoadProgress:
+        """Intègre les acquittements reçus (sans bloquer) et retourne la progression."""
+        while True:
+            try:
+                self._handle(self._acks.get_nowait())
+            except queue.Empty:
+                return self.progress
+
+    def _check_workers(self) -> None:
+        dead = [p.name for i, p in enumerate(self._processes) if i in self._running and not p.is_alive()]
+        if dead:
+            raise RuntimeError(f"Processus de chargement arrêtés: {', '.join(dead)}")
+
+    def _put(self, worker: int, message) -> None:
+        # File pleine : on attend le processus, en vérifiant qu'il est toujours vivant
+        while True:
+            try:
+                self._inboxes[worker].put(message, timeout=1.0)
+                return
+            except queue.Full:
+                self.poll()
+                self._check_workers()
+
+    def load_data(self, data: List[Dict]) -> int:
+        if not data:
+            return 0
+        self._check_workers()
+        shards: List[List[Dict]] = [[] for _ in range(self.workers)]
+        for report in data:
+            shards[shard_of(report, self.workers)].append(report)
+        for worker, records in enumerate(shards):
+            if records:
+                self._seq += 1
+                self._put(worker, (self._seq, records))
+        self.progress.queued += len(data)
+        self.poll()
+        return len(data)
+
+    def stats(self) -> Dict[str, int]:
+        """Rapports mis en file et insérés, lots abandonnés après les nouvelles tentatives."""
+        self.poll()
+        return {
+            'queued': self.progress.queued,
+            'loaded': self.progress.inserted,
+            'failed_batches': self.progress.failed_batches,
+        }
+
+    def close(self, timeout: Optional[float] = None) -> LoadProgress:
+        """Vide les tampons, attend les processus et retourne la progression finale."""
+        for worker, process in enumerate(self._processes):
+            if process.is_alive():
+                self._inboxes[worker].put(None)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._running:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                break
+            try:
+                self._handle(self._acks.get(timeout=min(remaining or 1.0, 1.0)))
+            except queue.Empty:
+                # Un processus mort n'enverra jamais DONE
+                for i, process in enumerate(self._processes):
+                    if i in self._running and not process.is_alive():
+                        self._running.discard(i)
+        for process in self._processes:
+            process.join(timeout=1.0)
+        self.poll()
+        print(f"✅ {self.progress.inserted}/{self.progress.queued} documents insérés par "
+              f"{self.workers} processus" + (f", {self.progress.failed_batches} lot(s) en échec"
+                                             if self.progress.failed_batches else ""))
+        return self.progress
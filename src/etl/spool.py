@@ -0,0 +1,395 @@
+"""
+Spool local en écriture anticipée entre la transformation et le chargement.
+
+Les lots transformés sont ajoutés à des segments sur disque (append-only) puis
+chargés dans MongoDB par un thread d'arrière-plan. L'extraction n'attend donc
+plus la base : si MongoDB est lent ou indisponible, les lots s'accumulent sur
+disque et sont chargés dès que possible, sans perte.
+
+Format d'un segment : suite de trames
+    [longueur: uint32][crc32: uint32][codec: uint8][lot compressé (JSON)]
+"""
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Callable, Dict, Any, Iterator, List, Optional, Tuple
+
+from ..models import schemas
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import fcntl
+except ImportError:
+    # Windows : pas de verrou, un seul écrivain par spool reste à la charge de l'appelant
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+HEADER = struct.Struct('>IIB')
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+
+OPEN_SUFFIX = '.open'
+READY_SUFFIX = '.ready'
+ACK_SUFFIX = '.ack'
+LOCK_FILE = 'spool.lock'
+
+
+def _compress(payload: bytes, codec: int) -> bytes:
+    if codec == CODEC_ZSTD:
+        return zstandard.ZstdCompressor(level=3).compress(payload)
+    return zlib.compress(payload, 6)
+
+
+def _decompress(data: bytes, codec: int) -> bytes:
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Segment compressé avec zstd mais le module zstandard est absent")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+def read_frames(path: Path, offset: int = 0) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+    """
+    Lit les trames d'un segment à partir de `offset`.
+
+    Produit `(offset de fin de trame, lot)` ; s'arrête à la première trame
+    incomplète ou corrompue (fin d'écriture interrompue).
+    """
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        while True:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                return
+            length, crc, codec = HEADER.unpack(header)
+            data = f.read(length)
+            if len(data) < length or zlib.crc32(data) != crc:
+                logger.warning(f"Trame tronquée ou corrompue dans {path.name} à l'octet {offset}")
+                return
+            offset += HEADER.size + length
+            yield offset, schemas.loads(_decompress(data, codec))
+
+
+class Spool:
+    """
+    Segments append-only de lots de rapports, dans un répertoire local.
+
+    Le segment actif porte le suffixe `.open` ; il est scellé (`.ready`) quand il
+    dépasse `segment_bytes` ou sur demande. Seuls les segments scellés sont
+    chargés. La progression du chargement d'un segment est enregistrée dans un
+    fichier `.ack` : après un arrêt brutal, au plus une trame est rechargée.
+
+    Un seul `Spool` peut être ouvert sur un répertoire : un verrou exclusif
+    (`flock` sur `spool.lock`) est pris pour toute sa durée de vie et libéré
+    par `close()` ou à la fin du processus.
+    """
+
+    def __init__(self, directory: str = "data/spool", segment_bytes: int = 8 * 1024 * 1024,
+                 max_pending_bytes: int = 1024 ** 3, codec: Optional[str] = None, fsync: bool = True):
+        """
+        Args:
+            directory: Répertoire du spool (créé si besoin)
+            segment_bytes: Taille à partir de laquelle le segment actif est scellé
+            max_pending_bytes: Volume en attente au-delà duquel `append` bloque
+            codec: 'zlib' ou 'zstd' (par défaut zstd si le module est installé)
+            fsync: Force l'écriture sur disque après chaque lot
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_bytes = segment_bytes
+        self.max_pending_bytes = max_pending_bytes
+        if codec is None:
+            codec = 'zstd' if zstandard is not None else 'zlib'
+        if codec == 'zstd' and zstandard is None:
+            raise ValueError("Le codec zstd nécessite le module zstandard")
+        self.codec = CODEC_ZSTD if codec == 'zstd' else CODEC_ZLIB
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._space = threading.Condition(self._lock)
+        self._file = None
+        self._path: Optional[Path] = None
+        self._opened_at = 0.0
+        self._seq = 0
+        self.appended = 0
+        # Octets écrits et non encore acquittés, tenus à jour par append/ack/complete
+        self._pending = 0
+        self._acked_bytes: Dict[Path, int] = {}
+        self._lock_file = self._acquire_lock()
+        self._recover()
+
+    def _acquire_lock(self):
+        lock_file = open(self.directory / LOCK_FILE, 'a')
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                raise RuntimeError(f"Spool {self.directory} déjà utilisé par un autre écrivain")
+        return lock_file
+
+    def _recover(self) -> None:
+        """Scelle les segments restés ouverts lors d'une exécution précédente."""
+        for path in sorted(self.directory.glob(f'*{OPEN_SUFFIX}')):
+            valid = 0
+            for valid, _ in read_frames(path):
+                pass
+            if valid == 0:
+                path.unlink()
+                continue
+            with open(path, 'r+b') as f:
+                f.truncate(valid)
+            path.rename(path.with_suffix(READY_SUFFIX))
+            logger.info(f"Segment {path.name} récupéré ({valid} octets)")
+        existing = [int(p.stem.split('-')[1]) for p in self.directory.glob('segment-*')
+                    if p.suffix in (READY_SUFFIX, ACK_SUFFIX)]
+        self._seq = max(existing, default=0)
+        for path in self.ready_segments():
+            acked = self._acked(path)
+            self._acked_bytes[path] = acked
+            self._pending += path.stat().st_size - acked
+
+    def pending_bytes(self) -> int:
+        """Volume des lots spoolés et non encore chargés (sans relire le répertoire)."""
+        return self._pending
+
+    def append(self, records: List[Dict[str, Any]], timeout: Optional[float] = None) -> int:
+        """
+        Ajoute un lot au segment actif ; retourne le nombre de rapports spoolés.
+
+        Bloque tant que le volume en attente dépasse `max_pending_bytes`
+        (contre-pression quand le chargement ne suit pas durablement).
+        """
+        if not records:
+            return 0
+        payload = _compress(schemas.dumps(records), self.codec)
+        frame = HEADER.pack(len(payload), zlib.crc32(payload), self.codec) + payload
+        with self._space:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while self._pending > self.max_pending_bytes:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError("Spool plein : le chargement ne suit pas")
+                self._space.wait(remaining if remaining is not None else 1.0)
+            if self._file is None:
+                self._seq += 1
+                self._path = self.directory / f'segment-{self._seq:012d}{OPEN_SUFFIX}'
+                self._file = open(self._path, 'ab')
+                self._opened_at = time.monotonic()
+            self._file.write(frame)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self._pending += len(frame)
+            self.appended += len(records)
+            if self._file.tell() >= self.segment_bytes:
+                self._seal_locked()
+        return len(records)
+
+    def _seal_locked(self) -> None:
+        if self._file is None:
+            return
+        self._file.close()
+        ready = self._path.with_suffix(READY_SUFFIX)
+        self._path.rename(ready)
+        self._acked_bytes[ready] = 0
+        self._file = None
+        self._path = None
+
+    def seal(self, max_age: float = 0.0) -> None:
+        """Scelle le segment actif s'il est ouvert depuis au moins `max_age` secondes."""
+        with self._lock:
+            if self._file is not None and time.monotonic() - self._opened_at >= max_age:
+                self._seal_locked()
+
+    def ready_segments(self) -> List[Path]:
+        return sorted(self.directory.glob(f'segment-*{READY_SUFFIX}'))
+
+    def read_segment(self, path: Path) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+        """Lit les lots d'un segment scellé à partir du dernier acquittement."""
+        return read_frames(path, self._acked(path))
+
+    def _acked(self, path: Path) -> int:
+        try:
+            return int(path.with_suffix(ACK_SUFFIX).read_text())
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def ack(self, path: Path, offset: int) -> None:
+        """Enregistre que le segment a été chargé jusqu'à `offset`."""
+        ack_path = path.with_suffix(ACK_SUFFIX)
+        tmp = ack_path.with_suffix('.tmp')
+        tmp.write_text(str(offset))
+        os.replace(tmp, ack_path)
+        with self._space:
+            self._pending -= offset - self._acked_bytes.get(path, 0)
+            self._acked_bytes[path] = offset
+            self._space.notify_all()
+
+    def complete(self, path: Path) -> None:
+        """Supprime un segment entièrement chargé et réveille les écrivains bloqués."""
+        size = path.stat().st_size
+        path.unlink()
+        path.with_suffix(ACK_SUFFIX).unlink(missing_ok=True)
+        with self._space:
+            self._pending -= size - self._acked_bytes.pop(path, 0)
+            self._space.notify_all()
+
+    def close(self) -> None:
+        """Scelle le segment actif et libère le répertoire pour un autre écrivain."""
+        with self._lock:
+            self._seal_locked()
+            if self._lock_file is not None:
+                # Fermer le fichier libère le verrou flock
+                self._lock_file.close()
+                self._lock_file = None
+
+
+class SpoolDrainer:
+    """
+    Thread qui charge les segments scellés du spool, dans l'ordre.
+
+    Chaque lot est passé à `load` (qui doit lever une exception en cas d'échec) ;
+    plusieurs lots consécutifs sont regroupés jusqu'à `batch_size` rapports.
+    Après un arrêt entre le chargement et l'acquittement, les derniers lots sont
+    rechargés : `load` doit être idempotente (`MongoDBLoader.insert_batch` ignore
+    les `report_id` déjà stockés) et retourner le nombre de rapports écrits.
+    En cas d'échec, le chargement est retenté avec une attente exponentielle
+    bornée par `max_backoff`.
+    """
+
+    def __init__(self, spool: Spool, load: Callable[[List[Dict[str, Any]]], Any],
+                 batch_size: int = 1000, seal_after: float = 2.0, poll_interval: float = 0.5,
+                 max_backoff: float = 60.0):
+        self.spool = spool
+        self.load = load
+        self.batch_size = batch_size
+        self.seal_after = seal_after
+        self.poll_interval = poll_interval
+        self.max_backoff = max_backoff
+        self.loaded = 0
+        self.submitted = 0
+        self.failures = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _load_with_retry(self, records: List[Dict[str, Any]]) -> bool:
+        backoff = min(1.0, self.max_backoff)
+        while True:
+            try:
+                written = self.load(records)
+                self.submitted += len(records)
+                self.loaded += written if isinstance(written, int) else len(records)
+                return True
+            except Exception as e:
+                self.failures += 1
+                logger.warning(f"Chargement de {len(records)} rapports échoué ({e}), "
+                               f"nouvel essai dans {backoff:.1f}s")
+                if self._stop.wait(backoff):
+                    return False
+                backoff = min(backoff * 2, self.max_backoff)
+
+    def drain_segment(self, path: Path) -> bool:
+        """Charge un segment ; retourne False si l'arrêt a été demandé avant la fin."""
+        buffer: List[Dict[str, Any]] = []
+        end = None
+        for offset, records in self.spool.read_segment(path):
+            buffer.extend(records)
+            end = offset
+            if len(buffer) >= self.batch_size:
+                if not self._load_with_retry(buffer):
+                    return False
+                self.spool.ack(path, end)
+                buffer = []
+        if buffer and not self._load_with_retry(buffer):
+            return False
+        self.spool.complete(path)
+        return True
+
+    def drain(self) -> int:
+        """Charge tous les segments scellés ; retourne le nombre de segments traités."""
+        done = 0
+        for path in self.spool.ready_segments():
+            if not self.drain_segment(path):
+                break
+            done += 1
+        return done
+
+    def run(self) -> None:
+        while not self._stop.is_set():
+            self.spool.seal(self.seal_after)
+            if not self.drain():
+                self._stop.wait(self.poll_interval)
+
+    def start(self) -> 'SpoolDrainer':
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name='spool-drainer', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, flush: bool = True, timeout: Optional[float] = None) -> None:
+        """
+        Arrête le thread. Avec `flush`, scelle le segment actif et attend que
+        tout soit chargé (au plus `timeout` secondes) ; le reste sera chargé au
+        prochain démarrage.
+        """
+        if flush and self._thread is not None:
+            self.spool.seal()
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while self.spool.ready_segments() and (deadline is None or time.monotonic() < deadline):
+                time.sleep(self.poll_interval)
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+class SpooledLoader:
+    """
+    Destination qui spoole les lots et les charge en arrière-plan.
+
+    S'utilise comme `MongoDBLoader` (`load_data`, `close`) : `load_data` retourne
+    dès que le lot est écrit sur disque, avec le nombre de rapports spoolés ; les
+    rapports effectivement chargés sont donnés par `stats()`.
+    """
+
+    # Les runners comptent le retour de `load_data` comme « mis en file », pas « chargé »
+    asynchronous = True
+
+    def __init__(self, loader, directory: str = "data/spool", batch_size: int = 1000,
+                 flush_timeout: Optional[float] = None, **spool_options):
+        self.loader = loader
+        try:
+            self.spool = Spool(directory, **spool_options)
+        except Exception:
+            loader.close()
+            raise
+        self.drainer = SpoolDrainer(self.spool, loader.insert_batch, batch_size=batch_size).start()
+        self.flush_timeout = flush_timeout
+
+    def load_data(self, data: List[Dict]) -> int:
+        return self.spool.append(data)
+
+    def stats(self) -> Dict[str, int]:
+        """Rapports spoolés et chargés pendant l'exécution, segments restant à charger."""
+        return {
+            'queued': self.spool.appended,
+            'loaded': self.drainer.loaded,
+            'pending_segments': len(self.spool.ready_segments()),
+        }
+
+    def close(self):
+        self.drainer.stop(flush=True, timeout=self.flush_timeout)
+        self.spool.close()
+        remaining = self.spool.ready_segments()
+        if remaining:
+            print(f"⚠️ {len(remaining)} segment(s) restent dans le spool {self.spool.directory}")
+        self.loader.close()
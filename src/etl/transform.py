@@ -1,19 +1,32 @@
 from typing import List, Dict, Any
 from datetime import datetime
+from .normalize import drug_normalizer
+from .meddra import get_meddra_hierarchy
 
 class Transformer:
     @staticmethod
-    def transform_report(report: Dict[str, Any]) -> Dict[str, Any]:
-        """Transforme un rapport brut en un format standardisé."""
+    def transform_report(report: Dict[str, Any], source: str = 'openfda') -> Dict[str, Any]:
+        """
+        Transforme un rapport brut (format openFDA) en un format standardisé.
+        
+        Les adaptateurs de `src.sources` produisent ce même format brut : `source`
+        indique l'origine du rapport.
+        """
         patient = report.get('patient', {})
         drugs = patient.get('drug', [{}])
         reactions = patient.get('reaction', [{}])
+        # Sans fichier MedDRA, la hiérarchie est vide : les réactions ne sont pas annotées
+        hierarchy = get_meddra_hierarchy()
+        annotate = hierarchy.annotate if len(hierarchy) else None
         
         # Extraire les informations principales
         transformed = {
             'report_id': report.get('safetyreportid'),
+            'report_version': report.get('safetyreportversion'),
+            'receipt_date': report.get('receiptdate'),
             'received_date': report.get('receivedate'),
             'transmission_date': report.get('transmissiondate'),
+            'serious': report.get('serious'),
             'patient': {
                 'age': patient.get('patientonsetage'),
                 'age_unit': patient.get('patientonsetageunit'),
@@ -22,6 +35,9 @@ class Transformer:
             },
             'drugs': [{
                 'name': drug.get('medicinalproduct'),
+                'normalized_name': drug_normalizer.normalize(
+                    drug.get('medicinalproduct'), drug.get('openfda')
+                ),
                 'active_ingredients': drug.get('openfda', {}).get('substance_name', []),
                 'dosage_form': drug.get('drugdosageform'),
                 'indication': drug.get('drugindication'),
@@ -30,13 +46,14 @@ class Transformer:
             } for drug in drugs],
             'reactions': [{
                 'term': r.get('reactionmeddrapt'),
-                'outcome': r.get('reactionoutcome')
+                'outcome': r.get('reactionoutcome'),
+                **(annotate(r.get('reactionmeddrapt')) if annotate else {})
             } for r in reactions],
-            'source': 'openfda',
+            'source': source,
             'processed_at': datetime.utcnow().isoformat()
         }
         return transformed
     
-    def transform_reports(self, reports: List[Dict]) -> List[Dict]:
+    def transform_reports(self, reports: List[Dict], source: str = 'openfda') -> List[Dict]:
         """Transforme une liste de rapports bruts."""
-        return [self.transform_report(report) for report in reports]
\ No newline at end of file
+        return [self.transform_report(report, source) for report in reports]
\ No newline at end of file
@@ -0,0 +1,249 @@
+"""
+Validation par lots des rapports bruts openFDA.
+
+Le schéma est déclaré une fois (liste de `FieldRule`) puis compilé en fonctions
+d'accès et de contrôle réutilisées pour chaque rapport. Un rapport dont un champ
+critique est invalide est mis en quarantaine ; un champ non critique invalide
+est retiré (le reste du rapport est conservé). Les erreurs sont comptées par
+champ, et aucune exception ne remonte d'un rapport malformé.
+"""
+import copy
+import json
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Any, Iterable, List, Optional, Tuple
+
+_DATE_RE = re.compile(r"^(\d{4})(0[1-9]|1[0-2])(0[1-9]|[12]\d|3[01])$")
+_DIGITS_RE = re.compile(r"^\d+$")
+
+
+@dataclass(frozen=True)
+class FieldRule:
+    """
+    Règle de validation d'un champ.
+
+    `path` est un chemin pointé ; le suffixe `[]` applique la règle à chaque
+    élément d'une liste (ex: 'patient.drug[].drugstartdate').
+    """
+    path: str
+    check: str
+    required: bool = False
+    critical: bool = False
+    choices: Tuple[str, ...] = ()
+
+
+def _is_number(value: Any) -> bool:
+    if isinstance(value, bool):
+        return False
+    if isinstance(value, (int, float)):
+        return True
+    try:
+        float(value)
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
+def _is_date(value: Any) -> bool:
+    return isinstance(value, str) and _DATE_RE.match(value[:8]) is not None
+
+
+_CHECKS: Dict[str, Callable[[Any], bool]] = {
+    'str': lambda v: isinstance(v, str) and bool(v.strip()),
+    'date': _is_date,
+    'number': _is_number,
+    'digits': lambda v: _DIGITS_RE.match(str(v)) is not None,
+    'dict': lambda v: isinstance(v, dict),
+    'list': lambda v: isinstance(v, list) and len(v) > 0,
+}
+
+# Schéma des champs lus par Transformer.transform_report
+RAW_REPORT_SCHEMA = [
+    FieldRule('safetyreportid', 'str', required=True, critical=True),
+    FieldRule('safetyreportversion', 'digits'),
+    FieldRule('receivedate', 'date'),
+    FieldRule('receiptdate', 'date'),
+    FieldRule('serious', 'enum', choices=('1', '2')),
+    FieldRule('patient', 'dict', required=True, critical=True),
+    FieldRule('patient.patientonsetage', 'number'),
+    FieldRule('patient.patientonsetageunit', 'enum', choices=('800', '801', '802', '803', '804', '805')),
+    FieldRule('patient.patientsex', 'enum', choices=('0', '1', '2')),
+    FieldRule('patient.patientweight', 'number'),
+    FieldRule('patient.drug', 'list', required=True, critical=True),
+    FieldRule('patient.drug[].medicinalproduct', 'str', required=True),
+    FieldRule('patient.drug[].drugstartdate', 'date'),
+    FieldRule('patient.drug[].drugenddate', 'date'),
+    FieldRule('patient.drug[].openfda', 'dict'),
+    FieldRule('patient.reaction', 'list', required=True, critical=True),
+    FieldRule('patient.reaction[].reactionmeddrapt', 'str', required=True),
+    FieldRule('patient.reaction[].reactionoutcome', 'enum', choices=('1', '2', '3', '4', '5', '6')),
+]
+
+
+def _split_path(path: str) -> Tuple[str, str]:
+    """Sépare un chemin en (parent, champ) : 'patient.drug[].x' -> ('patient.drug[]', 'x')."""
+    parent, _, leaf = path.rpartition('.')
+    if leaf.endswith('[]'):
+        raise ValueError(f"Chemin invalide (liste en dernière position): {path}")
+    return parent, leaf
+
+
+def _compile_parent(parent: str) -> Callable[[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Compile un chemin parent en fonction retournant les conteneurs (dicts) ciblés."""
+    parts = [(p[:-2], True) if p.endswith('[]') else (p, False) for p in parent.split('.') if p]
+
+    def containers(report: Dict[str, Any]) -> List[Dict[str, Any]]:
+        found = [report]
+        for name, is_list in parts:
+            next_found = []
+            for container in found:
+                value = container.get(name)
+                if is_list:
+                    if isinstance(value, list):
+                        next_found.extend(v for v in value if isinstance(v, dict))
+                elif isinstance(value, dict):
+                    next_found.append(value)
+            found = next_found
+        return found
+
+    return containers
+
+
+class CompiledRule:
+    """Règle compilée : champ et contrôle résolus une seule fois."""
+
+    __slots__ = ('path', 'parent', 'leaf', 'check', 'required', 'critical')
+
+    def __init__(self, rule: FieldRule):
+        self.path = rule.path
+        self.parent, self.leaf = _split_path(rule.path)
+        if rule.check == 'enum':
+            choices = frozenset(rule.choices)
+            self.check = lambda v: str(v) in choices
+        elif rule.check in _CHECKS:
+            self.check = _CHECKS[rule.check]
+        else:
+            raise ValueError(f"Contrôle inconnu pour {rule.path}: {rule.check}")
+        self.required = rule.required
+        self.critical = rule.critical
+
+
+@dataclass
+class ValidationResult:
+    """Résultat de la validation d'un lot."""
+    valid: List[Dict[str, Any]] = field(default_factory=list)
+    quarantined: List[Dict[str, Any]] = field(default_factory=list)
+    errors: Counter = field(default_factory=Counter)
+    fixed: int = 0
+
+    def merge(self, other: 'ValidationResult') -> None:
+        self.valid.extend(other.valid)
+        self.quarantined.extend(other.quarantined)
+        self.errors.update(other.errors)
+        self.fixed += other.fixed
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'valid': len(self.valid),
+            'quarantined': len(self.quarantined),
+            'fixed': self.fixed,
+            'errors': dict(self.errors.most_common())
+        }
+
+
+class BatchValidator:
+    """
+    Valide des lots de rapports bruts selon un schéma compilé.
+
+    Les rapports valides sont retournés tels quels (sans copie) ; un rapport dont
+    un champ non critique doit être retiré est copié avant correction, pour ne
+    jamais modifier les réponses mises en cache par le client FDA.
+    """
+
+    def __init__(self, schema: Optional[List[FieldRule]] = None):
+        self.rules = [CompiledRule(rule) for rule in (schema or RAW_REPORT_SCHEMA)]
+        # Règles regroupées par conteneur parent, dans l'ordre du schéma : chaque
+        # conteneur (ex: chaque élément de patient.drug) n'est localisé qu'une fois
+        groups: Dict[str, List[CompiledRule]] = {}
+        for rule in self.rules:
+            groups.setdefault(rule.parent, []).append(rule)
+        self._groups = [(_compile_parent(parent), rules) for parent, rules in groups.items()]
+        self.errors: Counter = Counter()
+        self.processed = 0
+
+    def check(self, report: Any) -> Tuple[List[Tuple[str, str]], List[CompiledRule], bool]:
+        """Retourne (erreurs (champ, type), règles à corriger, rapport critique invalide)."""
+        if not isinstance(report, dict):
+            return [('<report>', 'invalid')], [], True
+        errors, to_fix, critical = [], [], False
+        for containers, rules in self._groups:
+            for container in containers(report):
+                for rule in rules:
+                    value = container.get(rule.leaf)
+                    if value is None or value == '':
+                        if rule.required:
+                            errors.append((rule.path, 'missing'))
+                            critical = critical or rule.critical
+                    elif not rule.check(value):
+                        errors.append((rule.path, 'invalid'))
+                        if rule.critical:
+                            critical = True
+                        elif rule not in to_fix:
+                            to_fix.append(rule)
+            if critical:
+                break
+        return errors, to_fix, critical
+
+    def _fix(self, report: Dict[str, Any], rules: List[CompiledRule]) -> Dict[str, Any]:
+        fixed = copy.deepcopy(report)
+        for rule in rules:
+            for container in _compile_parent(rule.parent)(fixed):
+                value = container.get(rule.leaf)
+                if value is not None and value != '' and not rule.check(value):
+                    del container[rule.leaf]
+        return fixed
+
+    def validate(self, reports: Iterable[Any]) -> ValidationResult:
+        """Valide un lot ; ne lève pas d'exception pour un rapport malformé."""
+        result = ValidationResult()
+        for report in reports:
+            try:
+                errors, to_fix, critical = self.check(report)
+            except Exception as e:
+                errors, to_fix, critical = [('<report>', type(e).__name__)], [], True
+            for path, kind in errors:
+                result.errors[f"{path}:{kind}"] += 1
+            if critical:
+                result.quarantined.append({'report': report, 'errors': [f"{p}:{k}" for p, k in errors]})
+            elif to_fix:
+                result.valid.append(self._fix(report, to_fix))
+                result.fixed += 1
+            else:
+                result.valid.append(report)
+        self.processed += len(result.valid) + len(result.quarantined)
+        self.errors.update(result.errors)
+        return result
+
+
+class Quarantine:
+    """Fichier JSON Lines des rapports rejetés, avec leurs erreurs (thread-safe)."""
+
+    def __init__(self, directory: str = "data/quarantine"):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.path = self.directory / f"quarantine_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def write(self, entries: List[Dict[str, Any]], source: Optional[str] = None) -> int:
+        if not entries:
+            return 0
+        with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(dict(entry, source=source), ensure_ascii=False, default=str) + '\n')
+            self.count += len(entries)
+        return len(entries)
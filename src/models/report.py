@@ -16,6 +16,7 @@ class Drug:
     dosage_form: Optional[str] = None
     start_date: Optional[str] = None
     end_date: Optional[str] = None
+    normalized_name: Optional[str] = None
 
 
 @dataclass
@@ -39,6 +40,7 @@ class AdverseEventReport:
     @classmethod
     def from_api_data(cls, data: dict) -> 'AdverseEventReport':
         """Crée un rapport à partir des données brutes de l'API."""
+        from src.etl.normalize import drug_normalizer
         patient_data = data.get('patient', {})
         
         return cls(
@@ -56,7 +58,10 @@ class AdverseEventReport:
                     active_ingredients=drug.get('openfda', {}).get('substance_name', []),
                     dosage_form=drug.get('drugdosageform'),
                     start_date=drug.get('drugstartdate'),
-                    end_date=drug.get('drugenddate')
+                    end_date=drug.get('drugenddate'),
+                    normalized_name=drug_normalizer.normalize(
+                        drug.get('medicinalproduct'), drug.get('openfda')
+                    )
                 )
                 for drug in patient_data.get('drug', [])
             ],
@@ -69,6 +74,50 @@ class AdverseEventReport:
             ]
         )
 
+    @classmethod
+    def from_struct(cls, raw) -> 'AdverseEventReport':
+        """Crée un rapport à partir d'un `RawReport` décodé par src.models.schemas."""
+        from src.etl.normalize import drug_normalizer
+        patient_data = raw.patient
+
+        drugs = []
+        reactions = []
+        patient = Patient()
+        if patient_data is not None:
+            patient = Patient(
+                age=patient_data.patientonsetage,
+                age_unit=patient_data.patientonsetageunit,
+                sex=patient_data.patientsex,
+                weight=patient_data.patientweight
+            )
+            for drug in patient_data.drug:
+                openfda = drug.openfda
+                substances = openfda.substance_name if openfda is not None else []
+                drugs.append(Drug(
+                    name=drug.medicinalproduct or 'Inconnu',
+                    active_ingredients=substances,
+                    dosage_form=drug.drugdosageform,
+                    start_date=drug.drugstartdate,
+                    end_date=drug.drugenddate,
+                    normalized_name=drug_normalizer.normalize(
+                        drug.medicinalproduct,
+                        {'substance_name': substances, 'generic_name': openfda.generic_name}
+                        if openfda is not None else None
+                    )
+                ))
+            reactions = [
+                Reaction(term=r.reactionmeddrapt or 'Inconnue', outcome=r.reactionoutcome)
+                for r in patient_data.reaction
+            ]
+
+        return cls(
+            report_id=raw.safetyreportid or '',
+            received_date=raw.receivedate or '',
+            patient=patient,
+            drugs=drugs,
+            reactions=reactions
+        )
+
     @classmethod
     def from_api_data_cleaned(cls, data: dict) -> 'AdverseEventReport':
         """Crée un rapport à partir des données nettoyées de l'API."""
@@ -0,0 +1,112 @@
+"""
+Schémas typés des réponses openFDA (drug/event) pour le décodage rapide.
+
+Seuls les champs utilisés par le pipeline sont déclarés : msgspec ignore le reste
+du document pendant le décodage, sans construire les dictionnaires intermédiaires.
+msgspec et orjson sont optionnels ; sans eux, le décodage standard est utilisé.
+"""
+import json
+from typing import List, Optional, Union, Any
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Décodage direct en structures typées disponible
+FAST_DECODE_AVAILABLE = msgspec is not None
+
+# Erreurs du décodage typé (JSON invalide ou champ d'un type inattendu)
+DecodeError = msgspec.DecodeError if msgspec is not None else ValueError
+
+# Certains champs numériques sont des chaînes dans openFDA, mais pas toujours
+Scalar = Optional[Union[str, int, float]]
+
+
+def loads(content: bytes) -> Any:
+    """Décode du JSON avec orjson si disponible, sinon avec le module standard."""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def dumps(value: Any) -> bytes:
+    """Encode en JSON (UTF-8) avec orjson si disponible ; les types inconnus deviennent des chaînes."""
+    if orjson is not None:
+        return orjson.dumps(value, default=str)
+    return json.dumps(value, ensure_ascii=False, default=str).encode('utf-8')
+
+
+if msgspec is not None:
+
+    class RawOpenFDA(msgspec.Struct):
+        substance_name: List[str] = []
+        generic_name: List[str] = []
+
+    class RawDrug(msgspec.Struct):
+        medicinalproduct: Optional[str] = None
+        drugdosageform: Optional[str] = None
+        drugindication: Optional[str] = None
+        drugstartdate: Optional[str] = None
+        drugenddate: Optional[str] = None
+        openfda: Optional[RawOpenFDA] = None
+
+    class RawReaction(msgspec.Struct):
+        reactionmeddrapt: Optional[str] = None
+        reactionoutcome: Scalar = None
+
+    class RawPatient(msgspec.Struct):
+        patientonsetage: Scalar = None
+        patientonsetageunit: Scalar = None
+        patientsex: Scalar = None
+        patientweight: Scalar = None
+        drug: List[RawDrug] = []
+        reaction: List[RawReaction] = []
+
+    class RawReport(msgspec.Struct):
+        safetyreportid: Optional[str] = None
+        safetyreportversion: Scalar = None
+        receivedate: Optional[str] = None
+        receiptdate: Optional[str] = None
+        transmissiondate: Optional[str] = None
+        serious: Scalar = None
+        patient: Optional[RawPatient] = None
+
+    class ResultsMeta(msgspec.Struct):
+        skip: int = 0
+        limit: int = 0
+        total: int = 0
+
+    class Meta(msgspec.Struct):
+        results: Optional[ResultsMeta] = None
+
+    class OpenFDAResponse(msgspec.Struct):
+        meta: Optional[Meta] = None
+        results: List[RawReport] = []
+
+    _response_decoder = msgspec.json.Decoder(OpenFDAResponse)
+
+
+def decode_response(content: bytes) -> 'OpenFDAResponse':
+    """
+    Décode une réponse openFDA brute directement en structures typées.
+
+    Raises:
+        RuntimeError: si msgspec n'est pas installé
+        msgspec.ValidationError: si un champ déclaré a un type inattendu
+    """
+    if msgspec is None:
+        raise RuntimeError("msgspec n'est pas installé (pip install msgspec)")
+    return _response_decoder.decode(content)
+
+
+def total_results(response: 'OpenFDAResponse') -> int:
+    """Nombre total de résultats annoncé par une réponse typée."""
+    if response.meta is None or response.meta.results is None:
+        return 0
+    return response.meta.results.total
@@ -0,0 +1,254 @@
+"""
+Profilage à la demande du pipeline ETL.
+
+Activé par `python -m src.cli --profile DIR` ou la variable PROFILE_DIR, le
+profileur instrumente les fonctions chaudes (requêtes OpenFDA, transformation,
+nettoyage, sérialisation, chargement) :
+
+- chaque appel est chronométré (compteurs par thread, sans verrou) ;
+- une fraction des appels (`sample_rate`) est tracée en détail : durée et
+  identifiant du rapport dans `traces.jsonl`, appel exécuté sous cProfile
+  (`profile.pstats`, lisible avec `python -m pstats` ou snakeviz) ;
+- un thread échantillonne les piles de tous les threads et écrit
+  `stacks.folded`, au format attendu par flamegraph.pl ou speedscope.
+
+Sans activation, aucune fonction n'est modifiée : le coût est nul.
+"""
+import cProfile
+import functools
+import importlib
+import inspect
+import json
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+def _report_key(report: Any, *args, **kwargs) -> Optional[str]:
+    if isinstance(report, dict):
+        return report.get('safetyreportid') or report.get('report_id')
+    return None
+
+
+def _request_key(client: Any, endpoint: str = "", params: Optional[Dict] = None, *args, **kwargs) -> str:
+    return str((params or {}).get('search', endpoint))
+
+
+def _batch_key(loader: Any, data: Any = None, *args, **kwargs) -> str:
+    return f"{len(data or [])} rapports"
+
+
+# Fonctions instrumentées : (module, classe, méthode, identifiant d'un appel tracé)
+TARGETS: List[Tuple[str, str, str, Callable[..., Optional[str]]]] = [
+    ('.api.fda_client', 'FDAClient', '_make_request', _request_key),
+    ('.etl.transform', 'Transformer', 'transform_report', _report_key),
+    ('.etl.data_cleaner', 'DataCleaner', 'clean_report', _report_key),
+    ('.models.report', 'AdverseEventReport', 'to_dict', lambda report, *a, **k: report.report_id),
+    ('.etl.load', 'MongoDBLoader', 'insert_batch', _batch_key),
+]
+
+
+class _ThreadStats:
+    """Compteurs d'un thread : seul ce thread les modifie."""
+
+    __slots__ = ('timings',)
+
+    def __init__(self):
+        # label -> [appels, durée totale, durée max]
+        self.timings: Dict[str, List[float]] = {}
+
+
+class Profiler:
+    """Chronométrage des fonctions chaudes, traces échantillonnées et piles d'appels."""
+
+    def __init__(self, sample_rate: float = 0.01, stack_interval: float = 0.005):
+        """
+        Args:
+            sample_rate: Fraction des appels tracés en détail (et passés sous cProfile)
+            stack_interval: Période d'échantillonnage des piles (secondes, 0 : désactivé)
+        """
+        self.sample_rate = sample_rate
+        self.stack_interval = stack_interval
+        self._local = threading.local()
+        self._threads: List[_ThreadStats] = []
+        self._lock = threading.Lock()
+        self._traces: List[Dict[str, Any]] = []
+        # Un seul appel à la fois sous cProfile (depuis Python 3.12, un profileur
+        # actif l'est pour tout le processus) ; un appel tiré au sort pendant
+        # qu'un autre est profilé n'est que tracé
+        self._profile = cProfile.Profile()
+        self._profile_lock = threading.Lock()
+        self._profiled_calls = 0
+        self._patched: List[Tuple[type, str, Any]] = []
+        self._stacks: Counter = Counter()
+        self._sampler: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._started = 0.0
+        self.seconds = 0.0
+
+    @classmethod
+    def from_env(cls) -> Optional['Profiler']:
+        """Profileur configuré par PROFILE_DIR / PROFILE_SAMPLE_RATE (None si non demandé)."""
+        if not os.getenv('PROFILE_DIR'):
+            return None
+        return cls(sample_rate=float(os.getenv('PROFILE_SAMPLE_RATE', '0.01')))
+
+    def _thread_stats(self) -> _ThreadStats:
+        stats = getattr(self._local, 'stats', None)
+        if stats is None:
+            stats = self._local.stats = _ThreadStats()
+            with self._lock:
+                self._threads.append(stats)
+        return stats
+
+    def wrap(self, label: str, func: Callable, key: Optional[Callable[..., Optional[str]]] = None) -> Callable:
+        """Retourne `func` chronométrée sous `label` (traces identifiées par `key(*args)`)."""
+        perf_counter = time.perf_counter
+        rand = random.random
+        rate = self.sample_rate
+
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            stats = self._thread_stats()
+            sampled = rate > 0 and rand() < rate
+            profiled = sampled and self._profile_lock.acquire(blocking=False)
+            if profiled:
+                self._profile.enable()
+            started = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = perf_counter() - started
+                if profiled:
+                    self._profile.disable()
+                    self._profiled_calls += 1
+                    self._profile_lock.release()
+                if sampled:
+                    trace = {'function': label, 'ms': round(elapsed * 1000, 3),
+                             'thread': threading.current_thread().name}
+                    if key is not None:
+                        try:
+                            trace['key'] = key(*args, **kwargs)
+                        except Exception:
+                            pass
+                    with self._lock:
+                        self._traces.append(trace)
+                timing = stats.timings.get(label)
+                if timing is None:
+                    stats.timings[label] = [1, elapsed, elapsed]
+                else:
+                    timing[0] += 1
+                    timing[1] += elapsed
+                    if elapsed > timing[2]:
+                        timing[2] = elapsed
+
+        return timed
+
+    def instrument(self) -> None:
+        """Remplace les fonctions de `TARGETS` par leur version chronométrée."""
+        for module_name, class_name, attr, key in TARGETS:
+            cls = getattr(importlib.import_module(module_name, __package__), class_name)
+            original = inspect.getattr_static(cls, attr)
+            label = f"{class_name}.{attr}"
+            if isinstance(original, staticmethod):
+                patched = staticmethod(self.wrap(label, original.__func__, key))
+            elif isinstance(original, classmethod):
+                patched = classmethod(self.wrap(label, original.__func__, key))
+            else:
+                patched = self.wrap(label, original, key)
+            setattr(cls, attr, patched)
+            self._patched.append((cls, attr, original))
+
+    def uninstrument(self) -> None:
+        for cls, attr, original in reversed(self._patched):
+            setattr(cls, attr, original)
+        self._patched = []
+
+    def wrap_sink(self, sink):
+        """Chronomètre `load_data` d'une destination (MongoDB, spool, fichier...)."""
+        label = f"{type(sink).__name__}.load_data"
+        sink.load_data = self.wrap(label, sink.load_data, lambda data, *a, **k: f"{len(data)} rapports")
+        return sink
+
+    def _sample_stacks(self) -> None:
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.stack_interval):
+            for thread in threading.enumerate():
+                names[thread.ident] = thread.name
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self._stacks[';'.join(reversed(stack))] += 1
+
+    def start(self) -> 'Profiler':
+        self.instrument()
+        self._started = time.perf_counter()
+        if self.stack_interval > 0:
+            self._stop.clear()
+            self._sampler = threading.Thread(target=self._sample_stacks, name='profiler', daemon=True)
+            self._sampler.start()
+        return self
+
+    def stop(self) -> None:
+        self.seconds = time.perf_counter() - self._started
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+            self._sampler = None
+        self.uninstrument()
+
+    def timings(self) -> Dict[str, Dict[str, float]]:
+        """Durées agrégées sur tous les threads, par fonction (triées par temps total)."""
+        merged: Dict[str, List[float]] = {}
+        with self._lock:
+            threads = list(self._threads)
+        for stats in threads:
+            for label, (calls, total, longest) in list(stats.timings.items()):
+                current = merged.setdefault(label, [0, 0.0, 0.0])
+                current[0] += calls
+                current[1] += total
+                current[2] = max(current[2], longest)
+        return {
+            label: {'calls': int(calls), 'total_s': round(total, 4),
+                    'mean_ms': round(total / calls * 1000, 4), 'max_ms': round(longest * 1000, 3)}
+            for label, (calls, total, longest) in sorted(merged.items(), key=lambda item: -item[1][1])
+        }
+
+    def dump(self, directory: str) -> Path:
+        """Écrit timings.json, traces.jsonl, profile.pstats et stacks.folded."""
+        path = Path(directory)
+        path.mkdir(parents=True, exist_ok=True)
+        with open(path / 'timings.json', 'w', encoding='utf-8') as f:
+            json.dump({'seconds': round(self.seconds, 3), 'sample_rate': self.sample_rate,
+                       'functions': self.timings()}, f, indent=2)
+        with open(path / 'traces.jsonl', 'w', encoding='utf-8') as f:
+            for trace in self._traces:
+                f.write(json.dumps(trace, default=str) + '\n')
+        if self._profiled_calls:
+            pstats.Stats(self._profile).dump_stats(path / 'profile.pstats')
+        with open(path / 'stacks.folded', 'w', encoding='utf-8') as f:
+            for stack, count in self._stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+    def print_report(self, top: int = 10) -> None:
+        print("\n⏱️ PROFIL")
+        print(f"{'Fonction':<40} {'Appels':>9} {'Total (s)':>10} {'Moy. (ms)':>10} {'Max (ms)':>10}")
+        for label, t in list(self.timings().items())[:top]:
+            print(f"{label[:40]:<40} {t['calls']:>9} {t['total_s']:>10.3f} {t['mean_ms']:>10.3f} {t['max_ms']:>10.1f}")
+        print(f"- {len(self._traces)} appels tracés (taux {self.sample_rate:g}), "
+              f"{self._profiled_calls} profilés, "
+              f"{sum(self._stacks.values())} piles échantillonnées")
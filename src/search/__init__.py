@@ -0,0 +1,19 @@
+from importlib import import_module
+
+# Exports chargés au premier accès (l'index dépend de numpy)
+_EXPORTS = {
+    'ReportSearchIndex': '.index',
+    'SearchIndexBuilder': '.index',
+    'build_from_collection': '.index',
+    'build_from_client': '.index',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
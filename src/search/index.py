@@ -0,0 +1,331 @@
+"""
+Index de recherche plein texte sur les rapports stockés.
+
+Deux niveaux : un dictionnaire des termes distincts (effets, noms de médicaments,
+substances actives), interrogé par trigrammes pour les recherches partielles
+(« hepat », « rash »), puis des listes de rapports par terme au format CSR
+(tableaux NumPy mappés en mémoire une fois l'index sauvegardé).
+"""
+import json
+import math
+import re
+from bisect import bisect_left
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Any, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+FIELDS = {'reaction': 0, 'drug': 1}
+
+# Qualité de la correspondance entre un mot de la requête et un terme indexé
+EXACT_MATCH = 1.0
+PREFIX_MATCH = 0.8
+SUBSTRING_MATCH = 0.5
+
+# Champs des documents MongoDB lus pour construire l'index
+INDEXED_PROJECTION = {
+    'report_id': 1,
+    'reactions.term': 1,
+    'drugs.name': 1,
+    'drugs.active_ingredients': 1,
+}
+
+_PUNCT_RE = re.compile(r"[^A-Z0-9 ]+")
+_SPACES_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """Majuscules, ponctuation remplacée par des espaces."""
+    if not text or not isinstance(text, str):
+        return ''
+    return _SPACES_RE.sub(' ', _PUNCT_RE.sub(' ', text.upper())).strip()
+
+
+def report_terms(report: Dict[str, Any]) -> Set[Tuple[int, str]]:
+    """Couples (champ, terme) indexés pour un rapport au format stocké."""
+    terms = set()
+    for reaction in report.get('reactions') or []:
+        term = normalize_text(reaction.get('term'))
+        if term:
+            terms.add((FIELDS['reaction'], term))
+    for drug in report.get('drugs') or []:
+        for name in [drug.get('name')] + list(drug.get('active_ingredients') or []):
+            term = normalize_text(name)
+            if term:
+                terms.add((FIELDS['drug'], term))
+    return terms
+
+
+def _grams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class SearchIndexBuilder:
+    """Accumule les rapports puis produit un `ReportSearchIndex` immuable."""
+
+    def __init__(self):
+        self.report_ids: List[str] = []
+        self._postings: Dict[Tuple[int, str], List[int]] = defaultdict(list)
+
+    def add_report(self, report: Dict[str, Any]) -> None:
+        report_id = report.get('report_id')
+        if report_id is None:
+            return
+        doc = len(self.report_ids)
+        self.report_ids.append(str(report_id))
+        for key in report_terms(report):
+            self._postings[key].append(doc)
+
+    def add_reports(self, reports: Iterable[Dict[str, Any]]) -> int:
+        count = 0
+        for report in reports:
+            self.add_report(report)
+            count += 1
+        return count
+
+    def build(self) -> 'ReportSearchIndex':
+        # Termes triés : les recherches par préfixe court se font par dichotomie
+        keys = sorted(self._postings, key=lambda k: (k[1], k[0]))
+        offsets = np.zeros(len(keys) + 1, dtype=np.int64)
+        np.cumsum([len(self._postings[k]) for k in keys], out=offsets[1:])
+        postings = np.empty(int(offsets[-1]), dtype=np.int32)
+        for i, key in enumerate(keys):
+            postings[offsets[i]:offsets[i + 1]] = self._postings[key]
+        return ReportSearchIndex(
+            terms=[k[1] for k in keys],
+            fields=np.asarray([k[0] for k in keys], dtype=np.int8),
+            offsets=offsets,
+            postings=postings,
+            report_ids=np.asarray(self.report_ids, dtype=str)
+        )
+
+
+class ReportSearchIndex:
+    """
+    Recherche classée et paginée des rapports par effet ou médicament.
+
+    Chaque mot de la requête doit correspondre (exactement, en préfixe ou en
+    sous-chaîne) à au moins un terme du rapport ; le score d'un rapport est la
+    somme, sur les mots de la requête, de la meilleure qualité de correspondance
+    pondérée par l'IDF du terme.
+    """
+
+    def __init__(self, terms: List[str], fields: np.ndarray, offsets: np.ndarray,
+                 postings: np.ndarray, report_ids: np.ndarray):
+        self.terms = terms
+        self.fields = fields
+        self.offsets = offsets
+        self.postings = postings
+        self.report_ids = report_ids
+        n_docs = max(len(report_ids), 1)
+        self.idf = np.log1p(n_docs / np.maximum(np.diff(offsets), 1))
+        self._gram_index: Optional[Dict[str, np.ndarray]] = None
+
+    def __len__(self) -> int:
+        return len(self.report_ids)
+
+    def _grams_to_terms(self) -> Dict[str, np.ndarray]:
+        if self._gram_index is None:
+            index = defaultdict(list)
+            for term_id, term in enumerate(self.terms):
+                for gram in _grams(term):
+                    index[gram].append(term_id)
+            self._gram_index = {g: np.asarray(ids, dtype=np.int32) for g, ids in index.items()}
+        return self._gram_index
+
+    def matching_terms(self, word: str, field: Optional[int] = None) -> List[Tuple[int, float]]:
+        """Termes contenant `word`, avec la qualité de correspondance."""
+        if len(word) < 3:
+            # Trop court pour les trigrammes : préfixe uniquement
+            candidates = []
+            i = bisect_left(self.terms, word)
+            while i < len(self.terms) and self.terms[i].startswith(word):
+                candidates.append(i)
+                i += 1
+        else:
+            gram_index = self._grams_to_terms()
+            lists = [gram_index.get(g) for g in _grams(word)]
+            if any(ids is None for ids in lists):
+                return []
+            lists.sort(key=len)
+            ids = lists[0]
+            for other in lists[1:]:
+                ids = np.intersect1d(ids, other, assume_unique=True)
+                if not len(ids):
+                    return []
+            candidates = ids.tolist()
+        matches = []
+        for term_id in candidates:
+            if field is not None and self.fields[term_id] != field:
+                continue
+            term = self.terms[term_id]
+            if term == word:
+                quality = EXACT_MATCH
+            elif term.startswith(word) or f' {word}' in term:
+                quality = PREFIX_MATCH
+            elif word in term:
+                quality = SUBSTRING_MATCH
+            else:
+                continue
+            matches.append((term_id, quality))
+        return matches
+
+    def _word_scores(self, word: str, field: Optional[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """Rapports (triés) correspondant à un mot et leur meilleur score."""
+        matches = self.matching_terms(word, field)
+        if not matches:
+            return np.empty(0, dtype=np.int32), np.empty(0)
+        docs = np.concatenate([self.postings[self.offsets[t]:self.offsets[t + 1]] for t, _ in matches])
+        weights = np.concatenate([
+            np.full(self.offsets[t + 1] - self.offsets[t], q * self.idf[t]) for t, q in matches
+        ])
+        order = np.lexsort((weights, docs))
+        docs, weights = docs[order], weights[order]
+        last = np.ones(len(docs), dtype=bool)
+        last[:-1] = docs[1:] != docs[:-1]
+        return docs[last], weights[last]
+
+    def search(self, query: str, field: Optional[str] = None, page: int = 1,
+               page_size: int = 20) -> Dict[str, Any]:
+        """
+        Args:
+            query: Un ou plusieurs mots, éventuellement partiels (« hepat », « rash »)
+            field: 'reaction', 'drug' ou None pour les deux
+            page: Numéro de page (à partir de 1)
+            page_size: Résultats par page
+
+        Returns:
+            {'total', 'page', 'page_size', 'results': [{'report_id', 'score'}]}
+        """
+        field_code = FIELDS[field] if field is not None else None
+        words = normalize_text(query).split()
+        docs, scores = None, None
+        for word in words:
+            word_docs, word_scores = self._word_scores(word, field_code)
+            if docs is None:
+                docs, scores = word_docs, word_scores
+            else:
+                docs, left, right = np.intersect1d(docs, word_docs, assume_unique=True, return_indices=True)
+                scores = scores[left] + word_scores[right]
+            if not len(docs):
+                break
+        page = max(1, page)
+        result = {'total': 0 if docs is None else int(len(docs)), 'page': page,
+                  'page_size': page_size, 'results': []}
+        if not result['total']:
+            return result
+        end = min(page * page_size, len(docs))
+        start = (page - 1) * page_size
+        if start >= end:
+            return result
+        # Seuls les `end` meilleurs sont triés (score décroissant, puis ordre d'insertion) ;
+        # tous les ex aequo du `end`-ième score sont gardés pour que les pages restent stables
+        if end < len(docs):
+            threshold = -np.partition(-scores, end - 1)[end - 1]
+            top = np.flatnonzero(scores >= threshold)
+        else:
+            top = np.arange(len(docs))
+        top = top[np.lexsort((docs[top], -scores[top]))][start:end]
+        result['results'] = [
+            {'report_id': str(self.report_ids[docs[i]]), 'score': round(float(scores[i]), 4)}
+            for i in top
+        ]
+        return result
+
+    def save(self, directory: str) -> None:
+        """Sauvegarde l'index (fichiers .npy rechargeables par `load` en mode mappé)."""
+        path = Path(directory)
+        path.mkdir(parents=True, exist_ok=True)
+        np.save(path / 'terms.npy', np.asarray(self.terms, dtype=str))
+        np.save(path / 'fields.npy', self.fields)
+        np.save(path / 'offsets.npy', self.offsets)
+        np.save(path / 'postings.npy', self.postings)
+        np.save(path / 'report_ids.npy', self.report_ids)
+        with open(path / 'meta.json', 'w', encoding='utf-8') as f:
+            json.dump({'reports': len(self), 'terms': len(self.terms)}, f)
+
+    @classmethod
+    def load(cls, directory: str) -> 'ReportSearchIndex':
+        path = Path(directory)
+        return cls(
+            terms=np.load(path / 'terms.npy').tolist(),
+            fields=np.load(path / 'fields.npy'),
+            offsets=np.load(path / 'offsets.npy'),
+            postings=np.load(path / 'postings.npy', mmap_mode='r'),
+            report_ids=np.load(path / 'report_ids.npy', mmap_mode='r')
+        )
+
+
+def build_from_collection(collection, batch_size: int = 10000) -> ReportSearchIndex:
+    """Construit l'index à partir d'une collection de rapports (lecture projetée)."""
+    builder = SearchIndexBuilder()
+    builder.add_reports(collection.find({}, INDEXED_PROJECTION, batch_size=batch_size))
+    return builder.build()
+
+
+def build_from_client(db_client, batch_size: int = 10000) -> ReportSearchIndex:
+    """Construit l'index à partir d'un `MongoDBClient` connecté (toutes les partitions actives)."""
+    builder = SearchIndexBuilder()
+    builder.add_reports(db_client.iter_reports(projection=INDEXED_PROJECTION, batch_size=batch_size))
+    return builder.build()
+
+
+def fetch_ranked(collection, results: List[Dict[str, Any]], projection=None) -> List[Dict[str, Any]]:
+    """Récupère les documents d'une page de résultats, dans l'ordre du classement."""
+    ids = [r['report_id'] for r in results]
+    found = {doc['report_id']: doc for doc in collection.find({'report_id': {'$in': ids}}, projection)}
+    return [found[i] for i in ids if i in found]
+
+
+def main():
+    """Construction et interrogation de l'index depuis la ligne de commande."""
+    import argparse
+    import os
+    import sys
+    import time
+    from ..database.mongodb import DEFAULT_COLLECTION, DEFAULT_DATABASE, MongoDBClient
+
+    parser = argparse.ArgumentParser(description="Index de recherche plein texte des rapports")
+    parser.add_argument('--index-dir', default=os.getenv('SEARCH_INDEX_DIR', 'data/search_index'))
+    sub = parser.add_subparsers(dest='command', required=True)
+    build = sub.add_parser('build', help="Construit l'index depuis MongoDB")
+    build.add_argument('--mongo-uri', default=os.getenv('MONGO_URI', 'mongodb://localhost:27017/'))
+    build.add_argument('--db', default=os.getenv('DATABASE_NAME', DEFAULT_DATABASE),
+                       help="Base chargée par le pipeline (DATABASE_NAME)")
+    build.add_argument('--collection', default=DEFAULT_COLLECTION,
+                       help="Collection des rapports (nom de base des partitions annuelles)")
+    query = sub.add_parser('query', help="Interroge l'index")
+    query.add_argument('text')
+    query.add_argument('--field', choices=list(FIELDS))
+    query.add_argument('--page', type=int, default=1)
+    query.add_argument('--page-size', type=int, default=20)
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        # Lecture par partition en mode partitionné (REPORTS_PARTITIONED)
+        client = MongoDBClient(args.mongo_uri, args.db, cache_size=0, collection=args.collection)
+        if not client.connect():
+            print(f"❌ Connexion à MongoDB impossible ({args.mongo_uri})")
+            sys.exit(1)
+        started = time.perf_counter()
+        try:
+            index = build_from_client(client)
+        finally:
+            client.close()
+        index.save(args.index_dir)
+        print(f"✅ {len(index)} rapports, {len(index.terms)} termes indexés "
+              f"en {time.perf_counter() - started:.1f}s → {args.index_dir}")
+        return
+
+    index = ReportSearchIndex.load(args.index_dir)
+    started = time.perf_counter()
+    found = index.search(args.text, field=args.field, page=args.page, page_size=args.page_size)
+    elapsed = (time.perf_counter() - started) * 1000
+    print(f"🔎 {found['total']} rapports ({elapsed:.1f} ms), page {found['page']}")
+    for hit in found['results']:
+        print(f"  {hit['report_id']}  {hit['score']:.3f}")
+
+
+if __name__ == '__main__':
+    main()
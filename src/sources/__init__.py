@@ -0,0 +1,22 @@
+from importlib import import_module
+
+# Exports chargés au premier accès (l'adaptateur openFDA dépend de requests)
+_EXPORTS = {
+    'SourceAdapter': '.base',
+    'RejectedRecord': '.base',
+    'FDASource': '.fda',
+    'CSVSource': '.csv_files',
+    'FHIRSource': '.fhir',
+    'read_partitions': '.runner',
+    'create_source': '.base',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
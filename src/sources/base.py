@@ -0,0 +1,140 @@
+"""
+Interface commune des sources de rapports (openFDA, exports hospitaliers).
+
+Un adaptateur découpe sa source en partitions indépendantes (médicaments,
+fichiers) et produit pour chacune des rapports bruts au format openFDA
+(`safetyreportid`, `receivedate`, `patient.drug[]`, `patient.reaction[]`...) :
+la validation, `Transformer.transform_report` et le chargement sont ainsi
+identiques quelle que soit l'origine des données.
+"""
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Iterable, Iterator, List, Optional
+
+_DATE_FORMATS = ('%Y%m%d', '%Y-%m-%d', '%d/%m/%Y', '%Y/%m/%d', '%d.%m.%Y')
+_DATETIME_RE = re.compile(r"^(\d{4}-\d{2}-\d{2})[T ]")
+
+# Valeurs hospitalières courantes -> codes openFDA
+SEX_VALUES = {
+    '1': '1', 'm': '1', 'male': '1', 'h': '1', 'homme': '1',
+    '2': '2', 'f': '2', 'female': '2', 'femme': '2',
+}
+SERIOUS_VALUES = {
+    '1': '1', 'yes': '1', 'y': '1', 'true': '1', 'oui': '1', 'serious': '1',
+    '2': '2', 'no': '2', 'n': '2', 'false': '2', 'non': '2', 'non-serious': '2',
+}
+
+
+def to_fda_date(value: Any) -> Optional[str]:
+    """Convertit une date (YYYYMMDD, ISO, JJ/MM/AAAA...) au format openFDA YYYYMMDD."""
+    if not value:
+        return None
+    text = str(value).strip()
+    match = _DATETIME_RE.match(text)
+    if match:
+        text = match.group(1)
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).strftime('%Y%m%d')
+        except ValueError:
+            continue
+    return None
+
+
+def to_fda_sex(value: Any) -> Optional[str]:
+    if value is None or value == '':
+        return None
+    return SEX_VALUES.get(str(value).strip().lower(), '0')
+
+
+def to_fda_serious(value: Any) -> Optional[str]:
+    if value is None or value == '':
+        return None
+    return SERIOUS_VALUES.get(str(value).strip().lower())
+
+
+def compact(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Retire les champs vides (None, '') d'un dictionnaire."""
+    return {k: v for k, v in data.items() if v is not None and v != ''}
+
+
+def expand_paths(paths: Iterable[str], patterns: Iterable[str]) -> List[Path]:
+    """Fichiers désignés par `paths` (les répertoires sont parcourus selon `patterns`)."""
+    files: List[Path] = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            for pattern in patterns:
+                files.extend(sorted(p for p in path.rglob(pattern) if p.is_file()))
+        elif path.exists():
+            files.append(path)
+        else:
+            raise FileNotFoundError(f"Fichier introuvable: {path}")
+    return list(dict.fromkeys(files))
+
+
+@dataclass
+class RejectedRecord:
+    """
+    Élément illisible d'une partition (ligne JSON invalide, ressource ou ligne
+    CSV non convertible), produit par `read_raw` à la place d'un rapport : il
+    part en quarantaine sans interrompre la lecture de la partition.
+    """
+    record: Any
+    error: str
+    location: Optional[str] = None
+
+    def quarantine_entry(self) -> Dict[str, Any]:
+        """Entrée au format de `BatchValidator` / `Quarantine`."""
+        return {'report': self.record, 'errors': [f"<read>:{self.error}"], 'location': self.location}
+
+
+class SourceAdapter:
+    """
+    Source de rapports bruts, lue partition par partition.
+
+    Les partitions sont lues en parallèle par `src.sources.runner` : dans des
+    processus (`parallel = 'process'`, lecture de fichiers limitée par le CPU)
+    ou des threads (`'thread'`, sources réseau). L'adaptateur doit donc être
+    sérialisable par pickle dans le premier cas.
+    """
+
+    name = 'source'
+    parallel = 'process'
+
+    def partitions(self) -> List[Any]:
+        raise NotImplementedError
+
+    def read_raw(self, partition: Any) -> Iterator[Any]:
+        """
+        Rapports bruts (format openFDA) d'une partition, au fil de la lecture ;
+        un élément illisible est signalé par un `RejectedRecord`.
+        """
+        raise NotImplementedError
+
+    def label(self, partition: Any) -> str:
+        """Nom d'une partition dans les bilans."""
+        return Path(partition).name if isinstance(partition, (str, Path)) else str(partition)
+
+
+SOURCES = ['fda', 'csv', 'fhir']
+
+
+def create_source(kind: str, inputs: Optional[List[str]] = None, **options) -> SourceAdapter:
+    """
+    Instancie un adaptateur : 'fda' (options drugs, limit, start_date, end_date),
+    'csv' (inputs, columns, delimiter, id_prefix...) ou 'fhir' (inputs, id_prefix).
+    """
+    if kind == 'fda':
+        from .fda import FDASource
+        return FDASource(**options)
+    if not inputs:
+        raise ValueError(f"La source {kind} nécessite des fichiers d'entrée")
+    if kind == 'csv':
+        from .csv_files import CSVSource
+        return CSVSource(inputs, **options)
+    if kind == 'fhir':
+        from .fhir import FHIRSource
+        return FHIRSource(inputs, **options)
+    raise ValueError(f"Source inconnue: {kind}")
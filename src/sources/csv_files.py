@@ -0,0 +1,150 @@
+"""
+Exports CSV hospitaliers d'effets indésirables.
+
+Chaque ligne décrit un cas, ou une partie d'un cas (format « long » : une
+ligne par médicament ou par effet) ; les lignes consécutives d'un même
+identifiant de cas sont regroupées. Les colonnes multivaluées (plusieurs
+médicaments ou effets dans une cellule) sont découpées par `separator`.
+"""
+import csv
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional
+
+from .base import RejectedRecord, SourceAdapter, compact, expand_paths, to_fda_date, to_fda_serious, to_fda_sex
+
+# Champ du rapport -> colonne du fichier (valeurs par défaut, remplaçables via `columns`)
+DEFAULT_COLUMNS = {
+    'report_id': 'case_id',
+    'version': 'version',
+    'received_date': 'report_date',
+    'serious': 'serious',
+    'age': 'age',
+    'age_unit': 'age_unit',
+    'sex': 'sex',
+    'weight': 'weight',
+    'drug': 'drug',
+    'dosage_form': 'dosage_form',
+    'indication': 'indication',
+    'drug_start_date': 'drug_start_date',
+    'drug_end_date': 'drug_end_date',
+    'reaction': 'reaction',
+    'reaction_outcome': 'reaction_outcome',
+}
+
+# Unités d'âge courantes -> codes openFDA (patientonsetageunit)
+AGE_UNITS = {'decade': '800', 'year': '801', 'years': '801', 'ans': '801', 'y': '801',
+             'month': '802', 'months': '802', 'mois': '802', 'week': '803', 'weeks': '803',
+             'day': '804', 'days': '804', 'jours': '804', 'hour': '805', 'hours': '805'}
+
+
+class CSVSource(SourceAdapter):
+    """Fichiers CSV (ou répertoires de fichiers .csv), une partition par fichier."""
+
+    name = 'csv'
+
+    def __init__(self, paths: List[str], columns: Optional[Dict[str, str]] = None,
+                 delimiter: str = ',', separator: str = '|', encoding: str = 'utf-8-sig',
+                 id_prefix: str = 'csv:'):
+        """
+        Args:
+            paths: Fichiers ou répertoires
+            columns: Correspondance champ -> colonne, fusionnée avec `DEFAULT_COLUMNS`
+            delimiter: Séparateur de colonnes
+            separator: Séparateur des valeurs multiples dans une cellule
+            encoding: Encodage des fichiers (BOM accepté par défaut)
+            id_prefix: Préfixe des identifiants (évite les collisions avec les safetyreportid openFDA)
+        """
+        self.paths = [str(p) for p in paths]
+        self.columns = dict(DEFAULT_COLUMNS, **(columns or {}))
+        self.delimiter = delimiter
+        self.separator = separator
+        self.encoding = encoding
+        self.id_prefix = id_prefix
+
+    def partitions(self) -> List[Path]:
+        return expand_paths(self.paths, ['*.csv'])
+
+    def _values(self, row: Dict[str, str], field: str) -> List[str]:
+        value = row.get(self.columns[field])
+        if not value:
+            return []
+        return [v.strip() for v in value.split(self.separator) if v.strip()]
+
+    def _get(self, row: Dict[str, str], field: str) -> Optional[str]:
+        value = row.get(self.columns[field])
+        return value.strip() if value and value.strip() else None
+
+    def _drugs(self, row: Dict[str, str]) -> List[Dict[str, Any]]:
+        return [compact({
+            'medicinalproduct': name,
+            'drugdosageform': self._get(row, 'dosage_form'),
+            'drugindication': self._get(row, 'indication'),
+            'drugstartdate': to_fda_date(self._get(row, 'drug_start_date')),
+            'drugenddate': to_fda_date(self._get(row, 'drug_end_date')),
+        }) for name in self._values(row, 'drug')]
+
+    def _reactions(self, row: Dict[str, str]) -> List[Dict[str, Any]]:
+        outcome = self._get(row, 'reaction_outcome')
+        return [compact({'reactionmeddrapt': term, 'reactionoutcome': outcome})
+                for term in self._values(row, 'reaction')]
+
+    def _new_report(self, case_id: str, row: Dict[str, str]) -> Dict[str, Any]:
+        unit = self._get(row, 'age_unit')
+        received = to_fda_date(self._get(row, 'received_date'))
+        return compact({
+            'safetyreportid': f"{self.id_prefix}{case_id}",
+            'safetyreportversion': self._get(row, 'version'),
+            'receivedate': received,
+            'receiptdate': received,
+            'serious': to_fda_serious(self._get(row, 'serious')),
+            'patient': compact({
+                'patientonsetage': self._get(row, 'age'),
+                'patientonsetageunit': AGE_UNITS.get(unit.lower(), unit) if unit else None,
+                'patientsex': to_fda_sex(self._get(row, 'sex')),
+                'patientweight': self._get(row, 'weight'),
+                'drug': [],
+                'reaction': [],
+            }),
+        })
+
+    @staticmethod
+    def _merge(items: List[Dict[str, Any]], new: List[Dict[str, Any]], key: str) -> None:
+        seen = {item.get(key) for item in items}
+        for item in new:
+            if item.get(key) not in seen:
+                items.append(item)
+                seen.add(item.get(key))
+
+    def read_raw(self, partition: Path) -> Iterator[Any]:
+        with open(partition, newline='', encoding=self.encoding) as f:
+            reader = csv.DictReader(f, delimiter=self.delimiter)
+            missing = self.columns['report_id'] not in (reader.fieldnames or [])
+            if missing:
+                raise ValueError(f"{partition}: colonne d'identifiant absente ({self.columns['report_id']})")
+            current_id, report = None, None
+            rows = iter(reader)
+            while True:
+                try:
+                    row = next(rows)
+                except StopIteration:
+                    break
+                except csv.Error as e:
+                    # Ligne mal formée : rejetée, la lecture reprend à la suivante
+                    yield RejectedRecord(None, f"CSV invalide: {e}", f"{partition.name}:{reader.line_num}")
+                    continue
+                case_id = self._get(row, 'report_id')
+                if case_id is None:
+                    continue
+                try:
+                    if case_id != current_id:
+                        new_report = self._new_report(case_id, row)
+                        if report is not None:
+                            yield report
+                        current_id, report = case_id, new_report
+                    patient = report['patient']
+                    self._merge(patient['drug'], self._drugs(row), 'medicinalproduct')
+                    self._merge(patient['reaction'], self._reactions(row), 'reactionmeddrapt')
+                except Exception as e:
+                    yield RejectedRecord(row, f"{type(e).__name__}: {e}", f"{partition.name}:{reader.line_num}")
+            if report is not None:
+                yield report
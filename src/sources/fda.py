@@ -0,0 +1,25 @@
+from typing import Dict, Any, Iterator, List, Optional
+
+from .base import SourceAdapter
+
+
+class FDASource(SourceAdapter):
+    """Rapports openFDA, une partition par médicament."""
+
+    name = 'openfda'
+    # Lecture limitée par le réseau et le quota : des threads partageant le limiteur de débit
+    parallel = 'thread'
+
+    def __init__(self, drugs: List[str], limit: int = 100, start_date: Optional[str] = None,
+                 end_date: Optional[str] = None):
+        self.drugs = [d.upper() for d in drugs]
+        self.limit = limit
+        self.start_date = start_date
+        self.end_date = end_date
+
+    def partitions(self) -> List[str]:
+        return list(self.drugs)
+
+    def read_raw(self, partition: str) -> Iterator[Dict[str, Any]]:
+        from ..etl.extract import Extractor
+        return iter(Extractor().extract_drug_reports(partition, self.limit, self.start_date, self.end_date))
@@ -0,0 +1,241 @@
+"""
+Ressources HL7 FHIR (R4/R5) `AdverseEvent`.
+
+Deux formes d'entrée :
+- fichiers JSON contenant un Bundle (ou une ressource isolée) : les références
+  (Patient, Medication, MedicationStatement...) sont résolues dans le Bundle ;
+- export « bulk data » NDJSON : une ressource par ligne, un fichier par type.
+  Les fichiers Patient*/Medication* sont lus une fois pour constituer un
+  dictionnaire de références, puis les fichiers AdverseEvent sont lus au fil
+  de l'eau (une partition par fichier).
+"""
+from datetime import date
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional
+
+from ..models import schemas
+from .base import RejectedRecord, SourceAdapter, compact, expand_paths, to_fda_date, to_fda_sex
+
+MEDDRA_SYSTEM = 'meddra'
+
+SERIOUSNESS = {'serious': '1', 'non-serious': '2'}
+# Codes FHIR adverse-event-outcome -> reactionoutcome openFDA
+OUTCOMES = {
+    'resolved': '1', 'recovering': '2', 'ongoing': '3',
+    'resolvedwithsequelae': '4', 'fatal': '5', 'unknown': '6',
+}
+# Ressources référencées depuis un AdverseEvent, conservées lors de la lecture NDJSON
+REFERENCE_TYPES = ('Patient', 'Medication', 'MedicationStatement', 'MedicationAdministration',
+                   'MedicationRequest', 'Substance')
+
+
+def concept_text(concept: Optional[Dict[str, Any]], prefer: Optional[str] = None) -> Optional[str]:
+    """Libellé d'un CodeableConcept (coding du système `prefer` en priorité, puis text)."""
+    if not isinstance(concept, dict):
+        return None
+    codings = [c for c in concept.get('coding') or [] if isinstance(c, dict)]
+    if prefer:
+        codings.sort(key=lambda c: prefer not in str(c.get('system', '')).lower())
+    for coding in codings:
+        if coding.get('display'):
+            return coding['display']
+    return concept.get('text') or (codings[0].get('code') if codings else None)
+
+
+def concept_code(concept: Optional[Dict[str, Any]]) -> Optional[str]:
+    if not isinstance(concept, dict):
+        return None
+    for coding in concept.get('coding') or []:
+        if isinstance(coding, dict) and coding.get('code'):
+            return str(coding['code'])
+    return None
+
+
+def _minimal(resource: Dict[str, Any]) -> Dict[str, Any]:
+    """Champs utiles d'une ressource référencée (limite la mémoire d'un export volumineux)."""
+    kind = resource.get('resourceType')
+    if kind == 'Patient':
+        return {'resourceType': kind, 'gender': resource.get('gender'), 'birthDate': resource.get('birthDate')}
+    keep = ('code', 'medicationCodeableConcept', 'medicationReference', 'medication', 'form', 'reasonCode',
+            'effectivePeriod', 'effectiveDateTime', 'contained')
+    return dict({'resourceType': kind}, **{k: resource[k] for k in keep if k in resource})
+
+
+def _age_years(birth: Optional[str], on: Optional[str]) -> Optional[int]:
+    try:
+        born = date.fromisoformat(str(birth)[:10])
+        when = date.fromisoformat(f"{on[:4]}-{on[4:6]}-{on[6:8]}") if on else date.today()
+    except (TypeError, ValueError):
+        return None
+    return when.year - born.year - ((when.month, when.day) < (born.month, born.day))
+
+
+class FHIRSource(SourceAdapter):
+    """Fichiers FHIR JSON (Bundle) ou NDJSON, une partition par fichier d'AdverseEvent."""
+
+    name = 'fhir'
+
+    def __init__(self, paths: List[str], id_prefix: str = 'fhir:'):
+        """
+        Args:
+            paths: Fichiers ou répertoires (.json, .ndjson)
+            id_prefix: Préfixe des identifiants (évite les collisions avec les safetyreportid openFDA)
+        """
+        self.paths = [str(p) for p in paths]
+        self.id_prefix = id_prefix
+        # Références des exports NDJSON, chargées par `partitions()` avant la lecture parallèle
+        self.references: Dict[str, Dict[str, Any]] = {}
+
+    @staticmethod
+    def _is_reference_file(path: Path) -> bool:
+        return path.suffix == '.ndjson' and path.name.split('.')[0] in REFERENCE_TYPES
+
+    def partitions(self) -> List[Path]:
+        files = expand_paths(self.paths, ['*.json', '*.ndjson'])
+        for path in files:
+            if self._is_reference_file(path):
+                skipped = 0
+                for resource in self._ndjson(path):
+                    if isinstance(resource, RejectedRecord):
+                        skipped += 1
+                    elif resource.get('resourceType') in REFERENCE_TYPES:
+                        self.references[f"{resource['resourceType']}/{resource.get('id')}"] = _minimal(resource)
+                if skipped:
+                    print(f"⚠️ {path.name}: {skipped} ligne(s) illisible(s) ignorée(s)")
+        return [p for p in files if not self._is_reference_file(p)]
+
+    @staticmethod
+    def _ndjson(path: Path) -> Iterator[Any]:
+        """Ressources d'un fichier NDJSON ; une ligne illisible donne un `RejectedRecord`."""
+        with open(path, 'rb') as f:
+            for number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    resource = schemas.loads(line)
+                except (schemas.DecodeError, ValueError) as e:
+                    resource = RejectedRecord(line.decode('utf-8', 'replace').rstrip(), f"JSON invalide: {e}")
+                if not isinstance(resource, (dict, RejectedRecord)):
+                    resource = RejectedRecord(resource, "ressource FHIR attendue (objet JSON)")
+                if isinstance(resource, RejectedRecord):
+                    resource.location = f"{path.name}:{number}"
+                yield resource
+
+    def _resources(self, path: Path) -> Iterator[Any]:
+        if path.suffix == '.ndjson':
+            yield from self._ndjson(path)
+            return
+        with open(path, 'rb') as f:
+            document = schemas.loads(f.read())
+        if document.get('resourceType') == 'Bundle':
+            for entry in document.get('entry') or []:
+                resource = entry.get('resource') if isinstance(entry, dict) else None
+                if isinstance(resource, dict):
+                    yield dict(resource, _fullUrl=entry.get('fullUrl'))
+        else:
+            yield document
+
+    def _convert(self, resource: Dict[str, Any], references: Dict[str, Dict[str, Any]], path: Path) -> Any:
+        try:
+            return self.to_raw(resource, references)
+        except Exception as e:
+            return RejectedRecord(resource, f"{type(e).__name__}: {e}",
+                                  f"{path.name}:AdverseEvent/{resource.get('id')}")
+
+    def read_raw(self, partition: Path) -> Iterator[Any]:
+        resources = self._resources(partition)
+        if partition.suffix == '.ndjson':
+            references = self.references
+            for resource in resources:
+                if isinstance(resource, RejectedRecord):
+                    yield resource
+                elif resource.get('resourceType') == 'AdverseEvent':
+                    yield self._convert(resource, references, partition)
+            return
+        # Bundle : toutes les entrées sont indexées avant la conversion des AdverseEvent
+        entries = list(resources)
+        references = dict(self.references)
+        for resource in entries:
+            key = f"{resource.get('resourceType')}/{resource.get('id')}"
+            references[key] = resource
+            if resource.get('_fullUrl'):
+                references[resource['_fullUrl']] = resource
+        for resource in entries:
+            if resource.get('resourceType') == 'AdverseEvent':
+                yield self._convert(resource, references, partition)
+
+    @staticmethod
+    def _resolve(reference: Optional[Dict[str, Any]], references: Dict[str, Dict[str, Any]],
+                 contained: Dict[str, Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if not isinstance(reference, dict) or not reference.get('reference'):
+            return None
+        ref = reference['reference']
+        if ref.startswith('#'):
+            return contained.get(ref[1:])
+        return references.get(ref) or references.get('/'.join(ref.split('/')[-2:]))
+
+    def _medication_name(self, resource: Optional[Dict[str, Any]], references, contained) -> Optional[str]:
+        if resource is None:
+            return None
+        contained = dict(contained, **{c.get('id'): c for c in resource.get('contained') or []})
+        kind = resource.get('resourceType')
+        if kind in ('Medication', 'Substance'):
+            return concept_text(resource.get('code'))
+        # MedicationStatement/Administration/Request : R4 medication[x], R5 medication (CodeableReference)
+        medication = resource.get('medication')
+        if isinstance(medication, dict):
+            return (concept_text(medication.get('concept'))
+                    or self._medication_name(self._resolve(medication.get('reference'), references, contained),
+                                             references, contained))
+        return (concept_text(resource.get('medicationCodeableConcept'))
+                or self._medication_name(self._resolve(resource.get('medicationReference'), references, contained),
+                                         references, contained))
+
+    def _drug(self, entity: Dict[str, Any], references, contained) -> Optional[Dict[str, Any]]:
+        # R4 : instance (Reference) ; R5 : instanceCodeableConcept / instanceReference
+        instance = entity.get('instance') or entity.get('instanceReference')
+        resource = self._resolve(instance, references, contained)
+        name = (concept_text(entity.get('instanceCodeableConcept'))
+                or self._medication_name(resource, references, contained)
+                or (instance or {}).get('display'))
+        if not name:
+            return None
+        drug = {'medicinalproduct': name}
+        if resource is not None:
+            period = resource.get('effectivePeriod') or {}
+            drug.update(compact({
+                'drugdosageform': concept_text(resource.get('form')),
+                'drugindication': concept_text((resource.get('reasonCode') or [None])[0]),
+                'drugstartdate': to_fda_date(period.get('start') or resource.get('effectiveDateTime')),
+                'drugenddate': to_fda_date(period.get('end')),
+            }))
+        return drug
+
+    def to_raw(self, event: Dict[str, Any], references: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Convertit un AdverseEvent en rapport brut au format openFDA."""
+        contained = {c.get('id'): c for c in event.get('contained') or []}
+        received = to_fda_date(event.get('recordedDate') or event.get('date') or event.get('detected'))
+        occurred = to_fda_date(event.get('date') or event.get('occurrenceDateTime')) or received
+        patient = self._resolve(event.get('subject'), references, contained) or {}
+        outcome = concept_code(event.get('outcome') if isinstance(event.get('outcome'), dict)
+                               else (event.get('outcome') or [None])[0])
+        # R4 : event (CodeableConcept) ; R5 : code
+        term = concept_text(event.get('event') or event.get('code'), prefer=MEDDRA_SYSTEM)
+        age = _age_years(patient.get('birthDate'), occurred)
+        drugs = [self._drug(entity, references, contained) for entity in event.get('suspectEntity') or []]
+        return compact({
+            'safetyreportid': f"{self.id_prefix}{event.get('id')}" if event.get('id') else None,
+            'receivedate': received,
+            'receiptdate': received,
+            'serious': SERIOUSNESS.get(concept_code(event.get('seriousness')) or ''),
+            'patient': compact({
+                'patientonsetage': str(age) if age is not None else None,
+                'patientonsetageunit': '801' if age is not None else None,
+                'patientsex': to_fda_sex(patient.get('gender')),
+                'drug': [d for d in drugs if d],
+                'reaction': [compact({
+                    'reactionmeddrapt': term,
+                    'reactionoutcome': OUTCOMES.get((outcome or '').lower()),
+                })] if term else [],
+            }),
+        })
@@ -0,0 +1,146 @@
+"""
+Lecture parallèle des partitions d'une source.
+
+Chaque worker (processus ou thread selon `source.parallel`) prend une
+partition, lit ses rapports bruts au fil de l'eau et, par lots de
+`batch_size`, les valide, les transforme et les dédoublonne. Les lots
+prêts à charger remontent au consommateur par une file bornée : un
+chargement lent ralentit la lecture au lieu d'accumuler les fichiers en
+mémoire.
+"""
+import multiprocessing as mp
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Any, Iterator, List, Optional
+
+from .base import RejectedRecord, SourceAdapter
+
+# Messages de la file de résultats
+BATCH = 'batch'
+DONE = 'done'
+EXIT = 'exit'
+
+
+@dataclass
+class SourceBatch:
+    """Lot transformé d'une partition."""
+    partition: str
+    records: List[Dict[str, Any]]
+    quarantined: List[Dict[str, Any]] = field(default_factory=list)
+    deduplicated: int = 0
+
+
+@dataclass
+class PartitionDone:
+    """Fin de lecture d'une partition."""
+    partition: str
+    extracted: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+
+def _process_chunk(source: SourceAdapter, label: str, raw: List[Dict[str, Any]], validator,
+                   rejected: Optional[List[Dict[str, Any]]] = None) -> SourceBatch:
+    from ..etl.dedup import Deduplicator
+    from ..etl.transform import Transformer
+
+    validation = validator.validate(raw)
+    records = [Transformer.transform_report(report, source.name) for report in validation.valid]
+    unique = Deduplicator().deduplicate(records)
+    return SourceBatch(label, unique, (rejected or []) + validation.quarantined, len(records) - len(unique))
+
+
+def _read_worker(source: SourceAdapter, tasks, results, batch_size: int) -> None:
+    """Boucle d'un worker : une partition après l'autre jusqu'à la sentinelle."""
+    from ..etl.normalize import load_vocabulary
+    from ..etl.validation import BatchValidator
+
+    if source.parallel == 'process':
+        # Processus `spawn` : le vocabulaire chargé par le processus principal n'est pas hérité
+        load_vocabulary()
+    validator = BatchValidator()
+    try:
+        while True:
+            partition = tasks.get()
+            if partition is None:
+                break
+            label = source.label(partition)
+            started = time.perf_counter()
+            done = PartitionDone(label)
+            chunk: List[Dict[str, Any]] = []
+            rejected: List[Dict[str, Any]] = []
+            try:
+                for report in source.read_raw(partition):
+                    done.extracted += 1
+                    if isinstance(report, RejectedRecord):
+                        rejected.append(report.quarantine_entry())
+                    else:
+                        chunk.append(report)
+                    if len(chunk) + len(rejected) >= batch_size:
+                        results.put((BATCH, _process_chunk(source, label, chunk, validator, rejected)))
+                        chunk, rejected = [], []
+            except Exception as e:
+                done.error = f"{type(e).__name__}: {e}"
+            # Les rapports déjà lus sont transmis même si la lecture s'est interrompue
+            if chunk or rejected:
+                try:
+                    results.put((BATCH, _process_chunk(source, label, chunk, validator, rejected)))
+                except Exception as e:
+                    done.error = done.error or f"{type(e).__name__}: {e}"
+            done.seconds = time.perf_counter() - started
+            results.put((DONE, done))
+    finally:
+        results.put((EXIT, None))
+
+
+def read_partitions(source: SourceAdapter, workers: int = 4, batch_size: int = 500,
+                    queue_size: int = 8) -> Iterator[Any]:
+    """
+    Lit toutes les partitions de `source` en parallèle.
+
+    Produit des `SourceBatch` (dans l'ordre d'arrivée, partitions entremêlées)
+    et un `PartitionDone` à la fin de chaque partition.
+    """
+    partitions = source.partitions()
+    if not partitions:
+        return
+    workers = max(1, min(workers, len(partitions)))
+    if source.parallel == 'process':
+        # `spawn` : comportement identique sous Linux, macOS et Windows
+        ctx = mp.get_context('spawn')
+        tasks, results = ctx.Queue(), ctx.Queue(maxsize=queue_size * workers)
+        start = ctx.Process
+    else:
+        tasks, results = queue.Queue(), queue.Queue(maxsize=queue_size * workers)
+        start = threading.Thread
+    for partition in partitions:
+        tasks.put(partition)
+    for _ in range(workers):
+        tasks.put(None)
+    handles = [start(target=_read_worker, args=(source, tasks, results, batch_size),
+                     name=f'{source.name}-reader-{i}', daemon=True) for i in range(workers)]
+    for handle in handles:
+        handle.start()
+
+    running = workers
+    try:
+        while running:
+            try:
+                kind, payload = results.get(timeout=1.0)
+            except queue.Empty:
+                # Un processus tué (mémoire, signal) n'enverra jamais EXIT
+                if not any(h.is_alive() for h in handles):
+                    raise RuntimeError(f"Workers de lecture {source.name} arrêtés avant la fin")
+                continue
+            if kind == EXIT:
+                running -= 1
+            else:
+                yield payload
+    finally:
+        # Consommateur interrompu (erreur de chargement) : les processus bloqués sur la file sont arrêtés
+        for handle in handles:
+            if running and isinstance(handle, mp.process.BaseProcess) and handle.is_alive():
+                handle.terminate()
+            handle.join(timeout=1.0)
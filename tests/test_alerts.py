@@ -0,0 +1,93 @@
+"""Tests des règles d'alerte et du service de surveillance."""
+import json
+import threading
+
+import pytest
+
+from src.alerts.rules import (SeriousOutcomeRule, SlidingWindowCounter, SpikeRule, ThresholdRule,
+                              load_rules)
+from src.alerts.service import AlertService
+
+
+def _report(report_id, drug='IBUPROFEN', reaction='Nausea', outcome='1', serious='2'):
+    return {'report_id': report_id, 'serious': serious,
+            'drugs': [{'name': f'{drug} 200MG', 'normalized_name': drug}],
+            'reactions': [{'term': reaction, 'outcome': outcome}]}
+
+
+def test_sliding_window_expires_old_buckets():
+    counter = SlidingWindowCounter(window=600, resolution=60)
+    counter.add('A', now=0)
+    counter.add('A', now=30, amount=2)
+    assert counter.add('A', now=300) == 4
+    assert counter.count('A', now=700) == 1
+    counter.prune(now=2000)
+    assert len(counter) == 0
+
+
+def test_threshold_fires_once_per_crossing():
+    rule = ThresholdRule('ibuprofen', threshold=3, reaction='nausea', window_minutes=10)
+    fired = [rule.evaluate(_report(str(i)), now=i) for i in range(5)]
+    assert [len(a) for a in fired] == [0, 0, 1, 0, 0]
+    assert fired[2][0].count == 3 and fired[2][0].key == 'IBUPROFEN / NAUSEA'
+    assert rule.evaluate(_report('x', reaction='Rash'), now=5) == []
+    # Retour sous le seuil puis nouveau franchissement : nouvelle alerte
+    assert rule.evaluate(_report('y'), now=2000) == []
+    assert len([rule.evaluate(_report(str(i)), now=2000 + i) for i in range(2)][-1]) == 1
+
+
+def test_serious_outcome_rule():
+    rule = SeriousOutcomeRule(drugs=['IBUPROFEN'], include_serious=True)
+    assert rule.evaluate(_report('1', outcome='5'), now=0)[0].message.startswith('décès')
+    assert rule.evaluate(_report('2', serious='1'), now=0)[0].message.startswith('rapport grave')
+    assert rule.evaluate(_report('3'), now=0) == []
+    assert rule.evaluate(_report('4', drug='ASPIRIN', outcome='5'), now=0) == []
+
+
+def test_spike_rule_compares_to_baseline():
+    rule = SpikeRule(short_minutes=60, baseline_hours=24, factor=3, min_count=5)
+    now = 100000.0
+    # Référence : un rapport par heure pendant 23 heures
+    for hour in range(23, 0, -1):
+        assert rule.evaluate(_report('b'), now=now - hour * 3600) == []
+    alerts = [a for i in range(6) for a in rule.evaluate(_report(str(i)), now=now + i)]
+    assert len(alerts) == 1 and alerts[0].key == 'IBUPROFEN' and alerts[0].count == 5
+
+
+def test_load_rules(tmp_path):
+    path = tmp_path / 'rules.json'
+    path.write_text(json.dumps([{'type': 'threshold', 'drug': 'ASPIRIN', 'threshold': 2},
+                                {'type': 'serious_outcome'}]), encoding='utf-8')
+    rules = load_rules(str(path))
+    assert [r.name for r in rules] == ['threshold', 'serious_outcome']
+    path.write_text(json.dumps([{'type': 'unknown'}]), encoding='utf-8')
+    with pytest.raises(ValueError):
+        load_rules(str(path))
+
+
+def test_service_emits_to_handlers_and_survives_errors():
+    class Broken(ThresholdRule):
+        def evaluate(self, report, now):
+            raise RuntimeError('boom')
+
+    received = []
+    service = AlertService(None, rules=[Broken('X', 1), SeriousOutcomeRule()], handlers=[received.append])
+    service.process(_report('1', outcome='5'), now=0)
+    service.process(_report('2'), now=1)
+    assert service.processed == 2 and service.alerts_emitted == 1
+    assert [a.report_id for a in received] == ['1']
+
+
+def test_polling_yields_only_new_reports():
+    mongomock = pytest.importorskip('mongomock')
+    collection = mongomock.MongoClient()['eim']['reports']
+    collection.insert_many([_report('1'), _report('2')])
+    service = AlertService(collection, poll_interval=0.01)
+    reports = service._poll()
+    # Inséré pendant l'interrogation : les rapports déjà présents au démarrage sont ignorés
+    threading.Timer(0.05, collection.insert_one, [_report('3')]).start()
+    assert next(reports)['report_id'] == '3'
+    collection.insert_one(_report('4'))
+    assert next(reports)['report_id'] == '4'
+    assert service.mode == 'polling'
+    service.stop()
@@ -0,0 +1,66 @@
+"""Tests de l'archive brute compressée et indexée."""
+import json
+
+from src.etl.archive import RawArchive, RawArchiveWriter
+
+
+def _reports(count, start=0):
+    return [{'safetyreportid': str(i), 'receivedate': f'202301{i % 28 + 1:02d}',
+             'patient': {'drug': [{'medicinalproduct': 'IBUPROFEN'}]}} for i in range(start, start + count)]
+
+
+def test_get_and_range(tmp_path):
+    writer = RawArchiveWriter(str(tmp_path), block_records=4, segment_records=10)
+    reports = _reports(30)
+    writer.add_many(reports)
+    updated = dict(reports[3], safetyreportversion='2')
+    writer.add_many([updated])
+    writer.close()
+
+    archive = RawArchive(str(tmp_path))
+    assert len(archive) == 31
+    assert archive.get('7') == reports[7]
+    # La version la plus récente d'un rapport est retournée
+    assert archive.get('3') == updated
+    assert archive.get('missing') is None
+    in_range = [r['safetyreportid'] for r in archive.iter_range('2023-01-01', '2023-01-03')]
+    assert in_range == ['0', '1', '2', '28', '29']
+    assert sum(archive.date_counts().values()) == 31
+    assert len(list(archive)) == 31
+
+
+def test_import_legacy_json_dump(tmp_path):
+    legacy = tmp_path / 'ibuprofen_raw_20230101_120000.json'
+    legacy.write_text(json.dumps(_reports(5), indent=2), encoding='utf-8')
+    writer = RawArchiveWriter(str(tmp_path / 'archive'))
+    assert writer.import_json(str(legacy)) == 5
+    writer.close()
+    assert RawArchive(str(tmp_path / 'archive')).get('4') == _reports(5)[4]
+
+
+def test_archive_is_smaller_than_pretty_json(tmp_path):
+    reports = _reports(500)
+    writer = RawArchiveWriter(str(tmp_path / 'archive'))
+    writer.add_many(reports)
+    writer.close()
+    archived = sum(p.stat().st_size for p in (tmp_path / 'archive').iterdir())
+    assert archived < len(json.dumps(reports, indent=2)) / 5
+
+
+def test_write_batch_returns_segments(tmp_path):
+    writer = RawArchiveWriter(str(tmp_path), block_records=4, segment_records=10)
+    segments = writer.write_batch(_reports(30))
+    writer.close()
+    assert len(segments) == 3 and all(s.startswith(str(tmp_path)) for s in segments)
+
+
+def test_get_after_refresh(tmp_path):
+    writer = RawArchiveWriter(str(tmp_path))
+    writer.write_batch([{'safetyreportid': 'a', 'receivedate': '20230101'}])
+    archive = RawArchive(str(tmp_path))
+    assert archive.get('b') is None
+    writer.write_batch([{'safetyreportid': 'b', 'receivedate': '20230102'}])
+    writer.close()
+    archive.refresh()
+    assert archive.get('b') == {'safetyreportid': 'b', 'receivedate': '20230102'}
+    assert archive.get('a') == {'safetyreportid': 'a', 'receivedate': '20230101'}
@@ -0,0 +1,22 @@
+"""Tests du générateur FAERS synthétique et du serveur openFDA simulé des benchmarks."""
+from benchmarks.mock_server import MockOpenFDAServer
+from benchmarks.synthetic import SyntheticFAERS
+from src.api.fda_client import FDAClient
+
+
+def test_generator_is_reproducible():
+    first = SyntheticFAERS(seed=7).reports(50)
+    assert first == SyntheticFAERS(seed=7).reports(50)
+    assert first != SyntheticFAERS(seed=8).reports(50)
+    assert len({r['safetyreportid'] for r in first}) == 50
+    assert all(r['patient']['drug'] and r['patient']['reaction'] for r in first)
+
+
+def test_fda_client_targets_mock_server():
+    with MockOpenFDAServer(n_reports=30, seed=3) as server:
+        client = FDAClient(base_url=server.base_url)
+        response = client.search_reports('IBUPROFEN', limit=5)
+        assert response['meta']['results']['total'] == 30
+        assert [r['safetyreportid'] for r in response['results']] == \
+            [r['safetyreportid'] for r in server.reports[:5]]
+        assert server.requests_served == 1
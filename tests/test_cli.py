@@ -0,0 +1,74 @@
+"""Tests de l'exécution du pipeline en ligne de commande (serveur openFDA simulé)."""
+import json
+
+import pytest
+
+from benchmarks.mock_server import MockOpenFDAServer
+from src import cli
+from src.api.fda_client import FDAClient
+
+
+@pytest.fixture
+def openfda(monkeypatch, tmp_path):
+    # Fichiers produits par l'exécution (sorties, données annexes) dans un dossier temporaire
+    monkeypatch.chdir(tmp_path)
+    with MockOpenFDAServer(n_reports=250, seed=9) as server:
+        monkeypatch.setenv('OPENFDA_BASE_URL', server.base_url)
+        yield server
+
+
+def test_drug_search_and_drug_list(tmp_path):
+    assert FDAClient.drug_search('ibuprofen') == 'patient.drug.medicinalproduct:"IBUPROFEN"'
+    assert FDAClient.drug_search('aspirin', '2023-01-01') == \
+        'patient.drug.medicinalproduct:"ASPIRIN" AND receivedate:[20230101 TO 29991231]'
+    path = tmp_path / 'drugs.txt'
+    path.write_text('ibuprofen\n# commentaire\n\nAspirin  # antalgique\nIBUPROFEN\n', encoding='utf-8')
+    assert cli.read_drug_list(str(path)) == ['IBUPROFEN', 'ASPIRIN']
+
+
+def test_get_drug_reports_pages_with_skip(openfda):
+    reports = FDAClient(base_url=openfda.base_url).get_drug_reports('IBUPROFEN', limit=230)
+    assert [r['safetyreportid'] for r in reports] == [r['safetyreportid'] for r in openfda.reports[:230]]
+    assert openfda.requests_served == 3
+
+
+def test_main_writes_jsonl_and_summary(openfda, tmp_path):
+    output, summary = tmp_path / 'out.jsonl', tmp_path / 'run.json'
+    code = cli.main(['--drug', 'ibuprofen', '--drug', 'aspirin', '--limit', '120', '--workers', '2',
+                     '--batch-size', '50', '--backend', 'jsonl', '--output', str(output),
+                     '--summary-json', str(summary)])
+    assert code == 0
+    totals = json.loads(summary.read_text(encoding='utf-8'))
+    assert totals['drugs'] == 2 and totals['failed'] == 0 and totals['extracted'] == 240
+    lines = output.read_text(encoding='utf-8').splitlines()
+    assert len(lines) == totals['loaded'] > 0
+    assert [r['drug'] for r in totals['results']] == ['IBUPROFEN', 'ASPIRIN']
+
+
+def test_main_rejects_bad_arguments(capsys):
+    with pytest.raises(SystemExit):
+        cli.main([])
+    with pytest.raises(SystemExit):
+        cli.main(['--drug', 'x', '--start-date', '2023-02-01', '--end-date', '2023-01-01'])
+    with pytest.raises(SystemExit):
+        cli.main(['--drug', 'x', '--start-date', '2023-13-01'])
+
+
+def test_report_shared_by_two_drugs_is_loaded_once(openfda, tmp_path):
+    # Le serveur simulé renvoie les mêmes rapports quel que soit le médicament
+    summary = tmp_path / 'run.json'
+    cli.main(['--drug', 'ibuprofen', '--drug', 'aspirin', '--limit', '50', '--workers', '1',
+              '--backend', 'none', '--summary-json', str(summary)])
+    results = json.loads(summary.read_text(encoding='utf-8'))['results']
+    assert results[0]['loaded'] > 0
+    # Tous les rapports d'ASPIRIN ont déjà été traités pour IBUPROFEN
+    assert results[1]['loaded'] == 0
+    assert results[1]['deduplicated'] == results[1]['extracted'] - results[1]['quarantined']
+
+
+def test_skip_cap_is_reported(openfda, monkeypatch, capsys):
+    from src.api import fda_client
+    monkeypatch.setattr(fda_client, 'MAX_SKIP', 100)
+    reports = FDAClient(base_url=openfda.base_url).get_drug_reports('IBUPROFEN', limit=200)
+    assert len(reports) == 100
+    assert 'limite de pagination' in capsys.readouterr().out
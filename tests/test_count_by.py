@@ -0,0 +1,98 @@
+"""Tests des agrégations count_by, du limiteur de débit et du cache de réponses openFDA."""
+import json
+import time
+
+from src.api.cache import RateLimiter, TTLCache
+from src.api.fda_client import FDAClient
+from src.api.projection import FieldSet
+
+
+class _Response:
+    def __init__(self, payload):
+        self.content = json.dumps(payload).encode()
+
+
+class _StubClient(FDAClient):
+    """Client dont les requêtes HTTP sont remplacées par des réponses fixes."""
+
+    def __init__(self, payload, **kwargs):
+        super().__init__(base_url='http://openfda.test/drug/event.json', **kwargs)
+        self.payload = payload
+        self.sent = []
+
+    def _send_request(self, endpoint='', params=None):
+        self.sent.append(params)
+        return _Response(self.payload)
+
+
+COUNTS = {'meta': {}, 'results': [{'term': 'NAUSEA', 'count': 120}, {'term': 'HEADACHE', 'count': 80}]}
+
+
+def test_count_by_parameters_and_cache():
+    client = _StubClient(COUNTS, cache=TTLCache(maxsize=8, ttl=60))
+    search = 'patient.drug.medicinalproduct:"IBUPROFEN"'
+    assert client.count_by('patient.reaction.reactionmeddrapt.exact', search, limit=5000) == COUNTS['results']
+    assert client.sent == [{'count': 'patient.reaction.reactionmeddrapt.exact', 'limit': 1000, 'search': search}]
+    # Même agrégation : servie par le cache, sans nouvelle requête
+    client.count_by('patient.reaction.reactionmeddrapt.exact', search, limit=5000)
+    assert len(client.sent) == 1
+    client.count_by('receivedate', search)
+    assert len(client.sent) == 2
+
+
+REPORTS = {'meta': {'results': {'total': 2}},
+           'results': [{'safetyreportid': '1', 'serious': '1', 'patient': {'patientsex': '2'}},
+                       {'safetyreportid': '2', 'serious': '2', 'patient': {'patientsex': '1'}}]}
+
+
+def test_report_pages_are_not_cached():
+    cache = TTLCache(maxsize=8, ttl=60)
+    client = _StubClient(REPORTS, cache=cache)
+    client.get_drug_reports('ibuprofen', limit=2)
+    client.get_drug_reports('ibuprofen', limit=2)
+    client.search_reports('patient.drug.medicinalproduct:"IBUPROFEN"', limit=2)
+    assert len(client.sent) == 3 and len(cache) == 0
+
+
+def test_search_cache_is_opt_in_and_keeps_projected_payload():
+    cache = TTLCache(maxsize=8, ttl=60)
+    client = _StubClient(REPORTS, cache=cache)
+    fields = FieldSet(['safetyreportid'])
+    first = client.search_reports('x', limit=2, fields=fields, cache=True)
+    assert client.search_reports('x', limit=2, fields=fields, cache=True) is first
+    assert len(client.sent) == 1
+    # Seule la réponse projetée est conservée
+    [cached] = [value for _, value in cache._data.values()]
+    assert cached['results'] == [{'safetyreportid': '1'}, {'safetyreportid': '2'}]
+    # Une autre projection n'est pas servie par la même entrée
+    assert client.search_reports('x', limit=2, cache=True)['results'][0]['serious'] == '1'
+    assert len(client.sent) == 2
+
+
+def test_count_by_error_returns_empty_list():
+    class Failing(_StubClient):
+        def _send_request(self, endpoint='', params=None):
+            return None
+
+    assert Failing(COUNTS, cache=TTLCache(maxsize=8, ttl=60)).count_by('receivedate') == []
+
+
+def test_ttl_cache_expiry_and_lru():
+    cache = TTLCache(maxsize=2, ttl=0.05)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+    assert cache.get('b') is None and cache.get('a') == 1 and len(cache) == 2
+    time.sleep(0.06)
+    assert cache.get('a') is None
+
+
+def test_rate_limiter_blocks_over_quota():
+    limiter = RateLimiter(max_calls=3, period=0.2)
+    started = time.monotonic()
+    for _ in range(3):
+        limiter.acquire()
+    assert time.monotonic() - started < 0.1
+    limiter.acquire()
+    assert time.monotonic() - started >= 0.19
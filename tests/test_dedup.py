@@ -0,0 +1,38 @@
+"""Tests du dédoublonnage des rapports (versions de suivi et quasi-doublons)."""
+from src.etl.dedup import Deduplicator
+
+
+def _report(report_id, drugs=('IBUPROFEN', 'ASPIRIN'), reactions=('Headache', 'Nausea'),
+            received='20230105', version='1'):
+    return {
+        'report_id': report_id,
+        'report_version': version,
+        'received_date': received,
+        'receipt_date': received,
+        'patient': {'age': '54', 'age_unit': '801', 'sex': '2'},
+        'drugs': [{'name': name, 'normalized_name': name} for name in drugs],
+        'reactions': [{'term': term} for term in reactions],
+    }
+
+
+def test_dedup_keeps_latest_follow_up():
+    reports = [_report('1', version='1'), _report('1', version='3', reactions=('Rash',)), _report('1', version='2')]
+    kept = Deduplicator().deduplicate(reports)
+    assert [r['report_version'] for r in kept] == ['3']
+
+
+def test_dedup_clusters_near_duplicates():
+    original = _report('10', received='20230105')
+    resubmitted = _report('11', received='20230105')
+    # Même cas transmis par un autre déclarant, reçu plus tard : seule la version récente est gardée
+    resubmitted['receipt_date'] = '20230110'
+    other = _report('12', drugs=('METFORMIN',), reactions=('Lactic acidosis', 'Vomiting'), received='20220301')
+    deduplicator = Deduplicator()
+    kept = deduplicator.deduplicate([original, resubmitted, other])
+    assert sorted(r['report_id'] for r in kept) == ['11', '12']
+    assert deduplicator.stats['near_duplicates_removed'] == 1
+
+
+def test_dedup_ignores_sparse_reports():
+    sparse = [{'report_id': str(i), 'drugs': [{'name': 'IBUPROFEN'}]} for i in range(5)]
+    assert len(Deduplicator().deduplicate(sparse)) == 5
@@ -0,0 +1,97 @@
+"""Tests de l'export en flux des rapports stockés."""
+import csv
+import json
+
+import pytest
+
+mongomock = pytest.importorskip('mongomock')
+pymongo = pytest.importorskip('pymongo')
+
+from src.database.export import date_range_query, flatten, write_reports  # noqa: E402
+from src.database.mongodb import MongoDBClient  # noqa: E402
+
+
+def _report(report_id, received_date, drug, reaction):
+    return {'report_id': report_id, 'received_date': received_date, 'serious': '1',
+            'patient': {'age': '42', 'sex': '2'},
+            'drugs': [{'name': drug, 'normalized_name': drug, 'active_ingredients': ['B', 'A']}],
+            'reactions': [{'term': reaction, 'outcome': '1'}]}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    server = mongomock.MongoClient()
+    monkeypatch.setattr(pymongo, 'MongoClient', lambda *args, **kwargs: server)
+    client = MongoDBClient(cache_size=0)
+    assert client.connect()
+    for report in (_report('1', '20230110', 'ASPIRIN', 'Nausea'),
+                   _report('2', '2023-06-01T00:00:00', 'ASPIRIN', 'Rash'),
+                   _report('3', '20240101', 'IBUPROFEN', 'Nausea')):
+        assert client.insert_report(report)
+    return client
+
+
+def test_filters_use_vocabularies_and_both_date_formats(client):
+    ids = lambda **filters: sorted(r['report_id'] for r in client.iter_reports(**filters))
+    assert ids() == ['1', '2', '3']
+    assert ids(drug='aspirin') == ['1', '2']
+    assert ids(reaction='nausea') == ['1', '3']
+    assert ids(start_date='20230501', end_date='20230601') == ['2']
+    assert ids(drug='metformin') == []
+    # Un nom inconnu n'est pas ajouté au vocabulaire
+    assert client.drug_vocab.lookup('METFORMIN') is None
+    report = next(client.iter_reports(drug='ibuprofen'))
+    assert '_id' not in report and 'drug_ids' not in report
+
+
+def test_date_range_query():
+    assert date_range_query('received_date') == {}
+    query = date_range_query('received_date', end_date='20231231')
+    assert query['$or'][1]['received_date']['$lte'] > '2023-12-31T23:59:59'
+
+
+@pytest.mark.parametrize('file_format', ['ndjson', 'csv', 'parquet'])
+def test_export_formats(client, tmp_path, file_format):
+    if file_format == 'parquet':
+        pytest.importorskip('pyarrow')
+    path = tmp_path / f'export.{file_format}'
+    assert client.export_reports(str(path), file_format, batch_size=2, drug='aspirin') == 2
+    if file_format == 'ndjson':
+        rows = [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+        assert rows[0]['drugs'][0]['name'] == 'ASPIRIN'
+    elif file_format == 'csv':
+        with open(path, newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+        assert rows[0]['active_ingredients'] == 'A | B'
+    else:
+        import pyarrow.parquet as pq
+        rows = pq.read_table(str(path)).to_pylist()
+        assert rows[0]['patient_age'] == 42.0
+    assert sorted(r['report_id'] for r in rows) == ['1', '2']
+
+
+def test_flatten_and_unknown_format():
+    row = flatten({'report_id': '9', 'reactions': [{'term': 'A'}, {'term': None}]})
+    assert row['reactions'] == 'A' and row['drugs'] == ''
+    with pytest.raises(ValueError):
+        write_reports([], '-', 'xml')
+
+
+def test_main_reads_the_pipeline_collection(monkeypatch, tmp_path):
+    from src.database import export
+    from src.database.mongodb import DEFAULT_COLLECTION, DEFAULT_DATABASE
+
+    server = mongomock.MongoClient()
+    monkeypatch.setattr(pymongo, 'MongoClient', lambda *args, **kwargs: server)
+    monkeypatch.delenv('DATABASE_NAME', raising=False)
+    monkeypatch.delenv('REPORTS_PARTITIONED', raising=False)
+    server[DEFAULT_DATABASE][DEFAULT_COLLECTION].insert_one(_report('1', '20230110', 'ASPIRIN', 'Nausea'))
+    server['eim']['reports'].insert_one(_report('9', '20230110', 'METFORMIN', 'Rash'))
+    output = tmp_path / 'reports.ndjson'
+    monkeypatch.setattr('sys.argv', ['export', '--output', str(output)])
+    export.main()
+    assert [json.loads(line)['report_id'] for line in output.read_text().splitlines()] == ['1']
+    # Autre collection : --db / --collection
+    monkeypatch.setattr('sys.argv', ['export', '--output', str(output), '--db', 'eim', '--collection', 'reports'])
+    export.main()
+    assert [json.loads(line)['report_id'] for line in output.read_text().splitlines()] == ['9']
@@ -0,0 +1,47 @@
+"""Budget de temps d'import des modules du projet (interpréteur neuf pour chaque module)."""
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Les modules du projet ne doivent ni faire d'E/S ni charger les dépendances
+# lourdes tant qu'elles ne servent pas
+IMPORT_BUDGET_SECONDS = 0.25
+HEAVY_MODULES = ['pymongo', 'pandas', 'numpy', 'requests', 'dotenv', 'streamlit', 'pyarrow']
+MODULES = [
+    'src.api.fda_client',
+    'src.database',
+    'src.database.mongodb',
+    'src.etl',
+    'src.etl.transform',
+    'src.alerts',
+    'src.analytics',
+    'src.cli',
+    'src.sources',
+]
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(elapsed, ','.join(heavy))
+"""
+
+
+@pytest.mark.parametrize('module', MODULES)
+def test_import_is_cheap(module):
+    result = subprocess.run(
+        [sys.executable, '-c', PROBE.format(module=module, heavy=HEAVY_MODULES)],
+        capture_output=True, text=True, cwd=ROOT
+    )
+    assert result.returncode == 0, result.stderr
+    *output, last = result.stdout.strip().splitlines()
+    elapsed, _, heavy = last.partition(' ')
+    assert not output, f"sortie à l'import: {output}"
+    assert heavy == '', f"dépendances chargées: {heavy}"
+    assert float(elapsed) <= IMPORT_BUDGET_SECONDS, f"{float(elapsed) * 1000:.1f} ms"
@@ -0,0 +1,94 @@
+"""Tests de la recherche de signaux d'interaction médicamenteuse."""
+import random
+
+from src.analytics.interactions import BoundedCounter, InteractionMiner, omega
+
+
+def _report(drugs, reactions):
+    return {'drugs': [{'name': d} for d in drugs], 'reactions': [{'term': r} for r in reactions]}
+
+
+def _reports(seed=3):
+    # WARFARIN + ASPIRIN : hémorragies bien plus fréquentes qu'avec chacun des deux seuls
+    rng = random.Random(seed)
+    others = [f'DRUG{i}' for i in range(30)]
+    reports = []
+    for _ in range(300):
+        reports.append(_report(['WARFARIN', rng.choice(others)], ['Nausea']))
+        reports.append(_report(['ASPIRIN', rng.choice(others)], ['Headache']))
+        reports.append(_report(rng.sample(others, 3), [rng.choice(['Nausea', 'Rash', 'Haemorrhage'])]))
+    for i in range(60):
+        reports.append(_report(['WARFARIN', 'ASPIRIN'], ['Haemorrhage'] if i % 4 else ['Nausea']))
+    rng.shuffle(reports)
+    return reports
+
+
+def test_omega_against_independence():
+    expected, value, lower = omega(observed=40, n_pair=60, f10=0.05, f01=0.05, f00=0.05)
+    assert 2.5 < expected < 3.5
+    assert value > 3 and lower < value
+    assert omega(observed=3, n_pair=60, f10=0.05, f01=0.05, f00=0.05)[1] < 0.5
+
+
+def test_interaction_signal_ranks_first():
+    miner = InteractionMiner()
+    assert miner.add_reports(_reports()) == 960
+    [top] = miner.signals(min_count=5, top=1)
+    assert (top['drug_a'], top['drug_b'], top['reaction']) == ('ASPIRIN', 'WARFARIN', 'HAEMORRHAGE')
+    assert top['observed'] == 45 and top['pair_reports'] == 60
+    assert top['omega_lower'] > 1
+
+
+def test_bounded_counter_keeps_heavy_hitters():
+    counter = BoundedCounter(capacity=50)
+    rng = random.Random(0)
+    for i in range(5000):
+        counter.add('frequent' if i % 5 == 0 else f'rare{rng.randrange(10000)}')
+    assert len(counter) <= 50
+    assert counter['frequent'] >= 1000 - counter.error
+    assert counter.pruned > 0
+
+
+def test_small_capacity_still_finds_signal():
+    miner = InteractionMiner(pair_capacity=200, triple_capacity=400)
+    miner.add_reports(_reports())
+    stats = miner.stats()
+    assert stats['pairs_tracked'] <= 200 and stats['pair_reactions_tracked'] <= 400
+    signals = miner.signals(min_count=5, top=3)
+    assert ('ASPIRIN', 'WARFARIN', 'HAEMORRHAGE') in {(s['drug_a'], s['drug_b'], s['reaction']) for s in signals}
+
+
+def test_error_accumulates_over_prunes():
+    counter = BoundedCounter(capacity=4)
+    for key in 'abcde':
+        counter.add(key, 2)
+    first = counter.error
+    for key in 'fghij':
+        counter.add(key, 3)
+    assert counter.error > first > 0
+
+
+def test_pruned_pair_takes_its_triples():
+    miner = InteractionMiner(pair_capacity=3, triple_capacity=1000)
+    for i in range(10):
+        miner.add_report(_report(['A', f'B{i}'], ['Nausea', 'Rash']))
+    tracked_pairs = {pair for pair, _ in miner.pairs.items()}
+    assert {pair for (pair, _), _ in miner.pair_reactions.items()} <= tracked_pairs
+    assert all(count <= miner.pairs[pair] for (pair, _), count in miner.pair_reactions.items())
+
+
+def test_prune_with_tied_counts_keeps_half():
+    counter = BoundedCounter(capacity=4)
+    for key in 'abcde':
+        counter.add(key)
+    assert len(counter) == 3 and counter.pruned == 2
+    assert counter.error == 1
+
+
+def test_drug_reactions_are_bounded():
+    miner = InteractionMiner(drug_reaction_capacity=20)
+    miner.add_reports(_reports())
+    stats = miner.stats()
+    assert stats['drug_reactions_tracked'] <= 20 and stats['drug_reactions_pruned'] > 0
+    # Les couples fréquents restent suivis
+    assert miner.drug_reactions[('WARFARIN', 'NAUSEA')] >= 300 - miner.drug_reactions.error
@@ -0,0 +1,43 @@
+"""Tests du chargement MongoDB du pipeline ETL."""
+import pytest
+
+mongomock = pytest.importorskip('mongomock')
+pymongo = pytest.importorskip('pymongo')
+
+from src.database.mongodb import MongoDBClient  # noqa: E402
+from src.etl.load import MongoDBLoader  # noqa: E402
+
+
+def _reports():
+    return [{'report_id': str(i), 'received_date': date, 'drugs': [{'name': 'ASPIRIN'}],
+             'reactions': [{'term': 'Nausea'}]}
+            for i, date in enumerate(['20220101', '20220505', '2023-02-01', None])]
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = mongomock.MongoClient()
+    monkeypatch.setattr(pymongo, 'MongoClient', lambda *args, **kwargs: server)
+    return server
+
+
+def test_replayed_batch_is_not_counted_twice(server):
+    loader = MongoDBLoader('mongodb://test', 'eim_platform', partitioned=False)
+    assert loader.insert_batch(_reports()) == 4
+    assert loader.insert_batch(_reports()) == 0
+    assert server['eim_platform']['adverse_events'].count_documents({}) == 4
+
+
+def test_partitioned_loader_routes_by_year(server):
+    loader = MongoDBLoader('mongodb://test', 'eim_platform', partitioned=True)
+    assert loader.insert_batch(_reports()) == 4
+    db = server['eim_platform']
+    assert db['adverse_events_2022'].count_documents({}) == 2
+    assert db['adverse_events_unknown'].count_documents({}) == 1
+    assert 'adverse_events' not in db.list_collection_names()
+    # Les rapports chargés sont lus par MongoDBClient sur les mêmes partitions
+    client = MongoDBClient('mongodb://test', 'eim_platform', cache_size=0, partitioned=True,
+                           collection='adverse_events')
+    assert client.connect()
+    assert client.count_reports() == 4
+    assert [r['report_id'] for r in client.iter_reports(drug='aspirin', start_date='20230101')] == ['2']
@@ -0,0 +1,85 @@
+"""Tests de la hiérarchie MedDRA et de l'annotation des réactions."""
+import pytest
+
+from src.etl.meddra import MeddraHierarchy, set_meddra_hierarchy
+from src.etl.transform import Transformer
+
+HIERARCHY_CSV = (
+    'pt,hlt,hlgt,soc,primary\n'
+    'Headache,Headaches NEC,Headaches,Nervous system disorders,Y\n'
+    'Migraine,Migraine headaches,Headaches,Nervous system disorders,Y\n'
+    'Nausea,Nausea and vomiting symptoms,Gastrointestinal signs,Gastrointestinal disorders,Y\n'
+    'Hepatitis,Hepatic inflammations,Hepatic disorders,Infections and infestations,N\n'
+    'Hepatitis,Hepatic inflammations,Hepatic disorders,Hepatobiliary disorders,Y\n'
+)
+
+
+@pytest.fixture
+def hierarchy(tmp_path):
+    path = tmp_path / 'meddra.csv'
+    path.write_text(HIERARCHY_CSV, encoding='utf-8')
+    return MeddraHierarchy.from_file(str(path))
+
+
+def test_rollup_by_level(hierarchy):
+    codes = [hierarchy.pt_code(t) for t in ('headache', 'Migraine', 'Nausea', 'Unknown term')]
+    assert codes[-1] == -1
+    socs = hierarchy.rollup(codes, 'soc')
+    assert [hierarchy.name('soc', c) for c in socs] == [
+        'Nervous system disorders', 'Nervous system disorders', 'Gastrointestinal disorders', None]
+    hlgts = hierarchy.rollup(codes, 'hlgt')
+    assert hierarchy.name('hlgt', hlgts[0]) == hierarchy.name('hlgt', hlgts[1]) == 'Headaches'
+    assert hierarchy.rollup(codes, 'pt') == codes
+    with pytest.raises(ValueError):
+        hierarchy.rollup(codes, 'llt')
+
+
+def test_primary_soc_wins(hierarchy):
+    annotation = hierarchy.annotate('Hepatitis')
+    assert annotation['soc'] == 'Hepatobiliary disorders'
+    assert annotation['hlt'] == 'Hepatic inflammations'
+
+
+def test_transform_annotates_reactions(hierarchy):
+    set_meddra_hierarchy(hierarchy)
+    try:
+        report = {'safetyreportid': '1', 'patient': {
+            'drug': [{'medicinalproduct': 'IBUPROFEN'}],
+            'reaction': [{'reactionmeddrapt': 'Migraine'}, {'reactionmeddrapt': 'Nausea'}],
+        }}
+        reactions = Transformer.transform_report(report)['reactions']
+    finally:
+        set_meddra_hierarchy(None)
+    assert [r['soc'] for r in reactions] == ['Nervous system disorders', 'Gastrointestinal disorders']
+    assert reactions[0]['pt_code'] == hierarchy.pt_code('Migraine')
+
+
+def test_first_path_kept_without_primary_column(tmp_path):
+    path = tmp_path / 'meddra.csv'
+    path.write_text('pt,hlt,hlgt,soc\n'
+                    'Hepatitis,Hepatic inflammations,Hepatic disorders,Hepatobiliary disorders\n'
+                    'Hepatitis,Viral hepatitis,Viral infections,Infections and infestations\n', encoding='utf-8')
+    hierarchy = MeddraHierarchy.from_file(str(path))
+    assert hierarchy.annotate('Hepatitis')['soc'] == 'Hepatobiliary disorders'
+    hierarchy.add('Hepatitis', 'Viral hepatitis', 'Viral infections', 'Infections and infestations')
+    assert hierarchy.annotate('Hepatitis')['soc'] == 'Hepatobiliary disorders'
+
+
+def test_unknown_levels_are_omitted(hierarchy):
+    assert hierarchy.annotate('Unknown term') == {}
+    hierarchy.add('Rash')
+    annotation = hierarchy.annotate('Rash')
+    assert annotation == {'pt_code': hierarchy.pt_code('Rash')}
+
+
+def test_transform_skips_annotation_without_hierarchy():
+    set_meddra_hierarchy(MeddraHierarchy())
+    try:
+        report = {'safetyreportid': '1', 'patient': {
+            'drug': [{'medicinalproduct': 'IBUPROFEN'}],
+            'reaction': [{'reactionmeddrapt': 'Nausea', 'reactionoutcome': '1'}],
+        }}
+        reactions = Transformer.transform_report(report)['reactions']
+    finally:
+        set_meddra_hierarchy(None)
+    assert reactions == [{'term': 'Nausea', 'outcome': '1'}]
@@ -0,0 +1,64 @@
+"""Tests du cache de lecture de MongoDBClient."""
+import pytest
+
+mongomock = pytest.importorskip('mongomock')
+pymongo = pytest.importorskip('pymongo')
+
+from src.database.mongodb import MongoDBClient, _cached_projection  # noqa: E402
+
+
+@pytest.fixture
+def client(monkeypatch):
+    server = mongomock.MongoClient()
+    monkeypatch.setattr(pymongo, 'MongoClient', lambda *args, **kwargs: server)
+    client = MongoDBClient()
+    assert client.connect()
+    for i in range(3):
+        assert client.insert_report({'report_id': str(i), 'serious': '1',
+                                     'patient': {'sex': 'F', 'age': 40 + i},
+                                     'drugs': [{'name': 'ASPIRIN'}], 'reactions': [{'term': 'Nausea'}]})
+    return client
+
+
+def test_get_reports_keeps_requested_order_and_caches(client):
+    reports = client.get_reports(['2', 'missing', '0', '2'])
+    assert [r['report_id'] for r in reports] == ['2', '0']
+    assert (client.cache_hits, client.cache_misses) == (0, 3)
+    assert client.get_report('0')['patient']['age'] == 40
+    assert client.cache_hits == 1
+
+
+def test_projection_is_applied_to_cached_documents(client):
+    client.get_reports(['1'])
+    projected = client.get_report('1', {'patient.age': 1, '_id': 0})
+    assert projected == {'patient': {'age': 41}}
+    assert client.cache_hits == 1
+    # Projection par exclusion : lecture directe en base
+    excluded = client.get_report('1', {'patient': 0, '_id': 0})
+    assert 'patient' not in excluded and excluded['report_id'] == '1'
+    assert client.cache_hits == 1
+
+
+def test_id_only_exclusion_returns_whole_cached_document(client):
+    assert _cached_projection({'_id': 0}) == (None, False)
+    client.get_reports(['1'])
+    document = client.get_report('1', {'_id': 0})
+    assert '_id' not in document and document['patient'] == {'sex': 'F', 'age': 41}
+    assert client.cache_hits == 1
+    # Le document mis en cache garde son `_id`
+    assert '_id' in client.get_report('1')
+
+
+def test_writes_invalidate_the_cache(client):
+    client.get_report('0')
+    assert client.upsert_report({'report_id': '0', 'serious': '2', 'drugs': [], 'reactions': []})
+    assert client.get_report('0')['serious'] == '2'
+    assert client.delete_report('0')
+    assert client.get_report('0') is None
+
+
+def test_cache_can_be_disabled(client):
+    uncached = MongoDBClient(cache_size=0)
+    assert uncached.connect()
+    assert uncached.get_report('1', ['report_id'])['report_id'] == '1'
+    assert uncached.cache is None and uncached.cache_misses == 0
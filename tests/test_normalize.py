@@ -0,0 +1,81 @@
+"""Tests de la normalisation des noms de médicaments."""
+from src.etl.normalize import DrugNormalizer, clean_product_name, load_vocabulary, save_vocabulary
+from src.etl.transform import Transformer
+
+
+def test_clean_product_name_drops_dosage_and_form():
+    assert clean_product_name('Ibuprofen 200mg Tablets') == 'IBUPROFEN'
+    assert clean_product_name('ADVIL (ibuprofen) oral suspension 100 MG/5ML') == 'ADVIL IBUPROFEN'
+    assert clean_product_name(None) == ''
+
+
+def test_openfda_ingredient_is_learned():
+    normalizer = DrugNormalizer()
+    openfda = {'substance_name': ['IBUPROFEN']}
+    assert normalizer.normalize('ADVIL LIQUI-GELS', openfda) == 'IBUPROFEN'
+    # Les rapports suivants sans bloc openfda profitent de la correspondance apprise
+    assert normalizer.normalize('Advil Liqui-Gels 200 mg') == 'IBUPROFEN'
+    assert normalizer.normalize('ADVIL LIQUI GEL') == 'IBUPROFEN'
+
+
+def test_unknown_name_falls_back_to_cleaned_key():
+    normalizer = DrugNormalizer({'TYLENOL': 'ACETAMINOPHEN'})
+    assert normalizer.normalize('TYLENOL 500MG') == 'ACETAMINOPHEN'
+    assert normalizer.normalize('Metformin ER 500 mg') == 'METFORMIN'
+    assert normalizer.normalize('') is None
+
+
+def test_canonical_ingredient_is_never_redirected():
+    normalizer = DrugNormalizer({'ASPIRIN': 'ASPIRIN'})
+    normalizer.learn('ASPIRIN', 'ACETYLSALICYLIC ACID')
+    assert normalizer.normalize('ASPIRIN') == 'ASPIRIN'
+    assert normalizer.normalize('ACETYLSALICYLIC ACID') == 'ACETYLSALICYLIC ACID'
+
+
+def test_vocabulary_round_trip(tmp_path):
+    normalizer = DrugNormalizer({'TYLENOL': 'ACETAMINOPHEN', 'ADVIL': 'IBUPROFEN'})
+    path = normalizer.save(str(tmp_path / 'vocab.csv'))
+    reloaded = DrugNormalizer.from_file(path)
+    assert len(reloaded) == len(normalizer)
+    assert reloaded.normalize('advil') == 'IBUPROFEN'
+
+
+def test_learning_keeps_cached_matches():
+    normalizer = DrugNormalizer({'ADVIL LIQUI-GELS': 'IBUPROFEN'})
+    assert normalizer.normalize('ADVIL LIQUI GEL') == 'IBUPROFEN'
+    assert normalizer.normalize('TYLENOL EXTRA') == 'TYLENOL EXTRA'
+    normalizer.learn('TYLENOL', 'ACETAMINOPHEN')
+    assert normalizer._fuzzy.get(clean_product_name('ADVIL LIQUI GEL')) is not None
+    # Nom sans correspondance : nouvelle recherche une fois l'index agrandi
+    assert normalizer.normalize('TYLENOL EXTRA') == 'ACETAMINOPHEN'
+    # La correspondance approchée relit la substance apprise ensuite
+    normalizer.learn('ADVIL LIQUI-GELS', 'IBUPROFEN SODIUM')
+    assert normalizer.normalize('ADVIL LIQUI GEL') == 'IBUPROFEN SODIUM'
+
+
+def test_persistent_vocabulary(monkeypatch, tmp_path):
+    from src.etl import normalize
+    path = tmp_path / 'drug_vocabulary.csv'
+    monkeypatch.setenv('DRUG_VOCABULARY', str(path))
+    monkeypatch.setattr(normalize, 'drug_normalizer', DrugNormalizer({'ADVIL': 'IBUPROFEN'}))
+    assert load_vocabulary() == 0
+    save_vocabulary()
+    monkeypatch.setattr(normalize, 'drug_normalizer', DrugNormalizer())
+    assert load_vocabulary() == 2
+    assert normalize.drug_normalizer.normalize('Advil 200mg') == 'IBUPROFEN'
+    assert not (tmp_path / 'drug_vocabulary.csv.tmp').exists()
+
+
+def test_transform_report_records_normalized_name_and_version():
+    report = {
+        'safetyreportid': '100', 'safetyreportversion': '2', 'receiptdate': '20230110',
+        'receivedate': '20230101',
+        'patient': {
+            'drug': [{'medicinalproduct': 'MOTRIN IB', 'openfda': {'generic_name': ['IBUPROFEN']}}],
+            'reaction': [{'reactionmeddrapt': 'Nausea'}],
+        },
+    }
+    transformed = Transformer.transform_report(report)
+    assert transformed['report_version'] == '2'
+    assert transformed['receipt_date'] == '20230110'
+    assert transformed['drugs'][0]['normalized_name'] == 'IBUPROFEN'
@@ -0,0 +1,120 @@
+"""Tests des partitions annuelles des rapports stockés."""
+import threading
+
+import pytest
+
+mongomock = pytest.importorskip('mongomock')
+pymongo = pytest.importorskip('pymongo')
+
+from src.alerts.service import AlertService  # noqa: E402
+from src.database.mongodb import MongoDBClient  # noqa: E402
+from src.database.partitions import (archive_partition, archived_partitions, list_partitions,  # noqa: E402
+                                     migrate_collection, partition_name, partitions_in_range,
+                                     restore_partition)
+
+
+def _report(report_id, received_date, drug='ASPIRIN'):
+    return {'report_id': report_id, 'received_date': received_date, 'serious': '2',
+            'drugs': [{'name': drug}], 'reactions': [{'term': 'Nausea'}]}
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = mongomock.MongoClient()
+    monkeypatch.setattr(pymongo, 'MongoClient', lambda *args, **kwargs: server)
+    return server
+
+
+@pytest.fixture
+def client(server, tmp_path):
+    client = MongoDBClient(cache_size=0, partitioned=True, archive_dir=str(tmp_path / 'archive'))
+    assert client.connect()
+    for report in (_report('1', '20210105'), _report('2', '2022-03-01'), _report('3', '20230710'),
+                   _report('4', None)):
+        assert client.insert_report(report)
+    return client
+
+
+def test_partition_names_and_ranges():
+    assert partition_name('20230115') == 'reports_2023'
+    assert partition_name('2023-01-15T00:00:00') == 'reports_2023'
+    assert partition_name('') == 'reports_unknown'
+    names = ['reports_unknown', 'reports_2021', 'reports_2023', 'reports_2022']
+    assert partitions_in_range(names) == ['reports_2023', 'reports_2022', 'reports_2021', 'reports_unknown']
+    assert partitions_in_range(names, '20220101', '20221231') == ['reports_2022']
+
+
+def test_reports_are_routed_by_year(client):
+    assert list_partitions(client.db) == ['reports_2023', 'reports_2022', 'reports_2021', 'reports_unknown']
+    assert client.db['reports_2022'].count_documents({}) == 1
+    assert client.count_reports() == 4
+    assert client.get_report('1')['received_date'] == '20210105'
+    found = [r['report_id'] for r in client.iter_reports(start_date='20220101', end_date='20231231')]
+    assert sorted(found) == ['2', '3']
+    assert client.delete_report('3') and client.get_report('3') is None
+
+
+def test_archive_and_restore(client, tmp_path):
+    assert archive_partition(client.db, 'reports_2021', str(tmp_path / 'archive')) == 1
+    assert 'reports_2021' not in client.db.list_collection_names()
+    assert list(archived_partitions(client.db)) == ['reports_2021']
+    client.refresh_partitions()
+    assert client.get_report('1') is None
+    archived = [r['report_id'] for r in client.iter_reports(include_archived=True)]
+    assert sorted(archived) == ['1', '2', '3', '4']
+    assert restore_partition(client.db, 'reports_2021') == 1
+    assert client.db['reports_2021'].find_one({}, {'_id': 0})['report_id'] == '1'
+    assert archived_partitions(client.db) == {}
+
+
+def test_migrate_collection_is_idempotent(server):
+    db = server['eim']
+    db['reports'].insert_many([_report('1', '20200101'), _report('2', '20210101'), _report('3', '20210202')])
+    assert migrate_collection(db) == {'reports_2020': 1, 'reports_2021': 2}
+    assert migrate_collection(db) == {'reports_2020': 0, 'reports_2021': 0}
+    assert db['reports'].count_documents({}) == 3
+
+
+def test_main_uses_the_pipeline_collection(server, monkeypatch, tmp_path, capsys):
+    from src.database import partitions
+    from src.database.mongodb import DEFAULT_COLLECTION, DEFAULT_DATABASE
+
+    monkeypatch.delenv('DATABASE_NAME', raising=False)
+    db = server[DEFAULT_DATABASE]
+    db[DEFAULT_COLLECTION].insert_many([_report('1', '20200101'), _report('2', '20240101')])
+    server['eim']['reports'].insert_one(_report('9', '20200101'))
+
+    def run(*argv):
+        monkeypatch.setattr('sys.argv', ['partitions', '--dir', str(tmp_path), *argv])
+        partitions.main()
+        return capsys.readouterr().out
+
+    run('migrate', '--drop')
+    assert DEFAULT_COLLECTION not in db.list_collection_names()
+    assert list_partitions(db, DEFAULT_COLLECTION) == ['adverse_events_2024', 'adverse_events_2020']
+    assert 'adverse_events_2020' in run('archive', '--before', '2021')
+    assert list(archived_partitions(db, DEFAULT_COLLECTION)) == ['adverse_events_2020']
+    with pytest.raises(SystemExit):
+        run('restore', 'reports_2020')
+    assert 'adverse_events_2020: 1 rapports restaurés' in run('restore', 'adverse_events_2020')
+    # Les autres bases ne sont pas touchées ; --db / --collection les désignent
+    assert server['eim']['reports'].count_documents({}) == 1
+    run('--db', 'eim', '--collection', 'reports', 'migrate')
+    assert list_partitions(server['eim']) == ['reports_2020']
+
+
+def test_alert_polling_follows_new_partitions(client):
+    service = AlertService(client.db, poll_interval=0.01, partition_base='reports')
+    reports = service._poll()
+    # Rapport d'une nouvelle année, inséré pendant l'interrogation
+    threading.Timer(0.05, client.insert_report, [_report('5', '20240102')]).start()
+    assert next(reports)['report_id'] == '5'
+    client.insert_report(_report('6', '20210301'))
+    assert next(reports)['report_id'] == '6'
+    service.stop()
+
+
+def test_search_index_reads_every_partition(client):
+    from src.search import build_from_client
+    index = build_from_client(client)
+    assert len(index) == 4
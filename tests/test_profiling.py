@@ -0,0 +1,42 @@
+"""Tests du profilage à la demande."""
+import json
+
+from benchmarks.mock_server import MockOpenFDAServer
+from src import cli
+from src.etl.transform import Transformer
+from src.profiling import Profiler
+
+
+def test_wrap_counts_calls_and_traces_samples():
+    profiler = Profiler(sample_rate=1.0, stack_interval=0)
+    double = profiler.wrap('double', lambda x: 2 * x, key=lambda x: f'x={x}')
+    assert [double(i) for i in range(3)] == [0, 2, 4]
+    timings = profiler.timings()
+    assert timings['double']['calls'] == 3
+    assert [t['key'] for t in profiler._traces] == ['x=0', 'x=1', 'x=2']
+    assert profiler._profiled_calls == 3
+
+
+def test_instrument_is_reverted_on_stop():
+    original = Transformer.__dict__['transform_report']
+    profiler = Profiler(sample_rate=0, stack_interval=0).start()
+    assert Transformer.__dict__['transform_report'] is not original
+    profiler.stop()
+    assert Transformer.__dict__['transform_report'] is original
+
+
+def test_cli_writes_profile(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    with MockOpenFDAServer(n_reports=60, seed=3) as server:
+        monkeypatch.setenv('OPENFDA_BASE_URL', server.base_url)
+        code = cli.main(['--drug', 'ibuprofen', '--limit', '60', '--backend', 'jsonl',
+                         '--output', str(tmp_path / 'out.jsonl'), '--profile', str(tmp_path / 'prof'),
+                         '--profile-sample', '1'])
+    assert code == 0
+    timings = json.loads((tmp_path / 'prof' / 'timings.json').read_text(encoding='utf-8'))
+    assert timings['functions']['Transformer.transform_report']['calls'] == 60
+    assert 'FDAClient._make_request' in timings['functions']
+    traces = (tmp_path / 'prof' / 'traces.jsonl').read_text(encoding='utf-8').splitlines()
+    assert any(json.loads(line).get('key') for line in traces)
+    assert (tmp_path / 'prof' / 'profile.pstats').exists()
+    assert (tmp_path / 'prof' / 'stacks.folded').exists()
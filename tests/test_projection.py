@@ -0,0 +1,52 @@
+"""Tests des projections de champs (openFDA et MongoDB)."""
+from benchmarks.mock_server import MockOpenFDAServer
+from benchmarks.synthetic import SyntheticFAERS
+from src.api.fda_client import FDAClient
+from src.api.projection import TRANSFORM_FIELDS, FieldSet
+from src.etl.extract import Extractor
+from src.etl.transform import Transformer
+
+
+def test_apply_traverses_lists():
+    fields = FieldSet(['id', 'patient.drug.name', 'patient.drug.openfda', 'patient.drug.openfda.rxcui'])
+    record = {'id': 1, 'extra': 2, 'patient': {'sex': '1', 'drug': [
+        {'name': 'A', 'route': 'oral', 'openfda': {'rxcui': ['1'], 'spl_id': ['x']}},
+        {'route': 'iv'},
+    ]}}
+    assert fields.apply(record) == {'id': 1, 'patient': {'drug': [
+        {'name': 'A', 'openfda': {'rxcui': ['1'], 'spl_id': ['x']}}, {}]}}
+    assert record['extra'] == 2
+    assert FieldSet(['b', 'a.c']).to_mongo() == {'a.c': 1, 'b': 1}
+    assert list(FieldSet(['a']) | FieldSet(['b', 'a'])) == ['a', 'b']
+
+
+def _transform(report):
+    transformed = Transformer.transform_report(report)
+    transformed.pop('processed_at')
+    # normalized_name dépend du vocabulaire appris par le normaliseur global
+    for drug in transformed['drugs']:
+        drug.pop('normalized_name')
+    return transformed
+
+
+def test_transform_fields_keep_transform_output():
+    for report in SyntheticFAERS(seed=4).reports(30):
+        assert _transform(TRANSFORM_FIELDS.apply(report)) == _transform(report)
+
+
+def test_search_reports_with_fields():
+    with MockOpenFDAServer(n_reports=10, seed=2) as server:
+        data = FDAClient(base_url=server.base_url).search_reports(
+            'IBUPROFEN', limit=3, fields=FieldSet(['safetyreportid', 'patient.reaction.reactionmeddrapt']))
+    assert [set(r) for r in data['results']] == [{'safetyreportid', 'patient'}] * 3
+    assert set(data['results'][0]['patient']) == {'reaction'}
+
+
+def test_extractor_trims_unless_raw_is_kept():
+    with MockOpenFDAServer(n_reports=20, seed=6) as server:
+        client = FDAClient(base_url=server.base_url)
+        trimmed = Extractor(client).extract_drug_reports('IBUPROFEN', 10)
+        full = Extractor(client, fields=None).extract_drug_reports('IBUPROFEN', 10)
+    assert full == server.reports[:10]
+    assert trimmed == TRANSFORM_FIELDS.apply_many(full)
+    assert 'primarysource' in full[0] and 'primarysource' not in trimmed[0]
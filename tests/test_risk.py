@@ -0,0 +1,61 @@
+"""Tests des variables patient et du modèle de risque logistique."""
+import random
+
+import numpy as np
+
+from src.analytics.risk import ReportBatch, RiskModel, age_in_years, is_serious
+
+
+def _report(i, age, drugs, serious, unit='801', sex='1'):
+    return {'report_id': str(i), 'serious': '1' if serious else '2',
+            'patient': {'age': age, 'age_unit': unit, 'sex': sex, 'weight': None},
+            'drugs': [{'name': d} for d in drugs],
+            'reactions': [{'term': 'Nausea', 'outcome': '1'}]}
+
+
+def _synthetic(n=600, seed=1):
+    # Rapports graves : patients âgés sous WARFARIN ; bénins : patients jeunes sous LORATADINE
+    rng = random.Random(seed)
+    reports = []
+    for i in range(n):
+        serious = i % 2 == 0
+        age = rng.randint(70, 90) if serious else rng.randint(20, 40)
+        drugs = ['WARFARIN', 'ASPIRIN'] if serious else ['LORATADINE']
+        reports.append(_report(i, str(age), drugs, serious))
+    return reports
+
+
+def test_age_conversion_and_target():
+    assert age_in_years('18', '802') == 1.5
+    assert age_in_years('3', '800') == 30.0
+    assert np.isnan(age_in_years('abc', '801')) and np.isnan(age_in_years('5', '999'))
+    assert is_serious({'serious': '1'})
+    assert is_serious({'serious': '2', 'reactions': [{'outcome': '5'}]})
+    assert not is_serious({'serious': '2', 'reactions': [{'outcome': '1'}]})
+
+
+def test_batch_columns_and_csr_layout():
+    reports = [_report(0, '80', ['A', 'B', 'A'], True), _report(1, None, [], False, sex='2'),
+               _report(2, '6', ['C'] * 12, False, unit='802')]
+    batch = ReportBatch.from_reports(reports, hash_dim=64, with_labels=True)
+    assert len(batch) == 3 and batch.labels.tolist() == [1.0, 0.0, 0.0]
+    assert np.diff(batch.indptr).tolist() == [2, 0, 1]
+    assert batch.row_ids().tolist() == [0, 0, 2]
+    dense = batch.dense_features()
+    assert dense.shape == (3, 11)
+    # Âge manquant, patient âgé, polypharmacie (12 médicaments)
+    assert dense[1, 1] == 1 and dense[0, 3] == 1 and dense[2, 10] == 1
+
+
+def test_model_separates_classes_and_round_trips(tmp_path):
+    train = ReportBatch.from_reports(_synthetic(), hash_dim=256, with_labels=True)
+    model = RiskModel(hash_dim=256).fit(train, epochs=300)
+    scores = model.predict_batch(train)
+    assert ((scores > 0.5) == (train.labels > 0.5)).mean() > 0.95
+
+    reloaded = RiskModel.load(model.save(str(tmp_path / 'risk')))
+    test = _synthetic(n=50, seed=2)
+    direct = model.predict_reports(test)
+    chunked = reloaded.predict_reports(test, batch_size=7)
+    assert [r['report_id'] for r in chunked] == [r['report_id'] for r in test]
+    np.testing.assert_allclose([r['risk'] for r in chunked], [r['risk'] for r in direct], rtol=1e-6)
@@ -0,0 +1,68 @@
+"""Tests du décodage typé des réponses openFDA."""
+import json
+
+import pytest
+
+from benchmarks.mock_server import MockOpenFDAServer
+from benchmarks.synthetic import SyntheticFAERS
+from src.api.fda_client import FDAClient
+from src.models import schemas
+from src.models.report import AdverseEventReport
+
+needs_msgspec = pytest.mark.skipif(not schemas.FAST_DECODE_AVAILABLE, reason="msgspec n'est pas installé")
+
+
+def _response(n=20, seed=11):
+    generator = SyntheticFAERS(seed=seed)
+    return generator.response(generator.reports(n), total=1234)
+
+
+def _without_normalized(report):
+    # normalized_name dépend du vocabulaire appris par le normaliseur global
+    data = report.to_dict()
+    for drug in data['drugs']:
+        drug.pop('normalized_name')
+    return data
+
+
+@needs_msgspec
+def test_struct_models_match_dict_models():
+    payload = _response()
+    decoded = schemas.decode_response(json.dumps(payload).encode())
+    assert schemas.total_results(decoded) == 1234
+    from_structs = [_without_normalized(AdverseEventReport.from_struct(r)) for r in decoded.results]
+    from_dicts = [_without_normalized(AdverseEventReport.from_api_data(r)) for r in payload['results']]
+    assert from_structs == from_dicts
+
+
+@needs_msgspec
+def test_unused_fields_are_skipped():
+    payload = {'results': [{'safetyreportid': '9', 'companynumb': 'X-1', 'patient': {
+        'patientsex': 2, 'summary': {'narrativeincludeclinical': '...'},
+        'drug': [{'medicinalproduct': 'ASPIRIN', 'drugadministrationroute': '048'}]}}]}
+    [report] = schemas.decode_response(json.dumps(payload).encode()).results
+    assert report.patient.patientsex == 2
+    assert report.patient.drug[0].medicinalproduct == 'ASPIRIN'
+    assert not hasattr(report, 'companynumb')
+
+
+def test_loads_falls_back_to_json():
+    assert schemas.loads(b'{"meta": {"results": {"total": 3}}}') == {'meta': {'results': {'total': 3}}}
+
+
+def test_fetch_reports_returns_models():
+    with MockOpenFDAServer(n_reports=12, seed=5) as server:
+        reports = FDAClient(base_url=server.base_url).fetch_reports('IBUPROFEN', limit=10)
+        expected = [r['safetyreportid'] for r in server.reports[:10]]
+    assert [r.report_id for r in reports] == expected
+    assert all(isinstance(r, AdverseEventReport) for r in reports)
+
+
+@needs_msgspec
+def test_fetch_reports_falls_back_when_schema_breaks():
+    with MockOpenFDAServer(n_reports=5, seed=5) as server:
+        # Date numérique au lieu d'une chaîne : le décodage typé échoue
+        server.reports[1]['receivedate'] = 20230101
+        reports = FDAClient(base_url=server.base_url).fetch_reports('IBUPROFEN', limit=5)
+    assert len(reports) == 5
+    assert reports[1].received_date == 20230101
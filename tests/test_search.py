@@ -0,0 +1,77 @@
+"""Tests de l'index de recherche plein texte."""
+import pytest
+
+from src.search.index import ReportSearchIndex, SearchIndexBuilder
+
+
+def _index(reactions_by_report):
+    builder = SearchIndexBuilder()
+    for i, reactions in enumerate(reactions_by_report):
+        builder.add_report({'report_id': f'r{i}', 'reactions': [{'term': t} for t in reactions],
+                            'drugs': [{'name': 'IBUPROFEN'}]})
+    return builder.build()
+
+
+def _pages(index, query, page_size, **options):
+    ids = []
+    page = 1
+    while True:
+        results = index.search(query, page=page, page_size=page_size, **options)['results']
+        if not results:
+            return ids
+        ids.extend(r['report_id'] for r in results)
+        page += 1
+
+
+def test_pagination_with_tied_scores_is_stable():
+    # Quatre profils de scores seulement : presque tous les rapports sont ex aequo
+    profiles = [['Headache'], ['Headache', 'Nausea'], ['Headache pain'], ['Migraine headache']]
+    index = _index(profiles[(i * 7) % 4] for i in range(400))
+    full = [r['report_id'] for r in index.search('headache', page=1, page_size=1000)['results']]
+    assert len(full) == 400
+    for page_size in (7, 13, 50):
+        assert _pages(index, 'headache', page_size) == full
+
+
+def test_ranking_and_fields():
+    index = _index([['Hepatitis'], ['Hepatic failure'], ['Rash']])
+    found = index.search('hepat', field='reaction')
+    assert found['total'] == 2
+    assert {r['report_id'] for r in found['results']} == {'r0', 'r1'}
+    assert index.search('rash', field='drug')['total'] == 0
+    assert index.search('ibuprofen', field='drug')['total'] == 3
+    assert index.search('hepat', page=5)['results'] == []
+
+
+def test_pages_and_save_load(tmp_path):
+    index = _index([['Headache']] * 5 + [['Headache', 'Headache pain']] * 3 + [['Rash']])
+    first = index.search('headache', page=1, page_size=4)
+    second = index.search('headache', page=2, page_size=4)
+    assert first['total'] == 8
+    assert len(first['results']) == 4 and len(second['results']) == 4
+    assert not {r['report_id'] for r in first['results']} & {r['report_id'] for r in second['results']}
+    # Les rapports qui citent plusieurs termes correspondants sont classés en tête
+    assert {r['report_id'] for r in first['results'][:3]} == {'r5', 'r6', 'r7'}
+
+    index.save(str(tmp_path / 'index'))
+    reloaded = ReportSearchIndex.load(str(tmp_path / 'index'))
+    assert len(reloaded) == len(index)
+    assert reloaded.search('headache', page=1, page_size=4) == first
+
+
+def test_build_reads_the_pipeline_collection(monkeypatch, tmp_path):
+    mongomock = pytest.importorskip('mongomock')
+    pymongo = pytest.importorskip('pymongo')
+    from src.database.mongodb import DEFAULT_COLLECTION, DEFAULT_DATABASE
+    from src.search import index
+
+    server = mongomock.MongoClient()
+    monkeypatch.setattr(pymongo, 'MongoClient', lambda *args, **kwargs: server)
+    monkeypatch.delenv('DATABASE_NAME', raising=False)
+    monkeypatch.delenv('REPORTS_PARTITIONED', raising=False)
+    server[DEFAULT_DATABASE][DEFAULT_COLLECTION].insert_one(
+        {'report_id': '1', 'drugs': [{'name': 'ASPIRIN'}], 'reactions': [{'term': 'Nausea'}]})
+    server['eim']['reports'].insert_one({'report_id': '9', 'drugs': [], 'reactions': [{'term': 'Rash'}]})
+    monkeypatch.setattr('sys.argv', ['index', '--index-dir', str(tmp_path), 'build'])
+    index.main()
+    assert len(ReportSearchIndex.load(str(tmp_path))) == 1
@@ -0,0 +1,66 @@
+"""Tests du chargement réparti sur plusieurs processus."""
+import functools
+import json
+from pathlib import Path
+
+from src.etl.sharded_load import ShardedLoader, shard_of
+
+
+class _FileLoader:
+    """Chargeur écrivant chaque insertion dans un fichier propre au processus."""
+
+    def __init__(self, directory):
+        import os
+        self.path = Path(directory) / f'{os.getpid()}.jsonl'
+
+    def insert_batch(self, data):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps([r['report_id'] for r in data]) + '\n')
+        return len(data)
+
+    def close(self):
+        pass
+
+
+class _FailingLoader(_FileLoader):
+    def insert_batch(self, data):
+        raise ConnectionError('mongo down')
+
+
+def _reports(count):
+    return [{'report_id': str(i)} for i in range(count)]
+
+
+def test_shard_is_stable():
+    report = {'report_id': '1234'}
+    assert shard_of(report, 4) == shard_of(dict(report), 4)
+    assert {shard_of(r, 3) for r in _reports(50)} == {0, 1, 2}
+
+
+def test_reports_are_spread_over_workers(tmp_path):
+    loader = ShardedLoader(workers=2, buffer_size=7,
+                           loader_factory=functools.partial(_FileLoader, str(tmp_path)))
+    for start in range(0, 40, 10):
+        assert loader.load_data(_reports(40)[start:start + 10]) == 10
+    progress = loader.close(timeout=60)
+    assert progress.inserted == 40 and progress.queued == 40
+    assert sorted(progress.per_worker) == [0, 1]
+    written = [json.loads(line) for path in tmp_path.glob('*.jsonl')
+               for line in path.read_text(encoding='utf-8').splitlines()]
+    ids = [report_id for batch in written for report_id in batch]
+    assert sorted(ids, key=int) == [str(i) for i in range(40)]
+    # Un même processus reçoit toujours les rapports de sa partition
+    for path in tmp_path.glob('*.jsonl'):
+        shards = {shard_of({'report_id': i}, 2)
+                  for line in path.read_text(encoding='utf-8').splitlines() for i in json.loads(line)}
+        assert len(shards) == 1
+
+
+def test_stats_report_failed_batches(tmp_path):
+    loader = ShardedLoader(workers=1, buffer_size=5, max_retries=0,
+                           loader_factory=functools.partial(_FailingLoader, str(tmp_path)))
+    assert loader.asynchronous
+    loader.load_data(_reports(10))
+    progress = loader.close(timeout=60)
+    assert progress.errors and 'mongo down' in progress.errors[0]
+    assert loader.stats() == {'queued': 10, 'loaded': 0, 'failed_batches': 1}
@@ -0,0 +1,90 @@
+"""Tests des instantanés du tableau de bord."""
+import sys
+
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from src.analytics.snapshot import Snapshot, SnapshotBuilder, age_group  # noqa: E402
+
+
+def _report(report_id, date, drugs, reactions, sex='2', age='30'):
+    return {'report_id': report_id, 'received_date': date,
+            'patient': {'sex': sex, 'age': age, 'age_unit': '801'},
+            'drugs': [{'name': d} for d in drugs], 'reactions': [{'term': r} for r in reactions]}
+
+
+REPORTS = [
+    _report('1', '20230105', ['ASPIRIN'], ['Nausea', 'Rash']),
+    _report('2', '20230210', ['ASPIRIN', 'IBUPROFEN'], ['Nausea'], sex='1', age='70'),
+    _report('3', '20230215', ['IBUPROFEN'], ['Headache']),
+    _report('4', '20230301', [], ['Nausea']),
+]
+
+
+def test_age_group():
+    assert age_group({'age': '30'}) == '18-44'
+    assert age_group({'age': '840', 'age_unit': '802'}) == '65-74'
+    assert age_group({}) == 'Unknown'
+
+
+@pytest.mark.parametrize('file_format', ['arrow', 'parquet'])
+def test_write_and_read_per_drug_slices(tmp_path, file_format):
+    builder = SnapshotBuilder(recent_reports=1)
+    assert builder.add_reports(REPORTS) == 4
+    manifest = builder.write(str(tmp_path), file_format, source='test')
+    assert manifest['reports'] == 3 and manifest['drugs'] == {'ASPIRIN': 2, 'IBUPROFEN': 2}
+    snapshot = Snapshot(str(tmp_path))
+    top = snapshot.drug_table('top_reactions', 'aspirin').to_pylist()
+    assert top[0] == {'drug': 'ASPIRIN', 'reaction': 'NAUSEA', 'count': 2}
+    monthly = snapshot.drug_table('monthly', 'IBUPROFEN').to_pylist()
+    assert [(m['month'], m['count']) for m in monthly] == [('2023-02', 2)]
+    demographics = {(d['sex'], d['age_group']): d['count']
+                    for d in snapshot.drug_table('demographics', 'IBUPROFEN').to_pylist()}
+    assert demographics == {('Male', '65-74'): 1, ('Female', '18-44'): 1}
+    recent = snapshot.drug_table('recent_reports', 'ASPIRIN').to_pylist()
+    assert [r['report_id'] for r in recent] == ['2']
+    assert snapshot.drug_table('top_reactions', 'METFORMIN').num_rows == 0
+
+
+def test_rewrite_keeps_only_the_previous_snapshot(tmp_path):
+    files = []
+    for _ in range(3):
+        builder = SnapshotBuilder()
+        builder.add_reports(REPORTS)
+        files.append({t['file'] for t in builder.write(str(tmp_path))['tables'].values()})
+    on_disk = {p.name for p in tmp_path.iterdir() if p.name != 'manifest.json'}
+    assert on_disk == files[1] | files[2]
+    with pytest.raises(FileNotFoundError):
+        Snapshot(str(tmp_path / 'missing'))
+
+
+@pytest.mark.parametrize('partitioned', ['0', '1'])
+def test_main_reads_the_pipeline_collection(monkeypatch, tmp_path, partitioned):
+    mongomock = pytest.importorskip('mongomock')
+    pymongo = pytest.importorskip('pymongo')
+    from src.analytics import snapshot
+    from src.database.mongodb import MongoDBClient
+
+    server = mongomock.MongoClient()
+    monkeypatch.setattr(pymongo, 'MongoClient', lambda *args, **kwargs: server)
+    monkeypatch.setenv('REPORTS_PARTITIONED', partitioned)
+    loader = MongoDBClient('mongodb://test', 'eim_platform', cache_size=0, collection='adverse_events')
+    assert loader.connect()
+    for report in REPORTS:
+        assert loader.insert_report(dict(report))
+    # Collection d'une autre application : ignorée
+    server['eim']['reports'].insert_one(_report('9', '20230101', ['METFORMIN'], ['Rash']))
+    monkeypatch.setattr('sys.argv', ['snapshot', '--dir', str(tmp_path)])
+    snapshot.main()
+    assert Snapshot(str(tmp_path)).drugs == {'ASPIRIN': 2, 'IBUPROFEN': 2}
+
+
+def test_missing_pyarrow_is_reported_clearly(tmp_path, monkeypatch):
+    # pyarrow n'est importé qu'à l'écriture : le module et le builder restent utilisables
+    builder = SnapshotBuilder()
+    builder.add_reports(REPORTS)
+    monkeypatch.setitem(sys.modules, 'pyarrow', None)
+    with pytest.raises(ImportError, match='pip install pyarrow'):
+        builder.write(str(tmp_path))
+    assert not list(tmp_path.iterdir())
@@ -0,0 +1,95 @@
+"""Tests des adaptateurs de sources hospitalières (CSV, FHIR) et de leur lecture parallèle."""
+import json
+
+from src.sources import RejectedRecord, create_source, read_partitions
+from src.sources.runner import PartitionDone, SourceBatch
+
+
+def _event(event_id, term='Headache', drug='IBUPROFEN'):
+    return {
+        'resourceType': 'AdverseEvent',
+        'id': event_id,
+        'recordedDate': '2023-05-02',
+        'subject': {'reference': 'Patient/p1'},
+        'event': {'coding': [{'system': 'http://meddra.org', 'display': term}]},
+        'seriousness': {'coding': [{'code': 'serious'}]},
+        'suspectEntity': [{'instance': {'display': drug}}],
+    }
+
+
+def _read(source):
+    # Lecture dans des threads : pas de processus `spawn` pendant les tests
+    source.parallel = 'thread'
+    batches, done = [], []
+    for item in read_partitions(source, workers=1, batch_size=100):
+        (done if isinstance(item, PartitionDone) else batches).append(item)
+    return batches, done
+
+
+def test_csv_long_format_is_merged(tmp_path):
+    (tmp_path / 'cases.csv').write_text(
+        'case_id,report_date,sex,drug,reaction\n'
+        '1,2023-01-04,F,ASPIRIN|IBUPROFEN,Nausea\n'
+        '1,2023-01-04,F,ASPIRIN,Rash\n'
+        '2,04/01/2023,M,METFORMIN,Lactic acidosis\n', encoding='utf-8')
+    source = create_source('csv', [str(tmp_path)])
+    reports = list(source.read_raw(tmp_path / 'cases.csv'))
+    assert [r['safetyreportid'] for r in reports] == ['csv:1', 'csv:2']
+    first = reports[0]
+    assert first['receivedate'] == '20230104'
+    assert first['patient']['patientsex'] == '2'
+    assert [d['medicinalproduct'] for d in first['patient']['drug']] == ['ASPIRIN', 'IBUPROFEN']
+    assert [r['reactionmeddrapt'] for r in first['patient']['reaction']] == ['Nausea', 'Rash']
+    assert reports[1]['receivedate'] == '20230104'
+
+
+def test_fhir_bundle_resolves_references(tmp_path):
+    bundle = {'resourceType': 'Bundle', 'entry': [
+        {'resource': {'resourceType': 'Patient', 'id': 'p1', 'gender': 'female', 'birthDate': '1970-05-01'}},
+        {'resource': _event('e1')},
+    ]}
+    path = tmp_path / 'bundle.json'
+    path.write_text(json.dumps(bundle), encoding='utf-8')
+    source = create_source('fhir', [str(tmp_path)])
+    [report] = list(source.read_raw(source.partitions()[0]))
+    assert report['safetyreportid'] == 'fhir:e1'
+    assert report['serious'] == '1'
+    assert report['patient']['patientsex'] == '2'
+    assert report['patient']['patientonsetage'] == '53'
+    assert report['patient']['drug'] == [{'medicinalproduct': 'IBUPROFEN'}]
+    assert report['patient']['reaction'] == [{'reactionmeddrapt': 'Headache'}]
+
+
+def test_partitions_are_read_in_batches(tmp_path):
+    for name, start in (('a.csv', 0), ('b.csv', 100)):
+        rows = ''.join(f'{i},2023-01-01,ASPIRIN,Nausea\n' for i in range(start, start + 30))
+        (tmp_path / name).write_text('case_id,report_date,drug,reaction\n' + rows, encoding='utf-8')
+    batches, done = _read(create_source('csv', [str(tmp_path)]))
+    assert sorted(d.extracted for d in done) == [30, 30] and all(d.error is None for d in done)
+    assert all(isinstance(b, SourceBatch) and b.records for b in batches)
+    assert sum(len(b.records) for b in batches) == 60
+
+
+def test_fhir_ndjson_bad_line_is_quarantined(tmp_path):
+    lines = [json.dumps(_event('e1')), '{"resourceType": "AdverseEv', json.dumps(_event('e2', 'Rash'))]
+    (tmp_path / 'AdverseEvent.ndjson').write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    source = create_source('fhir', [str(tmp_path)])
+    raw = list(source.read_raw(source.partitions()[0]))
+    assert isinstance(raw[1], RejectedRecord) and raw[1].location == 'AdverseEvent.ndjson:2'
+
+    batches, [done] = _read(source)
+    assert done.error is None and done.extracted == 3
+    assert sum(len(b.records) for b in batches) == 2
+    quarantined = [entry for b in batches for entry in b.quarantined]
+    assert len(quarantined) == 1 and quarantined[0]['errors'][0].startswith('<read>:')
+
+
+def test_read_error_keeps_reports_already_read(tmp_path):
+    rows = ''.join(f'{i},2023-01-01,ASPIRIN,Nausea\n' for i in range(2000))
+    (tmp_path / 'bad.csv').write_bytes(b'case_id,report_date,drug,reaction\n' + rows.encode()
+                                       + b'9999,2023-01-01,\xff\xfe,Rash\n')
+    batches, [done] = _read(create_source('csv', [str(tmp_path)]))
+    assert done.error is not None and 'UnicodeDecodeError' in done.error
+    assert all(isinstance(b, SourceBatch) for b in batches)
+    # Tous les rapports lus avant l'erreur sont transmis (chargés ou écartés comme doublons)
+    assert sum(len(b.records) + b.deduplicated for b in batches) == done.extracted > 0
@@ -0,0 +1,143 @@
+"""Tests du spool local entre transformation et chargement."""
+import pytest
+
+from src.etl.spool import Spool, SpoolDrainer, read_frames
+
+
+def _records(start, count):
+    return [{'report_id': str(i), 'drugs': [{'name': 'IBUPROFEN'}]} for i in range(start, start + count)]
+
+
+@pytest.mark.parametrize('codec', ['zlib', 'zstd'])
+def test_frames_round_trip(tmp_path, codec):
+    if codec == 'zstd':
+        pytest.importorskip('zstandard')
+    spool = Spool(str(tmp_path), codec=codec, fsync=False)
+    assert spool.append(_records(0, 3)) == 3
+    spool.append(_records(3, 2))
+    assert spool.ready_segments() == []
+    spool.seal()
+    [segment] = spool.ready_segments()
+    batches = [records for _, records in spool.read_segment(segment)]
+    assert batches == [_records(0, 3), _records(3, 2)]
+
+
+def test_segments_are_sealed_by_size(tmp_path):
+    spool = Spool(str(tmp_path), segment_bytes=1, fsync=False)
+    for i in range(3):
+        spool.append(_records(i, 1))
+    assert len(spool.ready_segments()) == 3
+
+
+def test_open_segment_is_recovered_to_last_valid_frame(tmp_path):
+    spool = Spool(str(tmp_path), fsync=False)
+    spool.append(_records(0, 2))
+    spool.append(_records(2, 2))
+    path = spool._path
+    # Arrêt brutal au milieu de l'écriture d'une trame (le verrou meurt avec le processus)
+    spool._file.write(b'\x00\x00\x01\x00partial')
+    spool._file.flush()
+    spool._lock_file.close()
+    recovered = Spool(str(tmp_path), fsync=False)
+    [segment] = recovered.ready_segments()
+    assert segment.stem == path.stem
+    assert [records for _, records in read_frames(segment)] == [_records(0, 2), _records(2, 2)]
+    recovered.append(_records(4, 1))
+    assert recovered._path.stem > segment.stem
+
+
+def test_drainer_retries_and_resumes_after_ack(tmp_path):
+    spool = Spool(str(tmp_path), fsync=False)
+    for i in range(4):
+        spool.append(_records(i * 10, 10))
+    spool.seal()
+    loaded, calls = [], []
+
+    def flaky(records):
+        calls.append(len(records))
+        if len(calls) == 2:
+            raise ConnectionError('MongoDB indisponible')
+        loaded.extend(r['report_id'] for r in records)
+
+    drainer = SpoolDrainer(spool, flaky, batch_size=20, max_backoff=0.01)
+    assert drainer.drain() == 1
+    assert drainer.failures == 1
+    assert loaded == [str(i) for i in range(40)]
+    assert spool.ready_segments() == [] and not list(tmp_path.glob('*.ack'))
+
+
+def test_append_blocks_when_spool_is_full(tmp_path):
+    spool = Spool(str(tmp_path), segment_bytes=1, max_pending_bytes=1, fsync=False)
+    spool.append(_records(0, 5))
+    with pytest.raises(TimeoutError):
+        spool.append(_records(5, 5), timeout=0.05)
+    SpoolDrainer(spool, lambda records: None).drain()
+    assert spool.append(_records(5, 5), timeout=0.05) == 5
+
+
+class _IdempotentStore:
+    """Chargeur factice : comme `MongoDBLoader.insert_batch`, ignore les report_id déjà stockés."""
+
+    def __init__(self):
+        self.documents = {}
+
+    def insert_batch(self, records):
+        new = [r for r in records if r['report_id'] not in self.documents]
+        for record in new:
+            self.documents[record['report_id']] = record
+        return len(new)
+
+
+def test_replay_after_crash_before_ack(tmp_path):
+    store = _IdempotentStore()
+    spool = Spool(str(tmp_path), fsync=False)
+    spool.append(_records(0, 20))
+    spool.append(_records(20, 20))
+    spool.seal()
+
+    class Crash(Exception):
+        pass
+
+    def crash(path, offset):
+        raise Crash()
+
+    # Arrêt brutal entre le chargement du premier lot et son acquittement
+    spool.ack = crash
+    with pytest.raises(Crash):
+        SpoolDrainer(spool, store.insert_batch, batch_size=1).drain()
+    assert len(store.documents) == 20
+    spool.close()
+
+    # Nouvelle exécution sur le même spool : le lot non acquitté est rejoué sans doublon
+    replay = SpoolDrainer(Spool(str(tmp_path), fsync=False), store.insert_batch, batch_size=1)
+    replay.drain()
+    assert len(store.documents) == 40
+    assert replay.submitted == 40 and replay.loaded == 20
+    assert not replay.spool.ready_segments()
+
+
+def test_spool_directory_has_a_single_writer(tmp_path):
+    pytest.importorskip('fcntl')
+    spool = Spool(str(tmp_path), fsync=False)
+    with pytest.raises(RuntimeError):
+        Spool(str(tmp_path), fsync=False)
+    spool.close()
+    Spool(str(tmp_path), fsync=False).close()
+
+
+def test_pending_bytes_follow_appends_and_acks(tmp_path):
+    spool = Spool(str(tmp_path), fsync=False)
+    spool.append(_records(0, 10))
+    spool.append(_records(10, 10))
+    spool.seal()
+    [segment] = spool.ready_segments()
+    assert spool.pending_bytes() == segment.stat().st_size
+    first, _ = next(spool.read_segment(segment))
+    spool.ack(segment, first)
+    assert spool.pending_bytes() == segment.stat().st_size - first
+    spool.close()
+    # Après redémarrage, le compteur repart des segments et des acquittements sur disque
+    reopened = Spool(str(tmp_path), fsync=False)
+    assert reopened.pending_bytes() == segment.stat().st_size - first
+    SpoolDrainer(reopened, lambda records: None).drain()
+    assert reopened.pending_bytes() == 0
@@ -0,0 +1,63 @@
+"""Tests de la détection de pics sur les séries quotidiennes de rapports."""
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from src.analytics.temporal import DailyCounts, SpikeDetector, parse_day
+
+END = date(2023, 6, 30)
+
+
+def _reports(drug, reaction, day, count):
+    return [{'received_date': day.strftime('%Y%m%d'), 'drugs': [{'name': drug}],
+             'reactions': [{'term': reaction}]} for _ in range(count)]
+
+
+def test_parse_day():
+    assert parse_day('20230105') == date(2023, 1, 5)
+    assert parse_day('2023-01-05T10:00:00') == date(2023, 1, 5)
+    assert parse_day('2023') is None and parse_day(None) is None
+
+
+def test_ring_buffer_matches_chronological_counts():
+    counts = DailyCounts(days=5, initial_series=1)
+    for offset in range(8):
+        counts.add('A', date(2023, 1, 1) + timedelta(days=offset), amount=offset + 1)
+        counts.add('B', date(2023, 1, 1) + timedelta(days=offset))
+    assert counts.start == date(2023, 1, 4)
+    assert counts.matrix().tolist() == [[4, 5, 6, 7, 8], [1, 1, 1, 1, 1]]
+    # Jour sorti de la fenêtre : ignoré
+    assert not counts.add('A', date(2023, 1, 2))
+    counts.advance(date(2023, 1, 20))
+    assert not counts.matrix().any()
+
+
+def test_batch_add_equals_single_adds():
+    reports = [r for i in range(30) for r in _reports(f'D{i % 4}', 'Nausea', END - timedelta(days=i), i % 3 + 1)]
+    batch = DailyCounts(days=30)
+    assert batch.add_reports(reports) == len(reports)
+    single = DailyCounts(days=30, end=END)
+    for report in reports:
+        for key in [report['drugs'][0]['name'].upper(), (report['drugs'][0]['name'].upper(), 'NAUSEA')]:
+            single.add(key, parse_day(report['received_date']))
+    assert batch.keys == single.keys
+    np.testing.assert_array_equal(batch.matrix(), single.matrix())
+
+
+@pytest.mark.parametrize('method', ['poisson', 'ewma', 'cusum'])
+def test_recent_spike_ranks_first(method):
+    detector = SpikeDetector(days=84, end=END)
+    reports = []
+    for offset in range(84):
+        day = END - timedelta(days=offset)
+        reports += _reports('STEADY', 'Headache', day, 2)
+        reports += _reports('SPIKING', 'Rash', day, 12 if offset < 7 else 1)
+    detector.add_reports(reports)
+    ranked = detector.screen(method=method, top=10)
+    assert ranked[0]['drug'] == 'SPIKING'
+    assert ranked[0]['observed'] > ranked[0]['expected']
+    steady = [r for r in ranked if r['drug'] == 'STEADY']
+    assert all(r['score'] < ranked[0]['score'] for r in steady)
+    with pytest.raises(ValueError):
+        detector.screen(method='unknown')
@@ -0,0 +1,73 @@
+"""Tests de la validation par lot et de la quarantaine."""
+import copy
+import json
+
+from src.etl.data_cleaner import DataCleaner
+from src.etl.validation import BatchValidator, Quarantine
+
+
+def _raw(report_id='1', **patient):
+    base = {
+        'patientsex': '1',
+        'drug': [{'medicinalproduct': 'ASPIRIN', 'drugstartdate': '20200101'}],
+        'reaction': [{'reactionmeddrapt': 'Nausea', 'reactionoutcome': '1'}],
+    }
+    base.update(patient)
+    return {'safetyreportid': report_id, 'receivedate': '20200315', 'serious': '1', 'patient': base}
+
+
+def test_valid_reports_are_returned_unchanged():
+    report = _raw()
+    result = BatchValidator().validate([report])
+    assert result.valid[0] is report
+    assert result.summary() == {'valid': 1, 'quarantined': 0, 'fixed': 0, 'errors': {}}
+
+
+def test_critical_errors_go_to_quarantine():
+    missing_id = _raw()
+    del missing_id['safetyreportid']
+    result = BatchValidator().validate([missing_id, _raw('2', drug=[]), 'not a report', _raw('3')])
+    assert [r['safetyreportid'] for r in result.valid] == ['3']
+    assert len(result.quarantined) == 3
+    assert result.errors['safetyreportid:missing'] == 1
+    assert result.errors['patient.drug:invalid'] == 1
+    assert result.errors['<report>:invalid'] == 1
+
+
+def test_invalid_optional_fields_are_dropped_from_a_copy():
+    report = _raw(patientsex='9')
+    report['patient']['drug'].append({'medicinalproduct': 'IBUPROFEN', 'drugstartdate': '2020-13-45'})
+    original = copy.deepcopy(report)
+    result = BatchValidator().validate([report])
+    assert report == original
+    fixed = result.valid[0]
+    assert 'patientsex' not in fixed['patient']
+    assert 'drugstartdate' not in fixed['patient']['drug'][1]
+    assert fixed['patient']['drug'][0]['drugstartdate'] == '20200101'
+    assert result.fixed == 1
+    assert result.errors['patient.patientsex:invalid'] == 1
+    assert result.errors['patient.drug[].drugstartdate:invalid'] == 1
+
+
+def test_errors_are_counted_per_drug_element():
+    drugs = [{'medicinalproduct': ''}, {'medicinalproduct': 'ASPIRIN'}, {}]
+    validator = BatchValidator()
+    result = validator.validate([_raw(drug=drugs)])
+    assert result.errors['patient.drug[].medicinalproduct:missing'] == 2
+    assert validator.processed == 1
+
+
+def test_clean_batch_cleans_valid_reports():
+    result = DataCleaner.clean_batch([_raw('1'), {'safetyreportid': '2'}])
+    assert len(result.valid) == 1 and len(result.quarantined) == 1
+    assert result.valid[0]['report_id'] == '1'
+
+
+def test_quarantine_writes_json_lines(tmp_path):
+    quarantine = Quarantine(str(tmp_path))
+    result = BatchValidator().validate([{'safetyreportid': 'x'}])
+    assert quarantine.write(result.quarantined, source='ASPIRIN') == 1
+    assert quarantine.write([]) == 0
+    entry = json.loads(quarantine.path.read_text(encoding='utf-8'))
+    assert entry['source'] == 'ASPIRIN' and entry['report']['safetyreportid'] == 'x'
+    assert 'patient:missing' in entry['errors']
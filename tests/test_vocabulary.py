@@ -0,0 +1,40 @@
+"""Tests des vocabulaires médicaments/réactions encodés en entiers."""
+import pytest
+
+mongomock = pytest.importorskip('mongomock')
+
+from src.database.vocabulary import Vocabulary, encode_reports  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    return mongomock.MongoClient()['eim_test']
+
+
+def test_ids_are_stable_and_shared_between_instances(db):
+    vocab = Vocabulary(db['drug_vocab'], db['counters'])
+    vocab.ensure_indexes()
+    ids = vocab.encode_many(['Ibuprofen', 'ASPIRIN', ' ibuprofen ', None, ''])
+    assert ids[0] == ids[2] and len(set(ids)) == 2 and len(ids) == 3
+    # Un autre processus relit les identifiants déjà attribués au lieu d'en créer
+    other = Vocabulary(db['drug_vocab'], db['counters'])
+    assert other.encode('aspirin') == ids[1]
+    assert other.encode_many(['METFORMIN']) == [max(ids) + 1]
+    assert other.decode(ids[0]) == 'IBUPROFEN'
+    assert Vocabulary(db['drug_vocab'], db['counters']).load() == 3
+
+
+def test_encode_reports_adds_sorted_id_arrays(db):
+    drugs = Vocabulary(db['drug_vocab'], db['counters'])
+    reactions = Vocabulary(db['reaction_vocab'], db['counters'])
+    reports = [
+        {'report_id': '1', 'drugs': [{'name': 'ADVIL', 'normalized_name': 'IBUPROFEN'}, {'name': 'ASPIRIN'}],
+         'reactions': [{'term': 'Nausea'}, {'term': 'Nausea'}]},
+        {'report_id': '2', 'drugs': [{'name': 'IBUPROFEN'}], 'reactions': []},
+    ]
+    encode_reports(reports, drugs, reactions)
+    ibuprofen = drugs.encode('IBUPROFEN')
+    assert ibuprofen in reports[0]['drug_ids'] and reports[1]['drug_ids'] == [ibuprofen]
+    assert reports[0]['drug_ids'] == sorted(reports[0]['drug_ids'])
+    assert reports[0]['reaction_ids'] == [reactions.encode('NAUSEA')]
+    assert reports[1]['reaction_ids'] == []